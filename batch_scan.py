@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Headless batch compliance scanner.
+
+Audits every document in a set of directories or globs against one or more
+standards, without the Streamlit UI. Documents run on a bounded worker pool
+with separate concurrency limits for Document AI and Gemini calls; each
+document is extracted once and audited against every requested standard.
+Results stream to <output-dir>/results.jsonl and rendered reports to
+<output-dir>/reports/. Completed (document hash, task) pairs are appended to
+<output-dir>/manifest.jsonl, so an interrupted run resumes where it stopped
+and unchanged documents are skipped on the next nightly run.
+
+Examples:
+    python batch_scan.py specs/ --standard GDPR --standard HIPAA
+    python batch_scan.py "specs/**/*.pdf" --standard all --formats md,pdf --test-cases
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.modules import compliance_scanner, test_case_generator, workflows
+from src.utils.cache import content_hash
+from src.utils.report_generator import REPORT_FORMATS, render_report
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+def resolve_standards(names: list[str]) -> list[str]:
+    """Maps case-insensitive fragments such as 'gdpr' or 'USA' to COMPLIANCE_STANDARDS keys."""
+    if any(name.lower() == "all" for name in names):
+        return list(compliance_scanner.COMPLIANCE_STANDARDS)
+    resolved = []
+    for name in names:
+        matches = [key for key in compliance_scanner.COMPLIANCE_STANDARDS if name.lower() in key.lower()]
+        if len(matches) != 1:
+            choices = ", ".join(compliance_scanner.COMPLIANCE_STANDARDS)
+            raise ValueError(f"Standard '{name}' must match exactly one of: {choices}")
+        if matches[0] not in resolved:
+            resolved.append(matches[0])
+    return resolved
+
+def find_documents(inputs: list[str]) -> list[str]:
+    """Expands directories (recursively) and glob patterns into a sorted list of supported files."""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+def _slug(text: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in text).strip("_").lower()
+
+class BatchScanner:
+    """Runs the scan pipeline over many documents and streams results to an output directory."""
+
+    def __init__(self, output_dir: str, standards: list[str], formats: list[str], test_cases: bool = False,
+                 record_history: bool = True, docai_concurrency: int = 2, gemini_concurrency: int = 4,
+                 resume: bool = True, incremental: bool = False):
+        self.output_dir = output_dir
+        self.standards = standards
+        self.formats = formats
+        self.test_cases = test_cases
+        self.record_history = record_history
+        self.incremental = incremental
+        self._docai_slots = threading.BoundedSemaphore(docai_concurrency)
+        self._gemini_slots = threading.BoundedSemaphore(gemini_concurrency)
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.join(output_dir, "reports"), exist_ok=True)
+        self._manifest_path = os.path.join(output_dir, "manifest.jsonl")
+        self._results_path = os.path.join(output_dir, "results.jsonl")
+        self.completed = self._load_manifest() if resume else set()
+
+    def _load_manifest(self) -> set[tuple[str, str]]:
+        completed = set()
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        completed.add((entry["doc_hash"], entry["task"]))
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # A torn last line from an interrupted run.
+        return completed
+
+    def _emit(self, result: dict) -> None:
+        """Appends a result line and, if it succeeded, marks the task as done in the manifest."""
+        with self._write_lock:
+            with open(self._results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+            if result["status"] == "succeeded":
+                with open(self._manifest_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"doc_hash": result["doc_hash"], "task": result["task"]}) + "\n")
+                self.completed.add((result["doc_hash"], result["task"]))
+
+    def _write_reports(self, report_dir: str, name: str, report: str, title: str) -> list[str]:
+        os.makedirs(report_dir, exist_ok=True)
+        written = []
+        for fmt in self.formats:
+            path = os.path.join(report_dir, f"{name}.{fmt}")
+            with open(path, "wb") as f:
+                f.write(render_report(report, fmt, title))
+            written.append(path)
+        return written
+
+    def pending_tasks(self, doc_hash: str) -> list[str]:
+        tasks = [f"scan:{standard}" for standard in self.standards]
+        if self.test_cases:
+            tasks.append("test_cases")
+        return [task for task in tasks if (doc_hash, task) not in self.completed]
+
+    def process(self, path: str) -> list[dict]:
+        """Extracts one document and runs every pending task on it. Returns the emitted results."""
+        with open(path, "rb") as f:
+            content = f.read()
+        doc_hash = content_hash(content)
+        tasks = self.pending_tasks(doc_hash)
+        if not tasks:
+            return []
+
+        file_name = os.path.basename(path)
+        base = {"file": path, "doc_hash": doc_hash}
+        report_dir = os.path.join(self.output_dir, "reports", f"{_slug(os.path.splitext(file_name)[0])}-{doc_hash[:8]}")
+        mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        with self._docai_slots:
+            extracted_text = compliance_scanner.extract_document_text(content, mime_type)
+        if "Error:" in extracted_text:
+            results = [{**base, "task": task, "status": "failed", "error": extracted_text} for task in tasks]
+            for result in results:
+                self._emit(result)
+            return results
+
+        results = []
+        for task in tasks:
+            started = time.time()
+            result = {**base, "task": task}
+            try:
+                if task == "test_cases":
+                    with self._gemini_slots:
+                        df = test_case_generator.generate_test_cases_from_text(extracted_text)
+                    os.makedirs(report_dir, exist_ok=True)
+                    csv_path = os.path.join(report_dir, "test_cases.csv")
+                    df.to_csv(csv_path, index=False)
+                    result.update(status="succeeded", test_cases=len(df), outputs=[csv_path])
+                else:
+                    standard = task.split(":", 1)[1]
+                    with self._gemini_slots:
+                        scan = workflows.run_scan(file_name, content, mime_type, standard,
+                                                  incremental=self.incremental, extracted_text=extracted_text,
+                                                  record=self.record_history)
+                    report = scan.pop("report")
+                    if not self.record_history:
+                        del scan["scan_id"]
+                    outputs = self._write_reports(report_dir, _slug(standard), report, f"{standard} - {file_name}")
+                    result.update(status="succeeded", outputs=outputs, **scan)
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+            result["elapsed"] = round(time.time() - started, 2)
+            self._emit(result)
+            results.append(result)
+        return results
+
+    def run(self, paths: list[str], workers: int = 4) -> dict:
+        """Processes all documents on a bounded pool and returns counts of succeeded, failed and skipped tasks."""
+        totals = {"succeeded": 0, "failed": 0, "skipped_documents": 0}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(self.process, path): path for path in paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"[ERROR] {path}: {e}")
+                    totals["failed"] += 1
+                    continue
+                if not results:
+                    totals["skipped_documents"] += 1
+                    print(f"[INFO] Skipped {path} (already processed).")
+                for result in results:
+                    totals[result["status"]] += 1
+                    if result["status"] == "failed":
+                        print(f"[ERROR] {path} [{result['task']}]: {result['error']}")
+                    else:
+                        print(f"[INFO] {path} [{result['task']}] done in {result['elapsed']}s.")
+        return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch compliance scanning for AI Compliance Co-Pilot")
+    parser.add_argument('inputs', nargs='+', help='Directories or glob patterns of documents to scan')
+    parser.add_argument('--standard', '-s', action='append', required=True,
+                        help="Standard to audit against, e.g. 'GDPR', 'HIPAA', 'India' or 'all'. Repeatable.")
+    parser.add_argument('--output-dir', '-o', default='batch_output', help='Directory for results and reports')
+    parser.add_argument('--formats', default='md', help=f"Comma-separated report formats ({', '.join(REPORT_FORMATS)})")
+    parser.add_argument('--test-cases', action='store_true', help='Also generate a test suite per document')
+    parser.add_argument('--workers', type=int, default=4, help='Documents processed concurrently')
+    parser.add_argument('--docai-concurrency', type=int, default=2, help='Concurrent Document AI calls')
+    parser.add_argument('--gemini-concurrency', type=int, default=4, help='Concurrent Gemini calls')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore the manifest and reprocess everything')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-audit only sections changed since a previous scan, reusing cached findings')
+    parser.add_argument('--no-history', action='store_true', help='Do not record scans in the scan history')
+    args = parser.parse_args()
+
+    try:
+        standards = resolve_standards(args.standard)
+        formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+        unknown = [fmt for fmt in formats if fmt not in REPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unsupported report format(s): {', '.join(unknown)}")
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = find_documents(args.inputs)
+    if not paths:
+        print("[ERROR] No supported documents found.")
+        return 1
+    print(f"[INFO] Scanning {len(paths)} document(s) against: {', '.join(standards)}")
+
+    scanner = BatchScanner(
+        args.output_dir, standards, formats, test_cases=args.test_cases, record_history=not args.no_history,
+        docai_concurrency=args.docai_concurrency, gemini_concurrency=args.gemini_concurrency,
+        resume=not args.no_resume, incremental=args.incremental,
+    )
+    totals = scanner.run(paths, workers=args.workers)
+    print(f"[INFO] Finished: {totals['succeeded']} succeeded, {totals['failed']} failed, "
+          f"{totals['skipped_documents']} document(s) skipped.")
+    return 1 if totals["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Worker processes for the durable job queue.
+
+Drains scan, test-generation, synthesis and export jobs from the SQLite queue
+independently of the Streamlit app. Throughput scales by starting more
+workers, on this machine (--workers) or on any host sharing the queue file.
+
+Examples:
+    python queue_worker.py run --workers 4
+    python queue_worker.py enqueue scan '{"file_path": "docs/srs.pdf", "standard": "GDPR", "standard_persona": "a GDPR auditor"}'
+    python queue_worker.py stats
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+
+from src.services import job_queue
+
+def _heartbeat(queue: job_queue.DurableQueue, job_id: str, worker_id: str, lease_seconds: float,
+               done: threading.Event) -> None:
+    """Keeps the lease of a long-running job alive until `done` is set."""
+    while not done.wait(lease_seconds / 3):
+        if not queue.extend_lease(job_id, worker_id, lease_seconds):
+            print(f"[ERROR] {worker_id} lost the lease on job {job_id}.")
+            return
+
+def worker_loop(queue_path: str, worker_index: int, poll_interval: float, lease_seconds: float,
+                kinds: list[str] = None) -> None:
+    """Leases and runs jobs until the process receives SIGTERM or SIGINT."""
+    from src.modules.job_handlers import HANDLERS, PermanentJobError
+
+    worker_id = f"{os.uname().nodename}:{os.getpid()}:{worker_index}"
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    queue = job_queue.DurableQueue(queue_path)
+    print(f"[INFO] Worker {worker_id} started.")
+    while not stop.is_set():
+        job = queue.lease(worker_id, lease_seconds=lease_seconds, kinds=kinds)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+
+        print(f"[INFO] {worker_id} running {job['kind']} job {job['id']} (attempt {job['attempts']}).")
+        done = threading.Event()
+        threading.Thread(
+            target=_heartbeat, args=(queue, job["id"], worker_id, lease_seconds, done), daemon=True
+        ).start()
+        try:
+            handler = HANDLERS.get(job["kind"])
+            if handler is None:
+                raise PermanentJobError(f"No handler for job kind '{job['kind']}'.")
+            result = handler(job["payload"])
+            done.set()
+            queue.complete(job["id"], worker_id, result)
+            print(f"[INFO] {worker_id} finished job {job['id']}.")
+        except Exception as e:
+            done.set()
+            status = queue.fail(job["id"], worker_id, f"{type(e).__name__}: {e}",
+                                retryable=not isinstance(e, PermanentJobError))
+            print(f"[ERROR] {worker_id} failed job {job['id']} ({status}): {e}")
+
+    queue.close()
+    print(f"[INFO] Worker {worker_id} stopped.")
+
+def run_workers(args) -> int:
+    kinds = args.kinds.split(",") if args.kinds else None
+    processes = [
+        multiprocessing.Process(
+            target=worker_loop, args=(args.queue_path, i, args.poll_interval, args.lease_seconds, kinds)
+        )
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for process in processes:
+        process.join()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable job queue workers for AI Compliance Co-Pilot")
+    parser.add_argument('--queue-path', default=job_queue.DEFAULT_PATH, help='Path of the SQLite queue file')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='Start worker processes')
+    run.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+    run.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+    run.add_argument('--lease-seconds', type=float, default=300.0, help='Lease length, renewed by a heartbeat')
+    run.add_argument('--kinds', help='Comma-separated job kinds to handle (default: all)')
+
+    enqueue = subparsers.add_parser('enqueue', help='Add a job to the queue')
+    enqueue.add_argument('kind', choices=['scan', 'test_generation', 'synthesis', 'export'])
+    enqueue.add_argument('payload', help='Job payload as a JSON object')
+    enqueue.add_argument('--priority', type=int, default=0, help='Higher priorities run first')
+    enqueue.add_argument('--max-attempts', type=int, default=3, help='Attempts before dead-lettering')
+
+    subparsers.add_parser('stats', help='Show the number of jobs per status')
+    subparsers.add_parser('dead', help='List dead-lettered jobs')
+    requeue = subparsers.add_parser('requeue', help='Move a dead-lettered job back to the queue')
+    requeue.add_argument('job_id')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        return run_workers(args)
+
+    queue = job_queue.DurableQueue(args.queue_path)
+    if args.command == 'enqueue':
+        job_id = queue.enqueue(args.kind, json.loads(args.payload), priority=args.priority,
+                               max_attempts=args.max_attempts)
+        print(job_id)
+    elif args.command == 'stats':
+        print(json.dumps(queue.stats(), indent=2))
+    elif args.command == 'dead':
+        for job in queue.dead_letters():
+            updated = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(job['updated_at']))
+            print(f"{job['id']}  {job['kind']:<16} {updated}  {job['last_error']}")
+    elif args.command == 'requeue':
+        if not queue.requeue(args.job_id):
+            print(f"[ERROR] Job {args.job_id} is not dead-lettered.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+JSON HTTP API for the compliance scanner, test case generator, synthetic
+data hub and report rendering.
+
+Long AI pipelines use submit-and-poll: POST returns 202 with a job ID, and
+the job is polled at /api/v1/jobs/<id> or followed as newline-delimited JSON
+at /api/v1/jobs/<id>/stream. Jobs run on the shared background job runner,
+so the event loop only parses requests and reports status.
+
+Run with:
+    python -m src.api.server --port 8081
+"""
+
+import os
+import json
+import base64
+import asyncio
+import argparse
+import binascii
+import tornado.web
+import tornado.ioloop
+import tornado.iostream
+import tornado.httpserver
+from dotenv import load_dotenv
+from src.modules import compliance_scanner, workflows
+from src.utils import job_runner
+from src.utils.report_generator import REPORT_FORMATS, render_report
+
+load_dotenv()
+
+# Request bodies larger than this are rejected before they are read.
+MAX_BODY_BYTES = int(float(os.getenv("API_MAX_BODY_MB", "20")) * 1024 * 1024)
+# Decoded documents larger than this are rejected.
+MAX_DOCUMENT_BYTES = int(float(os.getenv("API_MAX_DOCUMENT_MB", "15")) * 1024 * 1024)
+STREAM_POLL_INTERVAL = 0.5
+
+# --- Job functions (run on the job runner's threads) ---
+def _run_test_cases(file_content: bytes, mime_type: str) -> dict:
+    df = workflows.generate_test_cases(file_content, mime_type, stream=True)
+    return {"rows": json.loads(df.to_json(orient="records"))}
+
+def _run_synthetic(prompt: str) -> dict:
+    _, df = workflows.generate_synthetic_data(prompt, stream=True)
+    return {"rows": json.loads(df.to_json(orient="records", date_format="iso"))}
+
+def job_to_dict(job: job_runner.Job, include_result: bool = True) -> dict:
+    """Serialises a job's status, and its result or error once it has finished."""
+    data = {
+        "id": job.id, "kind": job.kind, "status": job.status, "progress": round(job.progress, 3),
+        "message": job.message, "elapsed": round(job.elapsed, 2),
+    }
+    if include_result and job.status == job_runner.SUCCEEDED:
+        data["result"] = job.result
+    elif job.status == job_runner.FAILED:
+        data["error"] = str(job.error)
+    return data
+
+# --- Handlers ---
+class BaseHandler(tornado.web.RequestHandler):
+    def prepare(self):
+        api_key = os.getenv("API_KEY")
+        if api_key and self.request.headers.get("Authorization") != f"Bearer {api_key}":
+            raise tornado.web.HTTPError(401, reason="Missing or invalid API key.")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+    def json_body(self) -> dict:
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Request body must be valid JSON.")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Request body must be a JSON object.")
+        return body
+
+    def document(self, body: dict) -> tuple[str, bytes, str]:
+        """Returns (file_name, content, mime_type) from a `content_b64` document in the body."""
+        if not body.get("content_b64") or not body.get("mime_type"):
+            raise tornado.web.HTTPError(400, reason="'content_b64' and 'mime_type' are required.")
+        file_name = body.get("file_name", "document")
+        if not all(isinstance(value, str) for value in (body["content_b64"], body["mime_type"], file_name)):
+            raise tornado.web.HTTPError(400, reason="'content_b64', 'mime_type' and 'file_name' must be strings.")
+        if len(body["content_b64"]) * 3 // 4 > MAX_DOCUMENT_BYTES:
+            raise tornado.web.HTTPError(413, reason=f"Document exceeds {MAX_DOCUMENT_BYTES} bytes.")
+        try:
+            content = base64.b64decode(body["content_b64"], validate=True)
+        except (binascii.Error, ValueError):
+            raise tornado.web.HTTPError(400, reason="'content_b64' is not valid base64.")
+        return file_name, content, body["mime_type"]
+
+    def submit(self, fn, *args, kind: str, **kwargs) -> None:
+        try:
+            job = job_runner.get_runner().submit(fn, *args, kind=kind, **kwargs)
+        except RuntimeError as e:
+            raise tornado.web.HTTPError(429, reason=str(e))
+        self.set_status(202)
+        self.set_header("Location", f"/api/v1/jobs/{job.id}")
+        self.finish({**job_to_dict(job, include_result=False), "status_url": f"/api/v1/jobs/{job.id}"})
+
+class HealthHandler(BaseHandler):
+    def prepare(self):
+        pass  # Health checks never need the API key.
+
+    def get(self):
+        self.finish({"status": "ok"})
+
+class StandardsHandler(BaseHandler):
+    def get(self):
+        self.finish({
+            "standards": [
+                {"name": name, "description": info["description"]}
+                for name, info in compliance_scanner.COMPLIANCE_STANDARDS.items()
+            ]
+        })
+
+class ScanHandler(BaseHandler):
+    def post(self):
+        body = self.json_body()
+        standard = body.get("standard")
+        if not isinstance(standard, str) or standard not in compliance_scanner.COMPLIANCE_STANDARDS:
+            raise tornado.web.HTTPError(
+                400, reason=f"'standard' must be one of: {', '.join(compliance_scanner.COMPLIANCE_STANDARDS)}"
+            )
+        file_name, content, mime_type = self.document(body)
+        self.submit(workflows.run_scan, file_name, content, mime_type, standard,
+                    incremental=bool(body.get("incremental")), kind="scan")
+
+class TestCasesHandler(BaseHandler):
+    def post(self):
+        _, content, mime_type = self.document(self.json_body())
+        self.submit(_run_test_cases, content, mime_type, kind="test_cases")
+
+class SyntheticDataHandler(BaseHandler):
+    def post(self):
+        prompt = self.json_body().get("prompt", "")
+        if not isinstance(prompt, str):
+            raise tornado.web.HTTPError(400, reason="'prompt' must be a string.")
+        prompt = prompt.strip()
+        if not prompt:
+            raise tornado.web.HTTPError(400, reason="'prompt' is required.")
+        self.submit(_run_synthetic, prompt, kind="synthetic_data")
+
+class JobHandler(BaseHandler):
+    def get(self, job_id):
+        job = job_runner.get_runner().get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason="Job not found.")
+        self.finish(job_to_dict(job))
+
+    def delete(self, job_id):
+        if not job_runner.get_runner().cancel(job_id):
+            raise tornado.web.HTTPError(409, reason="Job not found or already running.")
+        self.set_status(204)
+        self.finish()
+
+class JobStreamHandler(BaseHandler):
+    """
+    Streams a job as newline-delimited JSON: a status line whenever progress
+    changes and a "partial" line for each row the job publishes while it runs,
+    then one "row" line per final result row (for row results) and a final
+    line with the finished job. Final rows supersede partial ones, which may
+    still be renumbered or deduplicated.
+    """
+
+    async def get(self, job_id):
+        job = job_runner.get_runner().get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason="Job not found.")
+        self.set_header("Content-Type", "application/x-ndjson")
+
+        last, sent = None, 0
+        while not job.done:
+            status = (job.status, round(job.progress, 3), job.message)
+            if status != last:
+                await self._send({"event": "status", **job_to_dict(job, include_result=False)})
+                last = status
+            rows = job.partial[sent:]
+            for row in rows:
+                await self._send({"event": "partial", "row": row})
+            sent += len(rows)
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+        final = job_to_dict(job)
+        result = final.pop("result", None)
+        if isinstance(result, dict) and isinstance(result.get("rows"), list):
+            for row in result["rows"]:
+                await self._send({"event": "row", "row": row})
+            result = {k: v for k, v in result.items() if k != "rows"}
+        if result is not None:
+            final["result"] = result
+        await self._send({"event": "done", **final})
+        self.finish()
+
+    async def _send(self, data: dict) -> None:
+        self.write(json.dumps(data) + "\n")
+        try:
+            await self.flush()
+        except tornado.iostream.StreamClosedError:
+            pass  # The client went away; the job keeps running and can still be polled.
+
+class RenderReportHandler(BaseHandler):
+    async def post(self):
+        body = self.json_body()
+        fmt = body.get("format", "pdf")
+        if fmt not in REPORT_FORMATS:
+            raise tornado.web.HTTPError(400, reason=f"'format' must be one of: {', '.join(REPORT_FORMATS)}")
+        if not isinstance(body.get("report"), str):
+            raise tornado.web.HTTPError(400, reason="'report' (markdown) is required.")
+
+        data = await tornado.ioloop.IOLoop.current().run_in_executor(
+            None, render_report, body["report"], fmt, body.get("title", "Compliance Report")
+        )
+        self.set_header("Content-Type", REPORT_FORMATS[fmt])
+        self.finish(data)
+
+def make_app() -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/healthz", HealthHandler),
+        (r"/api/v1/standards", StandardsHandler),
+        (r"/api/v1/scans", ScanHandler),
+        (r"/api/v1/test-cases", TestCasesHandler),
+        (r"/api/v1/synthetic-data", SyntheticDataHandler),
+        (r"/api/v1/reports/render", RenderReportHandler),
+        (r"/api/v1/jobs/([0-9a-f]{32})", JobHandler),
+        (r"/api/v1/jobs/([0-9a-f]{32})/stream", JobStreamHandler),
+    ])
+
+async def serve(port: int, address: str) -> None:
+    server = tornado.httpserver.HTTPServer(make_app(), max_body_size=MAX_BODY_BYTES)
+    server.listen(port, address=address)
+    print(f"[INFO] API listening on http://{address}:{port}")
+    await asyncio.Event().wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API for AI Compliance Co-Pilot")
+    parser.add_argument('--port', type=int, default=int(os.getenv("API_PORT", "8081")), help='Port to listen on')
+    parser.add_argument('--address', default="0.0.0.0", help='Address to bind to')
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.address))
+
+if __name__ == "__main__":
+    main()
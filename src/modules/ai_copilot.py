@@ -1,7 +1,116 @@
+import os
 import streamlit as st
+from typing import Optional
 from src.services import gcp_vertex_ai
+from src.utils.cache import stable_hash
+from src.utils.semantic_cache import SemanticCache
+from src.modules import regulation_index
+from src.modules.conversation_memory import ConversationMemory
 import time
 
+# --- Guardrail and Alignment Prompt Engineering ---
+# The fixed system prompt goes first, as a cacheable prefix; the template holds the per-question part.
+COPILOT_SYSTEM_PROMPT = """
+**SYSTEM INSTRUCTIONS:**
+1.  **Persona:** You are an expert AI assistant specializing in global healthcare software compliance (DPDPA, HIPAA, GDPR, etc.).
+2.  **Primary Directive: CONCISENESS.** Your response MUST be under 100 words and between 300-500 characters. This is a strict constraint. Do not exceed this limit.
+3.  **Tone:** Formal, professional, and direct.
+4.  **Formatting:** Use simple Markdown (bolding for emphasis). Do not use lists unless absolutely necessary for clarity within the character limit.
+5.  **Safety:** Do not provide legal advice. If asked for legal advice, politely state that you are an informational tool and recommend consulting a qualified professional.
+6.  **Grounding:** When reference clauses are given, base your answer on them and cite them by their bracketed citation. If they do not cover the question, answer from general knowledge and say so.
+7.  **Context:** Use the conversation so far, when given, to resolve follow-up questions.
+"""
+
+COPILOT_PROMPT_TEMPLATE = """{references}{conversation}
+**USER QUERY:**
+"{user_prompt}"
+"""
+
+WELCOME_MESSAGE = "Welcome to the AI Compliance Co-Pilot. I'm here to assist you with regulatory questions, compliance guidance, and best practices for healthcare software development. How may I help you today?"
+
+# Paraphrases of earlier questions ("What is HIPAA?", "what's hipaa") are answered from here.
+answer_cache = SemanticCache(threshold=float(os.getenv("COPILOT_CACHE_THRESHOLD", "0.85")),
+                             maxsize=int(os.getenv("COPILOT_CACHE_SIZE", "512")))
+
+# Clauses retrieved from the regulation corpus per question; a few short clauses keep the prompt small.
+REFERENCE_CLAUSES = int(os.getenv("COPILOT_REFERENCE_CLAUSES", "3"))
+
+def _prompt_version() -> str:
+    # Cached answers are only valid for the prompt, settings and corpus that produced them.
+    return stable_hash(COPILOT_SYSTEM_PROMPT, COPILOT_PROMPT_TEMPLATE, gcp_vertex_ai.PROFILES["copilot"].settings(),
+                       gcp_vertex_ai.PROFILES["copilot"].model, _corpus_version())
+
+def _corpus_version() -> str | None:
+    try:
+        return regulation_index.get_index().corpus_hash
+    except (OSError, ValueError):
+        return None
+
+def _references(user_prompt: str) -> str:
+    """The reference-clause block for a question, or "" if nothing relevant is found."""
+    try:
+        matches = regulation_index.get_index().search(user_prompt, k=REFERENCE_CLAUSES)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Regulation index unavailable; answering without reference clauses: {e}")
+        return ""
+    if not matches:
+        return ""
+    clauses = "\n".join(f"- {match.clause.to_prompt_text()}" for match in matches)
+    return f"\n**REFERENCE CLAUSES:**\n{clauses}\n"
+
+def build_prompt(user_prompt: str, conversation: str = "", retrieval_query: str = None) -> str:
+    """
+    The per-question part of the Co-Pilot prompt, which follows COPILOT_SYSTEM_PROMPT:
+    the most relevant regulation clauses, the conversation so far and the question.
+    """
+    if conversation:
+        conversation = f"\n**CONVERSATION SO FAR:**\n{conversation}\n"
+    return COPILOT_PROMPT_TEMPLATE.format(references=_references(retrieval_query or user_prompt),
+                                          conversation=conversation, user_prompt=user_prompt)
+
+def answer_question(user_prompt: str, memory: ConversationMemory = None) -> str:
+    """
+    Answers a Co-Pilot question, from the semantic cache when a similar
+    question was answered before.
+
+    Args:
+        user_prompt (str): The question.
+        memory (ConversationMemory): The session's conversation. Earlier turns are
+            sent with the question, and the question and answer are recorded in it
+            unless the call failed.
+
+    Returns:
+        str: The answer, or an error message from the model call (not cached).
+    """
+    conversation = memory.to_prompt_text() if memory is not None else ""
+    response = _answer(user_prompt, conversation, memory)
+    # A failed question is left out, so the error text is never sent back as context.
+    if memory is not None and not response.startswith("Error"):
+        memory.add("user", user_prompt)
+        memory.add("assistant", response)
+    return response
+
+def _answer(user_prompt: str, conversation: str, memory: Optional[ConversationMemory]) -> str:
+    # Follow-ups ("and under GDPR?") mean different things in different conversations,
+    # so only opening questions are answered from, or stored in, the cache.
+    use_cache = memory is None or not memory.messages
+    if use_cache:
+        answer_cache.ensure_version(_prompt_version())
+        hit = answer_cache.lookup(user_prompt)
+        if hit is not None:
+            print(f"[INFO] Co-Pilot answer served from cache (similarity {hit.score:.2f} to '{hit.matched_query}').")
+            return hit.answer
+
+    # A follow-up is retrieved together with the previous question, which usually names the regulation.
+    previous = [m["content"] for m in (memory.messages if memory is not None else []) if m["role"] == "user"]
+    retrieval_query = f"{previous[-1]} {user_prompt}" if conversation and previous else None
+    # The copilot profile caps the output tokens, so answers are bounded at the source.
+    response = gcp_vertex_ai.generate_text(build_prompt(user_prompt, conversation, retrieval_query), profile="copilot",
+                                           prefix=COPILOT_SYSTEM_PROMPT)
+    if use_cache and not response.startswith("Error"):
+        answer_cache.store(user_prompt, response)
+    return response
+
 def render_copilot():
     """
     Renders the AI Co-Pilot chat interface with enterprise-grade design
@@ -354,47 +463,24 @@ def render_copilot():
     </style>
     """, unsafe_allow_html=True)
 
-    # Initialize chat history with a welcome message
-    if "messages" not in st.session_state:
-        st.session_state.messages = [{
-            "role": "assistant",
-            "content": "Welcome to the AI Compliance Co-Pilot. I'm here to assist you with regulatory questions, compliance guidance, and best practices for healthcare software development. How may I help you today?"
-        }]
+    # Conversation memory is per session; its stored history is capped, so reruns stay cheap.
+    if "copilot_memory" not in st.session_state:
+        st.session_state.copilot_memory = ConversationMemory()
+    memory = st.session_state.copilot_memory
 
-    # Display chat history
-    for message in st.session_state.messages:
+    # Display the welcome message (not part of the conversation sent to the model) and chat history
+    with st.chat_message("assistant"):
+        st.markdown(WELCOME_MESSAGE)
+    for message in memory.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
     # Process user input
     if user_prompt := st.chat_input("Ask about ALL regulations..."):
-        st.session_state.messages.append({"role": "user", "content": user_prompt})
         with st.chat_message("user"):
             st.markdown(user_prompt)
 
         with st.chat_message("assistant"):
             with st.spinner("Consulting regulatory models..."):
-                
-                # --- Guardrail and Alignment Prompt Engineering ---
-                expert_prompt = f"""
-                **SYSTEM INSTRUCTIONS:**
-                1.  **Persona:** You are an expert AI assistant specializing in global healthcare software compliance (DPDPA, HIPAA, GDPR, etc.).
-                2.  **Primary Directive: CONCISENESS.** Your response MUST be under 100 words and between 300-500 characters. This is a strict constraint. Do not exceed this limit.
-                3.  **Tone:** Formal, professional, and direct.
-                4.  **Formatting:** Use simple Markdown (bolding for emphasis). Do not use lists unless absolutely necessary for clarity within the character limit.
-                5.  **Safety:** Do not provide legal advice. If asked for legal advice, politely state that you are an informational tool and recommend consulting a qualified professional.
-                
-                **USER QUERY:**
-                "{user_prompt}"
-                """
-                
-                response = gcp_vertex_ai.generate_text(expert_prompt)
-                
-                # --- Post-generation check (optional but good practice) ---
-                # Although the prompt is strong, a final check can enforce the hard limit.
-                if len(response) > 550: # Give a small buffer
-                    response = response[:520] + "..."
-
-                st.markdown(response)
-        
-        st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+                response = answer_question(user_prompt, memory)
+                st.markdown(response)
\ No newline at end of file
@@ -1,11 +1,78 @@
-from src.services import gcp_doc_ai, gcp_vertex_ai
+import re
+from src.modules import document_sections, requirements_index, rule_packs
+from src.services import gcp_doc_ai, gcp_vertex_ai, local_store
+from src.utils.cache import stable_hash
+from src.utils.job_runner import report_progress
 
-def analyze_document_compliance(file_content: bytes, mime_type: str, standard_persona: str) -> str:
-    extracted_text = gcp_doc_ai.process_document(file_content, mime_type)
+SECTION_FINDINGS_COLLECTION = "section_findings"
+GENERATION_PROFILE = "compliance_audit"
+# Bump when the audit prompt changes so cached section findings are not reused.
+AUDIT_PROMPT_VERSION = 2
+
+_SECTION_HEADER = re.compile(r"^#{2,4}\s*Section:\s*(.+?)\s*$", re.MULTILINE)
+
+# Supported standards, shared by the scanner page and the batch CLI.
+COMPLIANCE_STANDARDS = {
+    "India (DPDPA/CDSCO)": {
+        "description": "Indian Digital Personal Data Protection Act (DPDPA) and CDSCO telemedicine guidelines",
+        "expert_persona": "An expert on the Indian Digital Personal Data Protection Act (DPDPA) and CDSCO telemedicine guidelines.",
+        "color": "#059669"
+    },
+    "USA (HIPAA/FDA)": {
+        "description": "US Health Insurance Portability and Accountability Act (HIPAA) and FDA SaMD guidelines",
+        "expert_persona": "An expert on the US Health Insurance Portability and Accountability Act (HIPAA) and FDA guidelines for software as a medical device (SaMD).",
+        "color": "#dc2626"
+    },
+    "EU (GDPR/MDR)": {
+        "description": "EU General Data Protection Regulation (GDPR) and Medical Device Regulation (MDR)",
+        "expert_persona": "An expert on the EU General Data Protection Regulation (GDPR) and Medical Device Regulation (MDR).",
+        "color": "#7c3aed"
+    }
+}
+
+def analyze_document_compliance(file_content: bytes, mime_type: str, standard_persona: str,
+                                incremental: bool = False) -> str:
+    report_progress(0.1, "Extracting document text...")
+    extracted_text = extract_document_text(file_content, mime_type)
     if "Error:" in extracted_text:
         return extracted_text
+    if incremental:
+        return audit_sections_incrementally(extracted_text, standard_persona)
+    return audit_extracted_text(extracted_text, standard_persona)
+
+def extract_document_text(file_content: bytes, mime_type: str) -> str:
+    """Extracts the document's text with Document AI. Returns an "Error: ..." string on failure."""
+    return gcp_doc_ai.process_document(file_content, mime_type)
+
+def standard_for_persona(standard_persona: str) -> str | None:
+    """Returns the COMPLIANCE_STANDARDS key whose expert persona this is, or None for a custom persona."""
+    for name, info in COMPLIANCE_STANDARDS.items():
+        if info["expert_persona"] == standard_persona:
+            return name
+    return None
+
+def prescreen(extracted_text: str, standard_persona: str,
+              sections: list[document_sections.Section] = None) -> rule_packs.ScreenResult | None:
+    """Runs the standard's rule pack over the text. Returns None when the persona has no rule pack."""
+    standard = standard_for_persona(standard_persona)
+    pack = rule_packs.get_rule_pack(standard) if standard else None
+    if pack is None:
+        return None
+    sections = sections if sections is not None else document_sections.segment_text(extracted_text)
+    return pack.screen(extracted_text, sections)
 
-    prompt = f"""
+def _prescreen_instructions(screen: rule_packs.ScreenResult) -> list[str]:
+    decided = screen.decided_checks()
+    if not decided:
+        return []
+    return [
+        "These checks were already decided by deterministic rules for requirements not shown below; "
+        "do not report them again for those requirements: " + "; ".join(decided)
+    ]
+
+def audit_instructions(standard_persona: str) -> str:
+    """The fixed persona and instruction block of the audit prompt, sent as a cacheable prefix."""
+    return f"""
     As an AI assistant role-playing as {standard_persona}, your task is to conduct a meticulous compliance audit of the provided software requirements document.
 
     Instructions:
@@ -17,12 +84,138 @@ def analyze_document_compliance(file_content: bytes, mime_type: str, standard_pe
        - **[Pass]:** Areas that demonstrate clear compliance.
     4. For each point, cite the specific requirement ID or section from the document if possible.
     5. Provide a concise, actionable recommendation for remediation for each risk and warning.
-    6. Format your entire response in structured Markdown.
+    6. Format your entire response in structured Markdown."""
+
+def _audit_prompt(document_text: str, extra_instructions: list[str] = None) -> str:
+    """The per-document part of the audit prompt, which follows `audit_instructions`."""
+    extra = "".join(f"\n    {i}. {text}" for i, text in enumerate(extra_instructions or [], start=7))
+    return f"""{extra}
 
     Document for Analysis:
     ---
-    {extracted_text}
+    {document_text}
     ---
     """
-    
-    return gcp_vertex_ai.generate_text(prompt)
\ No newline at end of file
+
+def _with_traceability(report: str, extracted_text: str) -> str:
+    """Appends which of the document's requirements the findings cite, and any IDs not in the document."""
+    index = requirements_index.get_index(extracted_text)
+    if not len(index):
+        return report
+    coverage = index.coverage(index.labelled(document_sections.REQUIREMENT_ID_PATTERN.findall(report)))
+    lines = ["### Requirement Traceability",
+             f"_Findings cite {len(coverage['covered'])} of {len(index)} requirements in the document._"]
+    if coverage["unknown"]:
+        lines.append(f"- **References not found in the document:** {', '.join(coverage['unknown'])}")
+    return f"{report.rstrip()}\n\n" + "\n".join(lines)
+
+def audit_extracted_text(extracted_text: str, standard_persona: str) -> str:
+    """
+    Audits already-extracted document text against one standard, so a document
+    can be extracted once and audited against several standards.
+    """
+    report_progress(0.3, "Running rule-based checks...")
+    screen = prescreen(extracted_text, standard_persona)
+    if screen is None or not screen.resolved:
+        document_text = extracted_text
+    elif screen.residual:
+        # Only the sections the rules could not decide are sent to Gemini.
+        document_text = "\n".join(section.text.strip() for section in screen.residual)
+    else:
+        return _with_traceability(screen.to_markdown(), extracted_text)
+
+    report_progress(0.4, "Auditing requirements with Gemini...")
+    instructions = _prescreen_instructions(screen) if screen else []
+    response = gcp_vertex_ai.generate_text(_audit_prompt(document_text, instructions), profile=GENERATION_PROFILE,
+                                           prefix=audit_instructions(standard_persona))
+    if response.startswith("Error"):
+        return response
+    if screen is not None and screen.findings:
+        response = f"{response.rstrip()}\n\n{screen.to_markdown()}"
+    return _with_traceability(response, extracted_text)
+
+def _split_findings(response: str, keys: list[str]) -> dict[str, str]:
+    """Splits a sectioned audit response into findings per section key."""
+    matches = list(_SECTION_HEADER.finditer(response))
+    if not matches:
+        # A single section needs no headers to be attributed.
+        return {keys[0]: response.strip()} if len(keys) == 1 else {}
+    findings = {}
+    for i, match in enumerate(matches):
+        key = match.group(1).strip("`*_ \"'")
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        if key in keys:
+            findings[key] = response[match.end():end].strip()
+    return findings
+
+def audit_sections_incrementally(extracted_text: str, standard_persona: str) -> str:
+    """
+    Audits a document section by section, reusing cached findings for sections
+    whose text is unchanged since an earlier scan against the same standard.
+    Only new or changed sections are sent to Gemini; their findings are cached
+    for the next revision. The merged report marks each section as Changed or
+    Unchanged.
+
+    Returns:
+        str: The merged Markdown report, or an "Error: ..." string.
+    """
+    report_progress(0.3, "Comparing document sections with previous scans...")
+    all_sections = document_sections.segment_text(extracted_text)
+    screen = prescreen(extracted_text, standard_persona, all_sections)
+    sections = screen.residual if screen else all_sections
+    store = local_store.get_store()
+    cache_ids = {s.key: stable_hash(AUDIT_PROMPT_VERSION, standard_persona, s.hash) for s in sections}
+
+    findings, changed = {}, []
+    for section in sections:
+        record = store.get_record(SECTION_FINDINGS_COLLECTION, cache_ids[section.key])
+        if record is not None:
+            findings[section.key] = record["findings"]
+        else:
+            changed.append(section)
+
+    unattributed = ""
+    if changed:
+        report_progress(0.4, f"Auditing {len(changed)} of {len(sections)} sections with Gemini...")
+        marked_text = "\n".join(f"=== SECTION: {s.key} ===\n{s.text.strip()}" for s in changed)
+        instructions = [
+            "The document is split into sections marked '=== SECTION: <name> ==='. Group your findings by section: "
+            "start each group with a line '### Section: <name>' using the exact name, cover every section, "
+            "and write a [Pass] finding for sections with nothing to report."
+        ]
+        if screen:
+            instructions += _prescreen_instructions(screen)
+        response = gcp_vertex_ai.generate_text(_audit_prompt(marked_text, instructions), profile=GENERATION_PROFILE,
+                                               prefix=audit_instructions(standard_persona))
+        if response.startswith("Error"):
+            return response
+
+        new_findings = _split_findings(response, [s.key for s in changed])
+        for section in changed:
+            if section.key in new_findings:
+                findings[section.key] = new_findings[section.key]
+                store.save_record(SECTION_FINDINGS_COLLECTION, {"key": section.key, "findings": new_findings[section.key]},
+                                  doc_id=cache_ids[section.key])
+            elif new_findings:
+                findings[section.key] = "_No findings were returned for this section; it will be re-audited next time._"
+        # Keep a response that could not be attributed to sections rather than dropping it.
+        unattributed = response if not new_findings else ""
+
+    changed_keys = {s.key for s in changed}
+    lines = [
+        "## Incremental Compliance Audit",
+        f"_{len(changed)} of {len(sections)} sections re-audited; "
+        f"{len(sections) - len(changed)} unchanged sections reused from previous scans"
+        + (f"; {len(screen.resolved)} sections decided by rule-based checks._" if screen else "._"),
+        "",
+    ]
+    for section in sections:
+        if section.key not in findings:
+            continue
+        marker = "Changed" if section.key in changed_keys else "Unchanged"
+        lines.extend([f"### Section: {section.key} ({marker})", findings[section.key], ""])
+    if unattributed:
+        lines.extend(["### Changed Sections", unattributed.strip(), ""])
+    if screen and screen.findings:
+        lines.append(screen.to_markdown())
+    return _with_traceability("\n".join(lines).strip(), extracted_text)
@@ -0,0 +1,145 @@
+"""
+Bounded conversation memory for the Co-Pilot.
+
+Recent turns are sent to the model verbatim, newest first, until a token
+budget is used up. Turns that fall out of that window are folded into a
+rolling summary by a background job, one batch at a time, so a question
+never waits for summarisation. Until the summary covering them lands, those
+turns are still sent verbatim, trimmed from the oldest, within a second token
+budget. Stored history is capped per session; turns are only dropped once
+they are summarised, unless summaries keep failing and the history reaches
+twice the cap.
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+from src.services import gcp_vertex_ai
+from src.utils import job_runner
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("COPILOT_CONTEXT_TOKENS", "1200"))
+MAX_STORED_MESSAGES = int(os.getenv("COPILOT_MAX_MESSAGES", "50"))
+GENERATION_PROFILE = "conversation_summary"
+
+# Gemini averages about four characters per token on English text.
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT_TEMPLATE = """
+Update the running summary of a conversation between a user and a healthcare compliance assistant.
+Keep the regulations, jurisdictions, products and decisions discussed, and any open questions.
+Reply with the updated summary only, in at most 120 words.
+
+**CURRENT SUMMARY:**
+{summary}
+
+**NEW TURNS:**
+{turns}
+"""
+
+Summarizer = Callable[[str, list[dict]], Optional[str]]
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def format_turns(messages: list[dict]) -> str:
+    return "\n".join(f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in messages)
+
+def summarize_turns(summary: str, messages: list[dict]) -> Optional[str]:
+    """Folds `messages` into `summary` with one model call; None if the call failed."""
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(summary=summary or "(none yet)", turns=format_turns(messages))
+    response = gcp_vertex_ai.generate_text(prompt, profile=GENERATION_PROFILE)
+    if response.startswith("Error"):
+        print(f"[ERROR] Could not update the conversation summary: {response}")
+        return None
+    return response.strip()
+
+class ConversationMemory:
+    """Chat history of one session with a token-budgeted context window and a rolling summary."""
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, max_messages: int = MAX_STORED_MESSAGES,
+                 summarize: Summarizer = None, runner: job_runner.JobRunner = None):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.messages: list[dict] = []
+        self.summary = ""
+        self._summarize = summarize or summarize_turns
+        self._runner = runner
+        # Counts are over every message ever added, so they survive trimming.
+        self._dropped = 0
+        self._summarized = 0
+        self._pending: Optional[job_runner.Job] = None
+        self._lock = threading.Lock()
+
+    def add(self, role: str, content: str) -> None:
+        """Appends a message, dropping the oldest summarised ones beyond the stored-history cap."""
+        with self._lock:
+            self.messages.append({"role": role, "content": content})
+            summarized = self._summarized - self._dropped
+            excess = min(len(self.messages) - self.max_messages, summarized)
+            # Unsummarised turns are kept until they are folded in, up to a hard limit.
+            hard_excess = len(self.messages) - 2 * self.max_messages
+            if hard_excess > excess:
+                print(f"[ERROR] Dropping {hard_excess - max(excess, 0)} unsummarised conversation turn(s).")
+                excess = hard_excess
+            if excess > 0:
+                del self.messages[:excess]
+                self._dropped += excess
+
+    def context(self) -> tuple[str, list[dict]]:
+        """
+        The summary of older turns and the recent turns that fit the token budget,
+        plus turns outside the window that the summary does not cover yet.
+        Schedules a summary update when turns have left the window unsummarised.
+        """
+        with self._lock:
+            used, start = estimate_tokens(self.summary), len(self.messages)
+            while start > 0 and used + estimate_tokens(self.messages[start - 1]["content"]) <= self.token_budget:
+                start -= 1
+                used += estimate_tokens(self.messages[start]["content"])
+            self._schedule(self._dropped + start)
+
+            unsummarized_start, pending = max(self._summarized - self._dropped, 0), 0
+            while start > unsummarized_start and \
+                    pending + estimate_tokens(self.messages[start - 1]["content"]) <= self.token_budget:
+                start -= 1
+                pending += estimate_tokens(self.messages[start]["content"])
+            return self.summary, list(self.messages[start:])
+
+    def to_prompt_text(self) -> str:
+        """The context rendered for a prompt, or "" for a new conversation."""
+        summary, recent = self.context()
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier turns: {summary}")
+        if recent:
+            parts.append(format_turns(recent))
+        return "\n".join(parts)
+
+    def wait(self, timeout: float = None) -> None:
+        """Blocks until the pending summary update, if any, has finished."""
+        pending = self._pending
+        if pending is not None:
+            pending.future.exception(timeout=timeout)
+
+    def _schedule(self, window_start: int) -> None:
+        # One update at a time; the next call to context() picks up whatever is still missing.
+        if window_start <= self._summarized or (self._pending is not None and not self._pending.done):
+            return
+        first = max(self._summarized, self._dropped) - self._dropped
+        batch = self.messages[first:window_start - self._dropped]
+        if not batch:
+            return
+        runner = self._runner or job_runner.get_runner()
+        try:
+            self._pending = runner.submit(self._update_summary, self.summary, batch, window_start,
+                                          kind="copilot_summary")
+        except RuntimeError as e:
+            print(f"[ERROR] Conversation summary update not scheduled: {e}")
+
+    def _update_summary(self, summary: str, batch: list[dict], upto: int) -> None:
+        updated = self._summarize(summary, batch)
+        if updated is None:
+            return
+        with self._lock:
+            if upto > self._summarized:
+                self.summary, self._summarized = updated, upto
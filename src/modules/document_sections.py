@@ -0,0 +1,75 @@
+import re
+from dataclasses import dataclass
+from src.utils.cache import content_hash
+
+# Requirement identifiers such as REQ-001, FR-12, NFR_3 or SEC-4.2.
+REQUIREMENT_ID_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]{1,7}[-_]\d{1,5}(?:\.\d+)*\b")
+
+_HEADING_PATTERNS = [
+    re.compile(r"^#{1,6}\s+\S.*$"),                                       # Markdown headings
+    re.compile(r"^(?:Section|Chapter|Appendix|Article)\s+[\w.]+\b.{0,80}$", re.IGNORECASE),
+    re.compile(r"^\d+(?:\.\d+)*\.?\s+[A-Z][^.]{0,80}$"),                  # "3.2 Data Retention"
+    re.compile(r"^[A-Z][A-Z0-9 &/,()-]{2,60}$"),                          # ALL CAPS headings
+]
+_REQUIREMENT_LINE = re.compile(r"^\W{0,3}(" + REQUIREMENT_ID_PATTERN.pattern + r")")
+
+@dataclass
+class Section:
+    """One heading- or requirement-delimited part of a document's extracted text."""
+    key: str
+    title: str
+    text: str
+    start: int
+    end: int
+    hash: str
+
+def _normalize(text: str) -> str:
+    # Whitespace-only edits (re-flowed lines, OCR spacing) should not count as changes.
+    return " ".join(text.split())
+
+def _boundary_key(line: str) -> str | None:
+    """Returns the section key if `line` starts a new section, otherwise None."""
+    stripped = line.strip()
+    if not stripped:
+        return None
+    match = _REQUIREMENT_LINE.match(stripped)
+    if match:
+        return match.group(1)
+    if any(pattern.match(stripped) for pattern in _HEADING_PATTERNS):
+        return stripped.lstrip("#").strip()
+    return None
+
+def segment_text(text: str) -> list[Section]:
+    """
+    Splits extracted document text into sections at headings and at lines that
+    start with a requirement ID. Each section is keyed by its requirement ID or
+    heading (made unique within the document) and hashed on its
+    whitespace-normalised text, so unchanged sections keep their hash across
+    revisions.
+
+    Returns:
+        list[Section]: Sections in document order. Text before the first
+        boundary becomes a 'Preamble' section; a document without boundaries
+        is a single 'Document' section.
+    """
+    boundaries = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        key = _boundary_key(line)
+        if key:
+            boundaries.append((offset, key, line.strip()))
+        offset += len(line)
+
+    if not boundaries or boundaries[0][0] > 0:
+        first = boundaries[0][0] if boundaries else len(text)
+        if text[:first].strip():
+            boundaries.insert(0, (0, "Preamble" if boundaries else "Document", ""))
+
+    sections, seen = [], {}
+    for i, (start, key, title) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+        body = text[start:end]
+        seen[key] = seen.get(key, 0) + 1
+        unique_key = key if seen[key] == 1 else f"{key} ({seen[key]})"
+        sections.append(Section(unique_key, title, body, start, end, content_hash(_normalize(body))))
+    return sections
@@ -0,0 +1,106 @@
+"""
+Handlers for jobs drained from the durable queue by `queue_worker.py`.
+
+Each handler takes the job's JSON payload and returns a JSON-serialisable
+result. Raising PermanentJobError dead-letters the job straight away; any
+other exception is retried with backoff.
+"""
+
+import os
+import base64
+import mimetypes
+from src.modules import workflows
+from src.utils.report_generator import REPORT_FORMATS, render_report
+
+class PermanentJobError(Exception):
+    """A job that can never succeed, e.g. a malformed payload or a missing input file."""
+
+def _read_input(payload: dict) -> tuple[str, bytes, str]:
+    """Returns (file_name, file_content, mime_type) from a `file_path` or `content_b64` payload."""
+    if payload.get("file_path"):
+        path = payload["file_path"]
+        if not os.path.isfile(path):
+            raise PermanentJobError(f"Input file not found: {path}")
+        with open(path, "rb") as f:
+            content = f.read()
+        file_name = payload.get("file_name") or os.path.basename(path)
+    elif payload.get("content_b64"):
+        content = base64.b64decode(payload["content_b64"])
+        file_name = payload.get("file_name", "document")
+    else:
+        raise PermanentJobError("Payload needs either 'file_path' or 'content_b64'.")
+
+    mime_type = payload.get("mime_type") or mimetypes.guess_type(file_name)[0]
+    if not mime_type:
+        raise PermanentJobError(f"Could not determine the MIME type of '{file_name}'.")
+    return file_name, content, mime_type
+
+def _write_output(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def handle_scan(payload: dict) -> dict:
+    """Runs a compliance scan and records it in the scan history."""
+    if not payload.get("standard_persona"):
+        raise PermanentJobError("Payload needs a 'standard_persona'.")
+    file_name, content, mime_type = _read_input(payload)
+    # A failed audit raises RuntimeError, so the job is retried.
+    scan = workflows.run_scan(file_name, content, mime_type, payload.get("standard", ""), payload["standard_persona"])
+
+    report = scan.pop("report")
+    if payload.get("output_path"):
+        _write_output(payload["output_path"], report.encode("utf-8"))
+    return {**scan, "output_path": payload.get("output_path")}
+
+def handle_test_generation(payload: dict) -> dict:
+    """Generates a test suite from a requirements document and optionally writes it as CSV."""
+    _, content, mime_type = _read_input(payload)
+    try:
+        df = workflows.generate_test_cases(content, mime_type)
+    except ValueError as e:
+        raise RuntimeError(str(e)) from e
+
+    if payload.get("output_path"):
+        _write_output(payload["output_path"], df.to_csv(index=False).encode("utf-8"))
+    return {"test_cases": len(df), "output_path": payload.get("output_path")}
+
+def handle_synthesis(payload: dict) -> dict:
+    """Generates a synthetic dataset and optionally writes it as JSON."""
+    if not payload.get("prompt"):
+        raise PermanentJobError("Payload needs a 'prompt'.")
+    try:
+        json_data, df = workflows.generate_synthetic_data(payload["prompt"])
+    except ValueError as e:
+        raise RuntimeError(str(e)) from e
+
+    if payload.get("output_path"):
+        _write_output(payload["output_path"], json_data.encode("utf-8"))
+    return {"records": len(df), "output_path": payload.get("output_path")}
+
+def handle_export(payload: dict) -> dict:
+    """Renders a markdown report (inline or from `report_path`) to PDF, DOCX, JSON or text."""
+    fmt = payload.get("format", "pdf")
+    if fmt not in REPORT_FORMATS:
+        raise PermanentJobError(f"Unsupported report format '{fmt}'.")
+    if not payload.get("output_path"):
+        raise PermanentJobError("Payload needs an 'output_path'.")
+
+    if payload.get("report") is not None:
+        report = payload["report"]
+    elif payload.get("report_path") and os.path.isfile(payload["report_path"]):
+        with open(payload["report_path"], encoding="utf-8") as f:
+            report = f.read()
+    else:
+        raise PermanentJobError("Payload needs a 'report' or an existing 'report_path'.")
+
+    data = render_report(report, fmt, payload.get("title", "Compliance Report"))
+    _write_output(payload["output_path"], data)
+    return {"format": fmt, "bytes": len(data), "output_path": payload["output_path"]}
+
+HANDLERS = {
+    "scan": handle_scan,
+    "test_generation": handle_test_generation,
+    "synthesis": handle_synthesis,
+    "export": handle_export,
+}
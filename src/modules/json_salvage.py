@@ -0,0 +1,137 @@
+"""
+Salvage for JSON arrays that Gemini returned truncated or partly invalid.
+
+Every object that parsed is kept. Invalid objects are sent back in a short
+repair prompt that contains only those objects, and a response that was cut
+off is finished with a continuation prompt asking for the remaining items
+only. The expensive original call is never repeated.
+"""
+
+import json
+from typing import Any, Callable, Optional
+from src.services import gcp_vertex_ai
+from src.utils.json_stream import TRUNCATED_ERROR, JsonArrayStream
+
+# Continuation rounds for a response that keeps getting cut off.
+MAX_CONTINUATIONS = 2
+# Invalid objects longer than this are not worth a repair call.
+MAX_REPAIR_CHARS = 4000
+
+# Builds the continuation prompt from the objects received so far and the
+# text of the object that was cut off. Returning None skips the continuation.
+ContinuationPrompt = Callable[[list[dict], str], Optional[str]]
+
+def continue_prompt(prompt: str) -> ContinuationPrompt:
+    """The default continuation: the original request plus where the previous response stopped."""
+    def build(objects: list[dict], cut_off: str) -> str:
+        last = json.dumps(objects[-1], ensure_ascii=False) if objects else "(none)"
+        return f"""{prompt}
+
+    Your previous response was cut off after {len(objects)} complete items. The last complete item was:
+    {last}
+    The item after it was cut off here: {cut_off[:500] or "(between items)"}
+
+    Continue the array: return only the remaining items, starting with the one that was cut off, as a single valid JSON array with no explanations.
+    """
+    return build
+
+def _repair_prompt(invalid: list[str]) -> str:
+    items = "\n".join(f"{i}. {text}" for i, text in enumerate(invalid, start=1))
+    return f"""
+    The following JSON objects are invalid. Fix only their syntax, keeping every key and value.
+    Return them as a single valid JSON array with one object per item, in the same order, with no explanations.
+
+    {items}
+    """
+
+def decode_result(result: Any) -> tuple[list[dict], list[dict], bool]:
+    """
+    Normalises a `gcp_vertex_ai.generate_json` result, or plain response text.
+
+    Returns:
+        tuple[list[dict], list[dict], bool]: (Objects, errors for skipped items, whether the output was cut off).
+    """
+    if isinstance(result, dict):
+        return [result], [], False
+    if isinstance(result, list):
+        objects = [item for item in result if isinstance(item, dict)]
+        errors = [{"error": "not a JSON object", "text": json.dumps(item)} for item in result if not isinstance(item, dict)]
+        return objects, errors, False
+    parser = JsonArrayStream()
+    objects = parser.feed(str(result))
+    parser.close()
+    return objects, parser.errors, parser.truncated
+
+def _request(prompt: str, response_schema: dict, profile: str) -> Any:
+    result = gcp_vertex_ai.generate_json(prompt, response_schema, profile)
+    return None if isinstance(result, str) and result.startswith("Error") else result
+
+def salvage_json_array(objects: list[dict], errors: list[dict], truncated: bool,
+                       continuation: ContinuationPrompt,
+                       on_objects: Callable[[list[dict]], None] = None,
+                       response_schema: dict = None, profile: str = None) -> tuple[list[dict], list[dict]]:
+    """
+    Completes a parsed JSON array with follow-up calls.
+
+    Args:
+        objects (list[dict]): The objects parsed from the original response.
+        errors (list[dict]): The parser's errors for skipped objects.
+        truncated (bool): Whether the original response was cut off.
+        continuation (ContinuationPrompt): Builds the prompt for the missing items.
+        on_objects (Callable): Called with each batch of recovered objects,
+            e.g. to publish them to the running job.
+        response_schema (dict): Schema for the follow-up calls' JSON output.
+        profile (str): Generation profile for the follow-up calls.
+
+    Returns:
+        tuple[list[dict], list[dict]]: (All objects, errors that could not be salvaged).
+    """
+    objects, errors = list(objects), list(errors)
+    calls = recovered = 0
+
+    for _ in range(MAX_CONTINUATIONS if truncated else 0):
+        cut_off = next((e["text"] for e in errors if e["error"] == TRUNCATED_ERROR), "")
+        prompt = continuation(objects, cut_off)
+        if prompt is None:
+            break
+        calls += 1
+        result = _request(prompt, response_schema, profile)
+        if result is None:
+            break
+        continued, new_errors, still_truncated = decode_result(result)
+        if not continued:
+            break
+        # The cut-off object has been regenerated by the continuation.
+        errors = [e for e in errors if e["error"] != TRUNCATED_ERROR] + new_errors
+        objects.extend(continued)
+        recovered += len(continued)
+        if on_objects:
+            on_objects(continued)
+        if not still_truncated:
+            break
+
+    invalid = [e for e in errors if e["error"] != TRUNCATED_ERROR and 0 < len(e["text"]) <= MAX_REPAIR_CHARS]
+    if invalid:
+        calls += 1
+        result = _request(_repair_prompt([e["text"] for e in invalid]), response_schema, profile)
+        repaired = [] if result is None else decode_result(result)[0]
+        # A repair that returns a different number of objects cannot be matched up safely.
+        if len(repaired) == len(invalid):
+            errors = [e for e in errors if e not in invalid]
+            objects.extend(repaired)
+            recovered += len(repaired)
+            if on_objects:
+                on_objects(repaired)
+
+    if calls:
+        print(f"[INFO] Salvaged {recovered} JSON item(s) with {calls} follow-up call(s); {len(errors)} unrecoverable.")
+    return objects, errors
+
+def parse_and_salvage(result: Any, continuation: ContinuationPrompt,
+                      response_schema: dict = None, profile: str = None) -> tuple[list[dict], list[dict]]:
+    """
+    Decodes a complete response (see `decode_result`) and salvages what is
+    missing or invalid (see `salvage_json_array`).
+    """
+    objects, errors, truncated = decode_result(result)
+    return salvage_json_array(objects, errors, truncated, continuation, response_schema=response_schema, profile=profile)
@@ -0,0 +1,175 @@
+"""
+BM25 retrieval over the bundled regulation corpus.
+
+The corpus (src/data/regulations.jsonl) holds one short clause summary per
+line. The first lookup builds an inverted index on disk: postings are stored
+as NumPy arrays and memory-mapped, so every process shares the same pages and
+nothing is re-tokenised after the first build. The index is rebuilt when the
+corpus changes.
+"""
+
+import os
+import re
+import json
+import math
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from src.utils.cache import content_hash
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "regulations.jsonl")
+INDEX_DIR = os.getenv("REGULATION_INDEX_DIR", os.path.join(".cache", "regulation_index"))
+
+# Standard BM25 parameters: term-frequency saturation and length normalisation.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Bump when tokenisation or the on-disk layout changes, so existing indexes are rebuilt.
+INDEX_FORMAT = 1
+
+_STOPWORDS = frozenset("""
+a an the is are was were be been being of to in on for and or with by as at it its this that these those
+what which who whom how why when where do does did can could would should shall will may might must
+i me my we our you your please tell explain about any all under from into than then there their they
+""".split())
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word terms without stopwords, with crude plural folding."""
+    terms = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+@dataclass(frozen=True)
+class Clause:
+    """One clause summary from the regulation corpus."""
+    id: str
+    regulation: str
+    standard: str
+    citation: str
+    title: str
+    text: str
+
+    def to_prompt_text(self) -> str:
+        return f"[{self.citation}] {self.title}: {self.text}"
+
+@dataclass(frozen=True)
+class ScoredClause:
+    clause: Clause
+    score: float
+
+def load_corpus(path: str = CORPUS_PATH) -> list[Clause]:
+    with open(path, encoding="utf-8") as f:
+        return [Clause(**json.loads(line)) for line in f if line.strip()]
+
+class RegulationIndex:
+    """Memory-mapped BM25 inverted index over the regulation corpus."""
+
+    def __init__(self, corpus_path: str = CORPUS_PATH, index_dir: str = INDEX_DIR):
+        self.corpus_path = corpus_path
+        self.index_dir = index_dir
+        with open(corpus_path, "rb") as f:
+            self.corpus_hash = content_hash(f.read())
+        self.clauses = load_corpus(corpus_path)
+        if not self._is_current():
+            self._build()
+        self._load()
+
+    def _is_current(self) -> bool:
+        try:
+            with open(os.path.join(self.index_dir, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get("corpus_hash") == self.corpus_hash and meta.get("format") == INDEX_FORMAT
+
+    def _build(self) -> None:
+        postings: dict[str, dict[int, int]] = {}
+        lengths = []
+        for doc_id, clause in enumerate(self.clauses):
+            terms = tokenize(f"{clause.standard} {clause.regulation} {clause.citation} {clause.title} {clause.text}")
+            lengths.append(len(terms))
+            for term in terms:
+                counts = postings.setdefault(term, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        term_offsets, doc_ids, term_freqs = {}, [], []
+        for term in sorted(postings):
+            term_offsets[term] = [len(doc_ids), len(postings[term])]
+            for doc_id, count in sorted(postings[term].items()):
+                doc_ids.append(doc_id)
+                term_freqs.append(count)
+
+        # Write to a private directory and swap it in, so readers never see half an index.
+        staging = f"{self.index_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "doc_ids.npy"), np.asarray(doc_ids, dtype=np.int32))
+        np.save(os.path.join(staging, "term_freqs.npy"), np.asarray(term_freqs, dtype=np.float32))
+        np.save(os.path.join(staging, "doc_lengths.npy"), np.asarray(lengths, dtype=np.float32))
+        with open(os.path.join(staging, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(term_offsets, f)
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"corpus_hash": self.corpus_hash, "format": INDEX_FORMAT, "documents": len(self.clauses)}, f)
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+        os.replace(staging, self.index_dir)
+        print(f"[INFO] Built regulation index: {len(self.clauses)} clauses, {len(term_offsets)} terms.")
+
+    def _load(self) -> None:
+        self._doc_ids = np.load(os.path.join(self.index_dir, "doc_ids.npy"), mmap_mode="r")
+        self._term_freqs = np.load(os.path.join(self.index_dir, "term_freqs.npy"), mmap_mode="r")
+        self._doc_lengths = np.load(os.path.join(self.index_dir, "doc_lengths.npy"), mmap_mode="r")
+        with open(os.path.join(self.index_dir, "terms.json"), encoding="utf-8") as f:
+            self._terms: dict[str, list[int]] = json.load(f)
+        self._avg_length = float(np.mean(self._doc_lengths)) if len(self._doc_lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.clauses)
+
+    def search(self, query: str, k: int = 3, standard: str = None, min_score: float = 2.0) -> list[ScoredClause]:
+        """
+        Ranks clauses against a query with BM25.
+
+        Args:
+            query (str): Free-text question or requirement.
+            k (int): Maximum number of clauses to return.
+            standard (str): Restrict results to one COMPLIANCE_STANDARDS key, e.g. "USA (HIPAA/FDA)".
+            min_score (float): Clauses scoring below this are not returned, so off-topic
+                questions get no clauses rather than weak matches.
+
+        Returns:
+            list[ScoredClause]: Best matches first.
+        """
+        count = len(self.clauses)
+        scores = np.zeros(count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            offset, doc_freq = entry
+            docs = self._doc_ids[offset:offset + doc_freq]
+            tf = self._term_freqs[offset:offset + doc_freq]
+            idf = math.log(1.0 + (count - doc_freq + 0.5) / (doc_freq + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_lengths[docs] / self._avg_length)
+            scores[docs] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        if standard is not None:
+            scores[[clause.standard != standard for clause in self.clauses]] = 0.0
+        ranked = np.argsort(-scores, kind="stable")[:k]
+        return [ScoredClause(self.clauses[i], float(scores[i])) for i in ranked if scores[i] >= min_score]
+
+_index: Optional[RegulationIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> RegulationIndex:
+    """The shared index, built on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = RegulationIndex()
+        return _index
@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from src.modules.document_sections import REQUIREMENT_ID_PATTERN, segment_text
+from src.utils.cache import TTLCache, content_hash
+
+_indexes = TTLCache(ttl=3600, maxsize=64)
+
+@dataclass(frozen=True)
+class Requirement:
+    """One requirement parsed from extracted document text."""
+    id: str
+    section: str
+    text: str
+    # Byte offsets of the requirement in the UTF-8 encoded extracted text.
+    span: tuple[int, int]
+    hash: str
+
+class RequirementsIndex:
+    """
+    Requirement records of one document, in document order, with O(1) lookup
+    by requirement ID. Built once per document and shared by the compliance
+    scanner and the test case generator.
+    """
+
+    def __init__(self, doc_hash: str, requirements: list[Requirement], unlabelled_text: str = ""):
+        self.doc_hash = doc_hash
+        self.requirements = requirements
+        # Document text outside any requirement-ID section, e.g. prose under headings.
+        self.unlabelled_text = unlabelled_text
+        self._by_id = {requirement.id: requirement for requirement in requirements}
+        self._prefixes = {_prefix(requirement.id) for requirement in requirements}
+
+    def __len__(self) -> int:
+        return len(self.requirements)
+
+    def __iter__(self) -> Iterator[Requirement]:
+        return iter(self.requirements)
+
+    def __contains__(self, requirement_id: str) -> bool:
+        return requirement_id in self._by_id
+
+    def get(self, requirement_id: str) -> Requirement | None:
+        return self._by_id.get(requirement_id)
+
+    @property
+    def ids(self) -> list[str]:
+        return [requirement.id for requirement in self.requirements]
+
+    def labelled(self, references: Iterable[str]) -> list[str]:
+        """
+        The references that look like this document's requirement IDs, i.e. share
+        a label prefix with one of them. Drops strings such as AES-256 or
+        SHA-256 that match the ID pattern but are not requirement labels here.
+        """
+        return [r for r in references if isinstance(r, str) and _prefix(r.strip()) in self._prefixes]
+
+    def subset(self, requirement_ids: Iterable[str]) -> list[Requirement]:
+        """Returns the known requirements among `requirement_ids`, in document order."""
+        wanted = set(requirement_ids)
+        return [requirement for requirement in self.requirements if requirement.id in wanted]
+
+    def to_prompt_text(self, requirements: list[Requirement] = None) -> str:
+        """Renders requirements as compact 'ID (section): text' lines for an LLM prompt."""
+        return "\n".join(
+            f"{r.id} ({r.section}): {r.text}" if r.section else f"{r.id}: {r.text}"
+            for r in (self.requirements if requirements is None else requirements)
+        )
+
+    def coverage(self, referenced_ids: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Compares requirement IDs referenced by generated output with the document.
+
+        Returns:
+            dict[str, list[str]]: 'covered' and 'uncovered' document requirement
+            IDs, and 'unknown' references that are not in the document.
+        """
+        referenced = {str(i).strip() for i in referenced_ids if i is not None and str(i).strip()}
+        return {
+            "covered": [i for i in self.ids if i in referenced],
+            "uncovered": [i for i in self.ids if i not in referenced],
+            "unknown": sorted(i for i in referenced if i not in self._by_id),
+        }
+
+def _prefix(requirement_id: str) -> str:
+    return re.split(r"[-_]", requirement_id, maxsplit=1)[0]
+
+def build_index(extracted_text: str) -> RequirementsIndex:
+    """
+    Parses extracted text into requirement records; sections not keyed by a
+    requirement ID set the section name, and their body text is kept as the
+    index's unlabelled text.
+    """
+    requirements, seen, unlabelled = [], set(), []
+    current_section, byte_offset, char_offset = "", 0, 0
+    for section in segment_text(extracted_text):
+        byte_offset += len(extracted_text[char_offset:section.start].encode("utf-8"))
+        byte_length = len(section.text.encode("utf-8"))
+        char_offset = section.start
+
+        match = REQUIREMENT_ID_PATTERN.search(section.title) if section.title else None
+        if match and section.key.split(" (")[0] == match.group(0):
+            body = section.text.strip()
+            body = body[body.find(match.group(0)) + len(match.group(0)):].lstrip(" \t]):.-–")
+            text = " ".join(body.split())
+            if match.group(0) not in seen:
+                seen.add(match.group(0))
+                requirements.append(Requirement(
+                    match.group(0), current_section, text, (byte_offset, byte_offset + byte_length), section.hash
+                ))
+        else:
+            body = section.text.strip()
+            if section.title:
+                current_section = section.key
+                body = body[len(section.title):].strip()
+            if body:
+                unlabelled.append(f"{section.title}\n{body}" if section.title else body)
+    return RequirementsIndex(content_hash(extracted_text), requirements, "\n\n".join(unlabelled))
+
+def get_index(extracted_text: str) -> RequirementsIndex:
+    """Returns the requirements index for a document, building it once per content hash."""
+    return _indexes.get_or_load(content_hash(extracted_text), lambda: build_index(extracted_text))
@@ -0,0 +1,243 @@
+"""
+Deterministic pre-screen run before the Gemini compliance audit.
+
+Each standard has a rule pack of mechanical checks ("mentions encryption at
+rest", "defines a retention period"). All patterns of a pack are compiled
+into one alternation and matched in a single pass over the document. Short
+sections whose content is fully explained by rule matches are decided
+locally: once the requirement label, the matched phrases and generic filler
+words are removed, nothing may be left. Everything else is left for the LLM,
+so a section that mentions a checked topic alongside anything else (say,
+"write patient SSNs into the audit log") is still audited.
+"""
+
+import re
+import bisect
+from dataclasses import dataclass, field
+from src.modules.document_sections import Section
+
+# Sections longer than this always go to the LLM, even if a rule matched.
+RESOLVED_SECTION_MAX_CHARS = 300
+
+# Wording that needs judgement: a section containing any of these always goes to the LLM.
+_ESCALATE = re.compile(
+    r"\b(?:shar(?:e|ed|ing)|sell|sold|third[- ]part(?:y|ies)|disclos\w*|advertis\w*|marketing|children|minors?"
+    r"|biometric|genetic|without (?:the )?consent|cross[- ]border|transfer\w*|outside (?:india|the eu|the us)"
+    r"|plain[- ]?text|unencrypted|bypass\w*|disabl\w*|hard[- ]?coded|shared (?:account|password)s?)\b",
+    re.IGNORECASE,
+)
+
+# Negated wording ("shall not be encrypted") inverts a match, so such sections always go to the LLM.
+_NEGATION = re.compile(r"\b(?:not|never|no|none|nor|cannot)\b|n't\b", re.IGNORECASE)
+
+# Generic words that carry no requirement of their own; any other word left after removing rule matches
+# means the rules do not explain the section.
+_FILLER_WORDS = frozenset("""
+    a an the and or of for to in on at by with using via is are be been being shall must will should all any
+    each every this that these those its their our it data records record information patient patients user
+    users personal system application app traffic uses use used kept stored store stores held
+""".split())
+_WORD = re.compile(r"[a-z]+")
+
+@dataclass(frozen=True)
+class Rule:
+    """A mechanical check. Pass and warning patterns are regex fragments matched case-insensitively."""
+    id: str
+    description: str
+    pass_patterns: tuple[str, ...] = ()
+    warning_patterns: tuple[str, ...] = ()
+    warning: str = ""
+    recommendation: str = ""
+    # Warning reported when neither kind of pattern matches anywhere in the document.
+    missing: str = ""
+
+@dataclass
+class Finding:
+    rule_id: str
+    severity: str
+    message: str
+    section_key: str | None = None
+    excerpt: str = ""
+
+    def to_markdown(self) -> str:
+        where = f" ({self.section_key}: \"{self.excerpt}\")" if self.section_key else ""
+        return f"- **[{self.severity}]:** {self.message}{where}"
+
+@dataclass
+class ScreenResult:
+    findings: list[Finding] = field(default_factory=list)
+    resolved: list[Section] = field(default_factory=list)
+    residual: list[Section] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        if not self.findings:
+            return ""
+        return "\n".join(["### Rule-Based Findings", *(f.to_markdown() for f in self.findings)])
+
+    def decided_checks(self) -> list[str]:
+        """Descriptions of the checks decided in resolved sections, so the LLM does not repeat them."""
+        return sorted({f.message.split(" Recommendation:")[0] for f in self.findings if f.section_key is not None})
+
+_ENCRYPTION_AT_REST = Rule(
+    "encryption-at-rest", "Encryption of stored data is specified.",
+    pass_patterns=(r"encrypt\w*\s+(?:\w+\s+){0,4}at[- ]rest", r"at[- ]rest\s+(?:\w+\s+){0,3}encrypt\w*",
+                   r"AES[- ]?(?:128|256)"),
+    warning_patterns=(r"(?:may|can|could|optionally)\s+be\s+encrypted", r"industry[- ]standard\s+(?:security|encryption)"),
+    warning="Encryption is optional or unspecified.",
+    recommendation="State that stored personal data must be encrypted (e.g. AES-256) and how keys are managed.",
+    missing="No requirement specifies encryption of stored data.",
+)
+_ENCRYPTION_IN_TRANSIT = Rule(
+    "encryption-in-transit", "Encryption in transit is specified.",
+    pass_patterns=(r"TLS\s*(?:v?1\.[23])?", r"encrypt\w*\s+(?:\w+\s+){0,4}in[- ]transit", r"\bHTTPS\b"),
+    missing="No requirement specifies encryption of data in transit.",
+)
+_ACCESS_CONTROL = Rule(
+    "access-control", "Access control is specified.",
+    pass_patterns=(r"role[- ]based\s+access", r"\bRBAC\b", r"multi[- ]factor\s+authentication", r"\bMFA\b",
+                   r"two[- ]factor\s+authentication", r"least\s+privilege"),
+    missing="No requirement defines access control or strong authentication.",
+)
+_AUDIT_LOGGING = Rule(
+    "audit-logging", "Audit logging of access to personal data is specified.",
+    pass_patterns=(r"audit\s+(?:trail|log\w*)", r"log\w*\s+(?:\w+\s+){0,3}access\s+to"),
+    missing="No requirement defines audit logging of access to sensitive data.",
+)
+_RETENTION = Rule(
+    "retention-period", "A data retention period is defined.",
+    pass_patterns=(r"retain\w*\s+(?:\w+\s+){0,6}(?:for|up to)\s+\d+\s+(?:day|month|year)s?",
+                   r"retention\s+period\s+(?:of|is)\s+\d+\s+(?:day|month|year)s?",
+                   r"delet\w*\s+(?:\w+\s+){0,6}after\s+\d+\s+(?:day|month|year)s?"),
+    warning_patterns=(r"reasonable\s+period", r"as\s+long\s+as\s+(?:necessary|needed|required)", r"indefinitely"),
+    warning="The data retention period is vague or unbounded.",
+    recommendation="Define a concrete retention period and a deletion or anonymisation procedure.",
+    missing="No requirement defines a data retention period.",
+)
+_CONSENT = Rule(
+    "consent", "Collection of explicit consent is specified.",
+    pass_patterns=(r"(?:explicit|informed|express)\s+consent", r"opt[- ]in", r"consent\s+(?:form|screen|manager)"),
+    warning_patterns=(r"implied\s+consent", r"deemed\s+consent", r"opt[- ]out\s+by\s+default"),
+    warning="Consent is implied or opt-out rather than explicit.",
+    recommendation="Require explicit, informed, opt-in consent that can be withdrawn as easily as it was given.",
+    missing="No requirement describes how consent is collected.",
+)
+_BREACH = Rule(
+    "breach-notification", "A breach notification procedure is specified.",
+    pass_patterns=(r"breach\s+notification", r"notif\w*\s+(?:\w+\s+){0,6}(?:of\s+)?(?:a\s+)?(?:data\s+)?breach",
+                   r"within\s+72\s+hours"),
+)
+
+RULE_PACKS = {
+    "India (DPDPA/CDSCO)": [
+        _ENCRYPTION_AT_REST, _ENCRYPTION_IN_TRANSIT, _ACCESS_CONTROL, _AUDIT_LOGGING, _RETENTION, _CONSENT, _BREACH,
+        Rule("grievance-officer", "A grievance redressal contact is defined.",
+             pass_patterns=(r"grievance\s+(?:officer|redressal)", r"data\s+protection\s+officer")),
+        Rule("rmp-identification", "Identification of the registered medical practitioner is specified.",
+             pass_patterns=(r"registered\s+medical\s+practitioner", r"\bRMP\b", r"registration\s+number")),
+    ],
+    "USA (HIPAA/FDA)": [
+        _ENCRYPTION_AT_REST, _ENCRYPTION_IN_TRANSIT, _ACCESS_CONTROL, _AUDIT_LOGGING, _RETENTION, _BREACH,
+        Rule("automatic-logoff", "Automatic session logoff is specified.",
+             pass_patterns=(r"automatic\s+log\s*-?off", r"session\s+(?:time\s*-?out|expir\w*)", r"idle\s+time\s*-?out")),
+        Rule("business-associate", "Business associate agreements are addressed.",
+             pass_patterns=(r"business\s+associate(?:\s+agreement)?", r"\bBAA\b")),
+        Rule("minimum-necessary", "The minimum necessary standard is addressed.",
+             pass_patterns=(r"minimum\s+necessary",)),
+        Rule("software-lifecycle", "A software lifecycle or risk management process is referenced.",
+             pass_patterns=(r"IEC\s*62304", r"ISO\s*14971", r"risk\s+management\s+(?:file|process|plan)")),
+    ],
+    "EU (GDPR/MDR)": [
+        _ENCRYPTION_AT_REST, _ENCRYPTION_IN_TRANSIT, _ACCESS_CONTROL, _AUDIT_LOGGING, _RETENTION, _CONSENT, _BREACH,
+        Rule("erasure", "The right to erasure is supported.",
+             pass_patterns=(r"right\s+to\s+(?:erasure|be\s+forgotten)", r"delete\s+(?:their|his|her|the\s+user'?s)\s+(?:\w+\s+){0,2}data")),
+        Rule("portability", "Data portability is supported.",
+             pass_patterns=(r"data\s+portability", r"export\s+(?:their|his|her)\s+(?:\w+\s+){0,2}data")),
+        Rule("dpia", "A data protection impact assessment is referenced.",
+             pass_patterns=(r"\bDPIA\b", r"(?:data\s+protection\s+)?impact\s+assessment")),
+        Rule("post-market-surveillance", "Post-market surveillance is addressed.",
+             pass_patterns=(r"post[- ]market\s+surveillance", r"vigilance\s+report\w*")),
+    ],
+}
+
+class RulePack:
+    """A standard's rules compiled into a single alternation with one named group per rule and outcome."""
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self._groups = {}
+        parts = []
+        for i, rule in enumerate(rules):
+            for kind, patterns in (("pass", rule.pass_patterns), ("warn", rule.warning_patterns)):
+                if patterns:
+                    name = f"{kind}{i}"
+                    self._groups[name] = (rule, kind)
+                    parts.append(rf"(?P<{name}>\b(?:{'|'.join(patterns)}))")
+        self._pattern = re.compile("|".join(parts), re.IGNORECASE)
+
+    def screen(self, text: str, sections: list[Section]) -> ScreenResult:
+        """
+        Matches every rule in one pass over `text` and splits `sections` into
+        those decided by the rules and the residual ones that need the LLM.
+        Per-section findings are reported for resolved sections only; matches
+        in residual sections are left to the LLM.
+        """
+        starts = [section.start for section in sections]
+        matched_rules, section_findings, seen = set(), {}, set()
+        matched_spans: dict[str, list[tuple[int, int]]] = {}
+        for match in self._pattern.finditer(text):
+            rule, kind = self._groups[match.lastgroup]
+            matched_rules.add(rule.id)
+            index = bisect.bisect_right(starts, match.start()) - 1
+            section = sections[index] if index >= 0 else None
+            if section is not None:
+                matched_spans.setdefault(section.key, []).append((match.start() - section.start,
+                                                                  match.end() - section.start))
+            if section is None or (rule.id, kind, section.key) in seen:
+                continue
+            seen.add((rule.id, kind, section.key))
+            if kind == "pass":
+                finding = Finding(rule.id, "Pass", rule.description, section.key, match.group(0))
+            else:
+                message = f"{rule.warning} Recommendation: {rule.recommendation}".strip()
+                finding = Finding(rule.id, "Warning - Medium", message, section.key, match.group(0))
+            section_findings.setdefault(section.key, []).append(finding)
+
+        result = ScreenResult()
+        for section in sections:
+            decided = (
+                section.key in matched_spans
+                and len(section.text.strip()) <= RESOLVED_SECTION_MAX_CHARS
+                and not _ESCALATE.search(section.text)
+                and not _NEGATION.search(section.text)
+                and _explained_by(section, matched_spans[section.key])
+            )
+            if decided:
+                result.resolved.append(section)
+                result.findings.extend(section_findings.get(section.key, []))
+            else:
+                result.residual.append(section)
+
+        # Document-wide checks: a rule that matched nowhere is reported whichever sections were resolved.
+        for rule in self.rules:
+            if rule.missing and rule.id not in matched_rules:
+                result.findings.append(Finding(rule.id, "Warning - Medium", f"{rule.missing} Recommendation: "
+                                               f"{rule.recommendation or 'Add an explicit, testable requirement.'}"))
+        return result
+
+def _explained_by(section: Section, spans: list[tuple[int, int]]) -> bool:
+    """True if nothing but the section label, the matched phrases and filler words is left in the section."""
+    text = section.text
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + " " + text[end:]
+    text = text.replace(section.key, " ", 1).lower()
+    return all(word in _FILLER_WORDS for word in _WORD.findall(text))
+
+_compiled: dict[str, RulePack] = {}
+
+def get_rule_pack(standard: str) -> RulePack | None:
+    """Returns the compiled rule pack for a COMPLIANCE_STANDARDS key, or None if it has none."""
+    if standard not in RULE_PACKS:
+        return None
+    if standard not in _compiled:
+        _compiled[standard] = RulePack(RULE_PACKS[standard])
+    return _compiled[standard]
@@ -1,19 +1,112 @@
+from src.modules import json_salvage
 from src.services import gcp_vertex_ai
+from src.utils.job_runner import report_partial, report_progress
+from src.utils.json_stream import JsonArrayStream
 import json
+import re
 import pandas as pd
 
-def generate_synthetic_data(prompt: str) -> tuple[str, pd.DataFrame]:
-    full_prompt = f"""
+GENERATION_PROFILE = "synthetic_data"
+
+# "... with columns name, age and email", "fields: id, diagnosis", ...
+_COLUMN_LIST = re.compile(
+    r"\b(?:columns?|fields?|attributes?|properties|keys)\b\s*(named|called|like|such as|including|:|-)?\s*\(?([^.;\n)]+)",
+    re.IGNORECASE,
+)
+# Words that mark prose ("columns for name should be unique") rather than a list of column names.
+_PROSE_WORDS = {"a", "an", "the", "for", "of", "to", "in", "with", "per", "each", "every", "that", "which", "is", "are",
+                "be", "should", "must", "shall", "will", "can", "may", "need", "needs"}
+# Value types guessed from column names; anything else is a string.
+_COLUMN_TYPES = [
+    (re.compile(r"^(?:is|has|can)_|_(?:flag|enabled|active)$|^(?:active|enabled|verified|smoker)$"), "boolean"),
+    (re.compile(r"(?:^|_)id$|_(?:code|number|no)$"), "string"),
+    (re.compile(r"^(?:age|count|quantity|qty|year|rank)$|_(?:count|age|year|days|quantity)$"), "integer"),
+    (re.compile(r"(?:price|amount|total|cost|salary|weight|height|score|rate|bmi|temperature|balance)$"), "number"),
+]
+MAX_COLUMN_NAME_WORDS = 3
+
+def infer_columns(prompt: str) -> list[str]:
+    """
+    Column names the request lists explicitly, normalised to snake_case. Only
+    a list introduced by "columns:"/"fields named"/... or a comma-separated
+    list counts; anything that reads like prose yields no columns.
+    """
+    match = _COLUMN_LIST.search(prompt)
+    if not match or not (match.group(1) or "," in match.group(2)):
+        return []
+    columns = []
+    for name in re.split(r",|\band\b|&", match.group(2)):
+        words = re.findall(r"[A-Za-z0-9_]+", name)
+        if not words:
+            continue
+        if len(words) > MAX_COLUMN_NAME_WORDS or any(word.lower() in _PROSE_WORDS for word in words):
+            return []
+        column = "_".join(words).lower()
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+def column_type(column: str) -> str:
+    """The OpenAPI type guessed from a column's name."""
+    return next((kind for pattern, kind in _COLUMN_TYPES if pattern.search(column)), "string")
+
+def _response_schema(prompt: str) -> dict | None:
+    columns = infer_columns(prompt)
+    return gcp_vertex_ai.object_array_schema({column: column_type(column) for column in columns}) if columns else None
+
+def _synthetic_data_prompt(prompt: str) -> str:
+    return f"""
     You are a synthetic data generator. Based on the user's request, create realistic but fake data.
     The output must be a single, valid JSON array of objects, with no explanations.
-    
+
     User Request: "{prompt}"
     """
-    response_text = gcp_vertex_ai.generate_text(full_prompt)
-    cleaned_response = response_text.strip().replace("```json", "").replace("```", "")
-
-    try:
-        df = pd.read_json(cleaned_response)
-        return cleaned_response, df
-    except (json.JSONDecodeError, ValueError) as e:
-        raise ValueError(f"AI response could not be parsed into a DataFrame. Error: {e}")
\ No newline at end of file
+
+def _to_result(records: list[dict], errors: list[dict]) -> tuple[str, pd.DataFrame]:
+    if not records:
+        detail = errors[0]["error"] if errors else "no JSON objects found"
+        raise ValueError(f"AI response could not be parsed into a DataFrame. Error: {detail}")
+    if errors:
+        print(f"[ERROR] Skipped {len(errors)} malformed record(s) in the AI response.")
+    df = pd.DataFrame(records)
+    df.attrs["parse_errors"] = errors
+    return json.dumps(records, indent=2, ensure_ascii=False), df
+
+def generate_synthetic_data(prompt: str, stream: bool = False) -> tuple[str, pd.DataFrame]:
+    """
+    Generates a synthetic dataset from a natural-language request.
+
+    Gemini is called in JSON output mode, with a response schema when the
+    request lists its columns. Records are parsed one object at a time. Malformed records are repaired and
+    a cut-off response is continued with short follow-up calls (see
+    `json_salvage`); records that still cannot be recovered are listed in the
+    frame's `attrs["parse_errors"]`. With `stream=True`, each record is
+    published to the running job as soon as it arrives.
+
+    Returns:
+        tuple[str, pd.DataFrame]: (The records as a JSON array, the records as a DataFrame).
+    """
+    full_prompt, schema = _synthetic_data_prompt(prompt), _response_schema(prompt)
+    continuation = json_salvage.continue_prompt(full_prompt)
+    if not stream:
+        result = gcp_vertex_ai.generate_json(full_prompt, schema, GENERATION_PROFILE)
+        return _to_result(*json_salvage.parse_and_salvage(result, continuation, schema, GENERATION_PROFILE))
+
+    parser, records = JsonArrayStream(), []
+    for chunk in gcp_vertex_ai.stream_text(gcp_vertex_ai.json_prompt(full_prompt, schema),
+                                           generation_config=gcp_vertex_ai.json_generation_config(schema, GENERATION_PROFILE),
+                                           profile=GENERATION_PROFILE):
+        if chunk.startswith("Error"):
+            if not records:
+                raise ValueError(chunk)
+            parser.errors.append({"error": chunk, "text": ""})
+            break
+        rows = parser.feed(chunk)
+        if rows:
+            records.extend(rows)
+            report_partial(rows)
+            report_progress(0.5, f"Received {len(records)} records...")
+    parser.close()
+    return _to_result(*json_salvage.salvage_json_array(
+        records, parser.errors, parser.truncated, continuation,
+        on_objects=report_partial, response_schema=schema, profile=GENERATION_PROFILE))
@@ -1,13 +1,30 @@
+import re
 import pandas as pd
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.modules import json_salvage, requirements_index
 from src.services import gcp_doc_ai, gcp_vertex_ai
+from src.utils.job_runner import report_partial, report_progress
+from src.utils.json_stream import JsonArrayStream
 
-def generate_test_cases_from_doc(file_content: bytes, mime_type: str) -> pd.DataFrame:
+TEST_CASE_FIELDS = ["id", "requirement_id", "type", "description", "steps", "expected_result"]
+TEST_CASE_SCHEMA = gcp_vertex_ai.object_array_schema(dict.fromkeys(TEST_CASE_FIELDS, "string"))
+GENERATION_PROFILE = "test_generation"
+
+# Documents with more requirements than this are generated in shards of this size.
+SHARD_SIZE = 15
+MAX_CONCURRENT_SHARDS = 4
+# Test cases for the same requirement whose wording overlaps at least this much are duplicates.
+DUPLICATE_SIMILARITY = 0.85
+
+def generate_test_cases_from_doc(file_content: bytes, mime_type: str, stream: bool = False) -> pd.DataFrame:
+    report_progress(0.1, "Extracting requirements text...")
     extracted_text = gcp_doc_ai.process_document(file_content, mime_type)
     if "Error:" in extracted_text:
         raise ValueError(extracted_text)
+    return generate_test_cases_from_text(extracted_text, stream=stream)
 
-    prompt = f"""
+def _test_case_prompt(document: str) -> str:
+    return f"""
     You are an expert AI Test Case Generator for enterprise software. Your task is to analyze the following requirements document and generate a comprehensive, structured test suite in JSON format.
 
     Instructions:
@@ -18,13 +35,208 @@ def generate_test_cases_from_doc(file_content: bytes, mime_type: str) -> pd.Data
 
     Document for Analysis:
     ---
-    {extracted_text}
+    {document}
     ---
     """
-    response_text = gcp_vertex_ai.generate_text(prompt)
-    cleaned_response = response_text.strip().replace("```json", "").replace("```", "")
-    
+
+def _to_frame(test_cases: list[dict], errors: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(test_cases)
+    # Always expose the expected columns, even if the model left some out.
+    df = df.reindex(columns=TEST_CASE_FIELDS + [c for c in df.columns if c not in TEST_CASE_FIELDS])
+    if errors:
+        print(f"[ERROR] Skipped {len(errors)} malformed test case(s) in the AI response.")
+        df.attrs["parse_errors"] = errors
+    return df
+
+def _continuation(document: str, index: requirements_index.RequirementsIndex,
+                  requirements: list[requirements_index.Requirement] = None) -> json_salvage.ContinuationPrompt:
+    """
+    Builds continuation prompts for a cut-off response. With a requirements
+    index, the follow-up covers only the requirements that have no test case yet.
+    """
+    if not len(index):
+        return json_salvage.continue_prompt(_test_case_prompt(document))
+    requirements = index.requirements if requirements is None else requirements
+
+    def build(test_cases: list[dict], cut_off: str) -> str | None:
+        covered = {test_case.get("requirement_id") for test_case in test_cases}
+        missing = [r for r in requirements if r.id not in covered]
+        if not missing:
+            return None
+        remaining = f"Requirements (use these exact requirement IDs):\n{index.to_prompt_text(missing)}"
+        return _test_case_prompt(remaining) + f"    Number the test cases starting from TC{len(test_cases) + 1:03d}.\n"
+    return build
+
+def _parse_test_cases(result, continuation: json_salvage.ContinuationPrompt) -> pd.DataFrame:
+    """Turns a `generate_json` result into test cases, salvaging a cut-off or invalid response."""
+    test_cases, errors = json_salvage.parse_and_salvage(result, continuation, TEST_CASE_SCHEMA, GENERATION_PROFILE)
+    if not test_cases:
+        detail = errors[0]["error"] if errors else "no JSON objects found"
+        raise ValueError(f"AI response was not valid JSON. Error: {detail}. Response: {str(result).strip()[:500]}")
+    return _to_frame(test_cases, errors)
+
+def _stream_test_cases(prompt: str, continuation: json_salvage.ContinuationPrompt) -> pd.DataFrame:
+    """
+    Streams the response and publishes each test case to the running job as
+    soon as it is complete, then salvages a cut-off or invalid tail.
+    """
+    parser, test_cases = JsonArrayStream(), []
+    for chunk in gcp_vertex_ai.stream_text(gcp_vertex_ai.json_prompt(prompt, TEST_CASE_SCHEMA),
+                                           generation_config=gcp_vertex_ai.json_generation_config(TEST_CASE_SCHEMA, GENERATION_PROFILE),
+                                           profile=GENERATION_PROFILE):
+        if chunk.startswith("Error"):
+            if not test_cases:
+                raise ValueError(chunk)
+            parser.errors.append({"error": chunk, "text": ""})
+            break
+        rows = parser.feed(chunk)
+        if rows:
+            test_cases.extend(rows)
+            report_partial(rows)
+            report_progress(0.5, f"Received {len(test_cases)} test cases...")
+    parser.close()
+    test_cases, errors = json_salvage.salvage_json_array(
+        test_cases, parser.errors, parser.truncated, continuation,
+        on_objects=report_partial, response_schema=TEST_CASE_SCHEMA, profile=GENERATION_PROFILE)
+    if not test_cases:
+        detail = errors[0]["error"] if errors else "no JSON objects found"
+        raise ValueError(f"AI response was not valid JSON. Error: {detail}")
+    return _to_frame(test_cases, errors)
+
+def generate_test_cases_from_text(extracted_text: str, sharded: bool = None, stream: bool = False) -> pd.DataFrame:
+    """
+    Generates the test suite from already-extracted requirements text.
+
+    When the document has identifiable requirement IDs, Gemini receives the
+    parsed requirement list plus any text not under a requirement ID instead of
+    the raw text, and the returned frame's `attrs["coverage"]` holds the
+    covered, uncovered and unknown requirement IDs.
+
+    Args:
+        extracted_text (str): The document's extracted text.
+        sharded (bool): Generate per group of requirements in parallel. By
+            default, documents with more than SHARD_SIZE requirements are sharded.
+        stream (bool): Publish test cases to the running job as they arrive
+            (see `job_runner.report_partial`).
+    """
+    index = requirements_index.get_index(extracted_text)
+    if sharded is None:
+        sharded = len(index) > SHARD_SIZE
+    if sharded and len(index):
+        df = _generate_sharded(index)
+    else:
+        if len(index):
+            document = f"Requirements (use these exact requirement IDs):\n{index.to_prompt_text()}"
+            if index.unlabelled_text:
+                document += f"\n\n{_unlabelled_document(index)}"
+        else:
+            document = extracted_text
+        report_progress(0.4, "Generating test cases with Gemini...")
+        continuation = _continuation(document, index)
+        if stream:
+            df = _stream_test_cases(_test_case_prompt(document), continuation)
+        else:
+            df = _parse_test_cases(gcp_vertex_ai.generate_json(_test_case_prompt(document), TEST_CASE_SCHEMA, GENERATION_PROFILE),
+                                   continuation)
+        if df["id"].duplicated().any():
+            # Salvaged items may restart the numbering.
+            df = renumber_test_cases(df, index.ids)
+
+    if len(index):
+        df.attrs["coverage"] = index.coverage(index.labelled(df["requirement_id"]))
+    return df
+
+def _unlabelled_document(index: requirements_index.RequirementsIndex) -> str:
+    return ("Further requirements text without requirement IDs (use the nearest heading as the requirement ID):\n"
+            f"{index.unlabelled_text}")
+
+def _generate_unlabelled(index: requirements_index.RequirementsIndex) -> pd.DataFrame:
+    """Generates test cases for the document text that is not under any requirement ID."""
+    document = _unlabelled_document(index)
+    result = gcp_vertex_ai.generate_json(_test_case_prompt(document), TEST_CASE_SCHEMA, GENERATION_PROFILE)
+    if isinstance(result, str) and result.startswith("Error"):
+        raise ValueError(result)
+    return _parse_test_cases(result, json_salvage.continue_prompt(_test_case_prompt(document)))
+
+def _generate_shard(index: requirements_index.RequirementsIndex,
+                    requirements: list[requirements_index.Requirement]) -> pd.DataFrame:
+    """
+    Generates test cases for one group of requirements, halving the group if
+    the response cannot be parsed or salvaged. Service errors are raised as is.
+    """
+    document = f"Requirements (use these exact requirement IDs):\n{index.to_prompt_text(requirements)}"
+    result = gcp_vertex_ai.generate_json(_test_case_prompt(document), TEST_CASE_SCHEMA, GENERATION_PROFILE)
+    if isinstance(result, str) and result.startswith("Error"):
+        # Quota, deadline or safety errors are not fixed by a smaller request.
+        raise ValueError(result)
     try:
-        return pd.DataFrame(json.loads(cleaned_response))
-    except json.JSONDecodeError as e:
-        raise ValueError(f"AI response was not valid JSON. Error: {e}. Response: {cleaned_response}")
\ No newline at end of file
+        return _parse_test_cases(result, _continuation(document, index, requirements))
+    except ValueError:
+        if len(requirements) == 1:
+            raise
+        # Nothing could be salvaged: smaller groups produce shorter outputs.
+        middle = len(requirements) // 2
+        return pd.concat([_generate_shard(index, requirements[:middle]),
+                          _generate_shard(index, requirements[middle:])], ignore_index=True)
+
+def _generate_sharded(index: requirements_index.RequirementsIndex) -> pd.DataFrame:
+    """
+    Generates test cases for groups of SHARD_SIZE requirements concurrently,
+    then merges them, removes near-duplicates and renumbers IDs in
+    requirement order. Shards that fail are left out and show up as
+    uncovered requirements; the call fails only if every shard fails.
+    """
+    shards = [index.requirements[i:i + SHARD_SIZE] for i in range(0, len(index), SHARD_SIZE)]
+    # Text outside any requirement ID is its own shard, so it is not dropped.
+    shard_count = len(shards) + bool(index.unlabelled_text)
+    report_progress(0.4, f"Generating test cases for {len(index)} requirements in {shard_count} shards...")
+
+    frames, errors = [], []
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_SHARDS, shard_count), thread_name_prefix="shard") as pool:
+        futures = {pool.submit(_generate_shard, index, shard): f"{shard[0].id}..{shard[-1].id}" for shard in shards}
+        if index.unlabelled_text:
+            futures[pool.submit(_generate_unlabelled, index)] = "without requirement IDs"
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                frames.append(future.result())
+                report_partial(frames[-1].to_dict(orient="records"))
+            except Exception as e:
+                errors.append(e)
+                print(f"[ERROR] Test case shard {futures[future]} failed: {e}")
+            report_progress(0.4 + 0.5 * done / shard_count, f"Generated {done} of {shard_count} shards...")
+
+    if not frames:
+        raise errors[0]
+    merged = pd.concat(frames, ignore_index=True)
+    return renumber_test_cases(dedupe_test_cases(merged), index.ids)
+
+def _tokens(row: pd.Series) -> set[str]:
+    text = " ".join(str(row.get(field, "")) for field in ("description", "steps", "expected_result"))
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+def dedupe_test_cases(df: pd.DataFrame, threshold: float = DUPLICATE_SIMILARITY) -> pd.DataFrame:
+    """
+    Drops test cases whose wording overlaps an earlier test case for the same
+    requirement and type by at least `threshold` (Jaccard similarity of words).
+    """
+    keep, kept_tokens = [], {}
+    for position, (_, row) in enumerate(df.iterrows()):
+        group = (str(row.get("requirement_id")), str(row.get("type")).lower())
+        tokens = _tokens(row)
+        duplicate = any(
+            tokens and len(tokens & other) / len(tokens | other) >= threshold
+            for other in kept_tokens.get(group, [])
+        )
+        if not duplicate:
+            keep.append(position)
+            kept_tokens.setdefault(group, []).append(tokens)
+    return df.iloc[keep].reset_index(drop=True)
+
+def renumber_test_cases(df: pd.DataFrame, requirement_order: list[str]) -> pd.DataFrame:
+    """Orders test cases by requirement (unknown IDs last) and assigns IDs TC001, TC002, ... globally."""
+    rank = {requirement_id: i for i, requirement_id in enumerate(requirement_order)}
+    order = df["requirement_id"].map(lambda r: rank.get(r, len(rank)))
+    df = df.assign(_order=order).sort_values("_order", kind="stable").drop(columns="_order").reset_index(drop=True)
+    width = max(3, len(str(len(df))))
+    df["id"] = [f"TC{i:0{width}d}" for i in range(1, len(df) + 1)]
+    return df
@@ -0,0 +1,72 @@
+"""
+End-to-end workflows shared by the Streamlit UI, the HTTP API and the queue
+worker, so every entry point generates and records results the same way.
+"""
+
+import pandas as pd
+from src.modules import compliance_scanner, synthetic_data_hub, test_case_generator
+from src.services import metrics, scan_history
+
+def run_scan(file_name: str, file_content: bytes, mime_type: str, standard: str, persona: str = None,
+             incremental: bool = False, extracted_text: str = None, record: bool = True) -> dict:
+    """
+    Audits a document against one standard, records it in the scan history and
+    summarises its findings.
+
+    Args:
+        file_name (str): The document's name, as shown in the scan history.
+        file_content (bytes): The raw document.
+        mime_type (str): The document's MIME type.
+        standard (str): The standard audited against.
+        persona (str): The auditor persona; defaults to the standard's own.
+        incremental (bool): Re-audit only sections changed since an earlier scan.
+        extracted_text (str): Already-extracted text, so the document is not extracted again.
+        record (bool): Whether to save the scan to the history.
+
+    Returns:
+        dict: The report, its finding counts and `scan_id` (None if it was not saved);
+              `history_error` explains a failed save.
+
+    Raises:
+        RuntimeError: If the audit failed.
+    """
+    persona = persona or compliance_scanner.COMPLIANCE_STANDARDS[standard]["expert_persona"]
+    if extracted_text is None:
+        report = compliance_scanner.analyze_document_compliance(file_content, mime_type, persona,
+                                                                incremental=incremental)
+    elif incremental:
+        report = compliance_scanner.audit_sections_incrementally(extracted_text, persona)
+    else:
+        report = compliance_scanner.audit_extracted_text(extracted_text, persona)
+    if report.startswith("Error"):
+        raise RuntimeError(report)
+
+    result = {"scan_id": None, "standard": standard, "report": report, **scan_history.summarize_report(report)}
+    if record:
+        saved, message = scan_history.record_scan(file_name, file_content, standard, report)
+        result["scan_id" if saved else "history_error"] = message
+    return result
+
+def generate_test_cases(file_content: bytes, mime_type: str, stream: bool = False) -> pd.DataFrame:
+    """
+    Generates a test suite from a requirements document and counts it towards
+    the dashboard metrics.
+
+    Raises:
+        ValueError: If the document could not be read or no test cases were generated.
+    """
+    df = test_case_generator.generate_test_cases_from_doc(file_content, mime_type, stream=stream)
+    metrics.increment(metrics.TEST_CASES_GENERATED, len(df))
+    return df
+
+def generate_synthetic_data(prompt: str, stream: bool = False) -> tuple[str, pd.DataFrame]:
+    """
+    Generates a synthetic dataset from a natural-language request and counts
+    its records towards the dashboard metrics.
+
+    Raises:
+        ValueError: If no records could be generated.
+    """
+    json_data, df = synthetic_data_hub.generate_synthetic_data(prompt, stream=stream)
+    metrics.increment(metrics.DATA_RECORDS_CREATED, len(df))
+    return json_data, df
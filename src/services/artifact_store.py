@@ -0,0 +1,171 @@
+import json
+import gzip
+import hashlib
+from typing import Iterator
+from google.cloud import firestore
+from src.services import gcp_firestore
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available.
+    zstandard = None
+
+MANIFEST_COLLECTION = "artifacts"
+CHUNK_COLLECTION = "artifact_chunks"
+
+# Raw bytes per chunk. Compressed chunks stay well below Firestore's 1 MiB
+# document limit even for incompressible payloads.
+CHUNK_SIZE = 768 * 1024
+
+# A commit request is capped at 10 MiB, so chunk writes are grouped by size.
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+# Number of chunk documents fetched per round trip while streaming a read.
+READ_WINDOW = 8
+
+DEFAULT_CODEC = "zstd" if zstandard else "gzip"
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    raise ValueError(f"Unsupported artifact codec '{codec}'.")
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if not zstandard:
+            raise ValueError("Artifact was stored with zstd but the 'zstandard' package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported artifact codec '{codec}'.")
+
+def _encode_payload(payload) -> tuple[bytes, str]:
+    if isinstance(payload, bytes):
+        return payload, "bytes"
+    if isinstance(payload, str):
+        return payload.encode("utf-8"), "text"
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8"), "json"
+
+def _decode_payload(data: bytes, content_type: str):
+    if content_type == "text":
+        return data.decode("utf-8")
+    if content_type == "json":
+        return json.loads(data)
+    return data
+
+def _chunk_id(raw_chunk: bytes, codec: str) -> str:
+    return f"{codec}-{hashlib.sha256(raw_chunk).hexdigest()}"
+
+def save_artifact(name: str, payload, metadata: dict = None, codec: str = DEFAULT_CODEC,
+                  client=None) -> tuple[bool, str]:
+    """
+    Stores a payload of any size as compressed, content-addressed chunks under a manifest.
+
+    Chunks already present in the store (identical content and codec) are not re-uploaded.
+
+    Args:
+        name (str): A human readable artifact name (e.g., 'Compliance_Report_spec').
+        payload (bytes | str | dict | list): The artifact content.
+        metadata (dict): Optional extra fields stored on the manifest.
+        codec (str): 'zstd' (when installed) or 'gzip'.
+        client: Firestore client override; defaults to the shared client.
+
+    Returns:
+        tuple[bool, str]: (Success_flag, Manifest_ID or error_message).
+    """
+    client = client or gcp_firestore.db
+    if not client:
+        return False, "Error: Firestore client is not initialized."
+
+    try:
+        data, content_type = _encode_payload(payload)
+        raw_chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)] or [b""]
+        chunk_ids = [_chunk_id(chunk, codec) for chunk in raw_chunks]
+
+        chunks = client.collection(CHUNK_COLLECTION)
+        unique = dict(zip(chunk_ids, raw_chunks))
+        existing = {snap.id for snap in client.get_all([chunks.document(cid) for cid in unique]) if snap.exists}
+
+        batch, batch_bytes, uploaded = client.batch(), 0, 0
+        for chunk_id, raw_chunk in unique.items():
+            if chunk_id in existing:
+                continue
+            compressed = _compress(raw_chunk, codec)
+            if batch_bytes and batch_bytes + len(compressed) > MAX_BATCH_BYTES:
+                batch.commit()
+                batch, batch_bytes = client.batch(), 0
+            batch.set(chunks.document(chunk_id), {"data": compressed, "size": len(raw_chunk), "codec": codec})
+            batch_bytes += len(compressed)
+            uploaded += 1
+
+        manifest_ref = client.collection(MANIFEST_COLLECTION).document()
+        batch.set(manifest_ref, {
+            "name": name,
+            "codec": codec,
+            "contentType": content_type,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "chunks": chunk_ids,
+            "metadata": metadata or {},
+            "createdAt": firestore.SERVER_TIMESTAMP,
+        })
+        batch.commit()
+        print(f"[INFO] Artifact '{name}' saved with ID: {manifest_ref.id} "
+              f"({len(chunk_ids)} chunks, {uploaded} uploaded, {len(chunk_ids) - uploaded} deduplicated).")
+        return True, manifest_ref.id
+    except Exception as e:
+        print(f"[ERROR] Failed to save artifact to Firestore: {e}")
+        return False, str(e)
+
+def get_manifest(artifact_id: str, client=None) -> dict:
+    """Returns the manifest for an artifact, or raises ValueError if it does not exist."""
+    client = client or gcp_firestore.db
+    if not client:
+        raise ValueError("Error: Firestore client is not initialized.")
+    snapshot = client.collection(MANIFEST_COLLECTION).document(artifact_id).get()
+    if not snapshot.exists:
+        raise ValueError(f"Error: Artifact '{artifact_id}' was not found.")
+    return snapshot.to_dict()
+
+def iter_artifact(artifact_id: str, client=None) -> Iterator[bytes]:
+    """
+    Streams an artifact's raw bytes chunk by chunk, fetching a small window of
+    chunk documents per round trip and verifying each against its content hash.
+    """
+    client = client or gcp_firestore.db
+    manifest = get_manifest(artifact_id, client)
+    chunks = client.collection(CHUNK_COLLECTION)
+    chunk_ids = manifest["chunks"]
+
+    for start in range(0, len(chunk_ids), READ_WINDOW):
+        window = chunk_ids[start:start + READ_WINDOW]
+        # get_all() does not preserve order, so index the window by ID.
+        fetched = {snap.id: snap for snap in client.get_all([chunks.document(cid) for cid in set(window)])}
+        for chunk_id in window:
+            snapshot = fetched.get(chunk_id)
+            if snapshot is None or not snapshot.exists:
+                raise ValueError(f"Error: Chunk '{chunk_id}' of artifact '{artifact_id}' is missing.")
+            chunk = snapshot.to_dict()
+            raw_chunk = _decompress(chunk["data"], chunk.get("codec", manifest["codec"]))
+            if _chunk_id(raw_chunk, manifest["codec"]) != chunk_id:
+                raise ValueError(f"Error: Chunk '{chunk_id}' of artifact '{artifact_id}' is corrupt.")
+            yield raw_chunk
+
+def load_artifact(artifact_id: str, client=None) -> tuple[bool, object]:
+    """
+    Reassembles an artifact and decodes it back to the type it was saved as.
+
+    Returns:
+        tuple[bool, object]: (Success_flag, payload or error_message).
+    """
+    try:
+        manifest = get_manifest(artifact_id, client)
+        data = b"".join(iter_artifact(artifact_id, client))
+        if hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+            return False, f"Error: Artifact '{artifact_id}' failed its integrity check."
+        return True, _decode_payload(data, manifest.get("contentType", "bytes"))
+    except Exception as e:
+        print(f"[ERROR] Failed to load artifact from Firestore: {e}")
+        return False, str(e)
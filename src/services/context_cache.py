@@ -0,0 +1,195 @@
+"""
+Cached prompt prefixes for Gemini calls.
+
+Long, fixed prompt blocks (the audit persona and instructions, the Co-Pilot
+system prompt) are uploaded once as cached content and referenced by handle,
+so a request only sends and prefills the part that changes. Handles are
+created on first use per prefix and target, and their TTL is extended shortly
+before it runs out. When a prefix cannot be cached (shorter than the service
+minimum, no SDK support, another region, or an error), callers send it inline
+ahead of the prompt, which the model sees the same way.
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Optional
+from google.api_core import exceptions as api_exceptions
+from src.services.model_router import Target
+from src.utils.cache import content_hash
+
+try:
+    from vertexai.preview import caching
+except ImportError:
+    # Explicit context caching arrived in later vertexai releases.
+    caching = None
+
+SUPPORTS_CONTEXT_CACHE = caching is not None
+
+DEFAULT_TTL_SECONDS = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Extend a handle's TTL once it is this close to expiring, so requests never reference an expired cache.
+REFRESH_MARGIN_SECONDS = 300.0
+# The service rejects cached content below a model-dependent minimum size.
+MIN_CACHE_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+CHARS_PER_TOKEN = 4
+
+def is_missing_cache_error(error: Exception) -> bool:
+    """True if a request failed because its cached content no longer exists (deleted or expired)."""
+    if isinstance(error, api_exceptions.NotFound):
+        return True
+    message = str(error).lower()
+    return "cache" in message and any(word in message for word in ("not found", "expired", "does not exist"))
+
+class VertexContextCacheBackend:
+    """Vertex AI cached content, created in the region the SDK was initialised for."""
+
+    def __init__(self, region: str):
+        self.region = region
+
+    def supports(self, target: Target) -> bool:
+        return target.region == self.region
+
+    def create(self, prefix: str, target: Target, ttl: float) -> Any:
+        return caching.CachedContent.create(model_name=target.model, system_instruction=prefix,
+                                            ttl=timedelta(seconds=ttl))
+
+    def refresh(self, handle: Any, ttl: float) -> None:
+        handle.update(ttl=timedelta(seconds=ttl))
+
+    def delete(self, handle: Any) -> None:
+        handle.delete()
+
+    def client(self, handle: Any, target: Target, base_client: Any) -> Any:
+        from vertexai.preview.generative_models import GenerativeModel
+        return GenerativeModel.from_cached_content(cached_content=handle)
+
+class _PrefixedClient:
+    def __init__(self, prefix: str, base_client: Any):
+        self._prefix = prefix
+        self._base_client = base_client
+
+    def generate_content(self, contents: str, **kwargs) -> Any:
+        return self._base_client.generate_content(self._prefix + contents, **kwargs)
+
+class LocalContextCacheBackend:
+    """
+    In-process stand-in for tests and local development: handles behave like
+    cached content, but the prefix is sent inline by the returned client.
+    """
+
+    def __init__(self):
+        self.prefixes: dict[str, str] = {}
+        self.created = self.refreshed = self.deleted = 0
+        self._lock = threading.Lock()
+
+    def supports(self, target: Target) -> bool:
+        return True
+
+    def create(self, prefix: str, target: Target, ttl: float) -> str:
+        with self._lock:
+            self.created += 1
+            handle = f"local/{target}/{self.created}"
+            self.prefixes[handle] = prefix
+            return handle
+
+    def refresh(self, handle: str, ttl: float) -> None:
+        with self._lock:
+            self.refreshed += 1
+
+    def delete(self, handle: str) -> None:
+        with self._lock:
+            if self.prefixes.pop(handle, None) is not None:
+                self.deleted += 1
+
+    def client(self, handle: str, target: Target, base_client: Any) -> _PrefixedClient:
+        with self._lock:
+            prefix = self.prefixes.get(handle)
+        if prefix is None:
+            raise api_exceptions.NotFound(f"Cached content {handle} not found.")
+        return _PrefixedClient(prefix, base_client)
+
+@dataclass
+class CachedPrefix:
+    handle: Any
+    expires_at: float
+
+class ContextCache:
+    """Creates, refreshes and hands out cached-content handles for prompt prefixes."""
+
+    def __init__(self, backend=None, ttl: float = DEFAULT_TTL_SECONDS, refresh_margin: float = REFRESH_MARGIN_SECONDS,
+                 min_tokens: int = MIN_CACHE_TOKENS, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self._clock = clock
+        self._entries: dict[tuple[str, Target], CachedPrefix] = {}
+        self._key_locks: dict[tuple[str, Target], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, prefix: str, target: Target) -> Optional[Any]:
+        """
+        The handle for `prefix` on `target`, created or refreshed as needed.
+        Returns None when the prefix should be sent inline instead.
+        """
+        if self.backend is None or len(prefix) // CHARS_PER_TOKEN < self.min_tokens or not self.backend.supports(target):
+            return None
+        key = (content_hash(prefix), target)
+        with self._lock:
+            entry = self._entries.get(key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if entry is not None and self._clock() < entry.expires_at - self.refresh_margin:
+            return entry.handle
+
+        # One caller creates or refreshes; the others wait for it rather than creating duplicates.
+        with key_lock:
+            now = self._clock()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at - self.refresh_margin:
+                return entry.handle
+            replaced = None
+            try:
+                if entry is not None and now < entry.expires_at:
+                    self.backend.refresh(entry.handle, self.ttl)
+                    entry = CachedPrefix(entry.handle, now + self.ttl)
+                else:
+                    replaced = entry
+                    entry = CachedPrefix(self.backend.create(prefix, target, self.ttl), now + self.ttl)
+                    print(f"[INFO] Created context cache for a {len(prefix)}-character prompt prefix on {target}.")
+            except Exception as e:
+                print(f"[ERROR] Context cache unavailable on {target}; sending the prefix inline: {e}")
+                return entry.handle if entry is not None and now < entry.expires_at else None
+            with self._lock:
+                self._entries[key] = entry
+            if replaced is not None:
+                self._delete(replaced.handle)
+            return entry.handle
+
+    def client(self, handle: Any, target: Target, base_client: Any) -> Any:
+        """A client whose requests include the cached prefix."""
+        return self.backend.client(handle, target, base_client)
+
+    def invalidate(self, prefix: str, target: Target, handle: Any = None) -> None:
+        """
+        Forgets and deletes the handle for `prefix` on `target`, e.g. after the
+        service reported it missing; the next lookup creates a new one. With
+        `handle`, only that handle is dropped, so a request that failed on an
+        old handle does not discard its replacement.
+        """
+        key = (content_hash(prefix), target)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (handle is not None and entry.handle != handle):
+                return
+            del self._entries[key]
+        self._delete(entry.handle)
+
+    def _delete(self, handle: Any) -> None:
+        # Best effort: cached content also expires on its own once its TTL runs out.
+        try:
+            self.backend.delete(handle)
+        except Exception as e:
+            print(f"[ERROR] Could not delete replaced context cache: {e}")
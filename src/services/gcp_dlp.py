@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from google.cloud import dlp_v2
+from src.services import resilience
 
 load_dotenv()
 
@@ -35,7 +36,7 @@ def inspect_text(text_to_scan: str) -> list[dict]:
             "item": item,
         }
 
-        response = dlp_client.inspect_content(request=request)
+        response = resilience.call("dlp", dlp_client.inspect_content, request=request)
         
         findings = [{
             "quote": finding.quote,
@@ -1,10 +1,45 @@
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 from google.api_core.client_options import ClientOptions
 from google.cloud import documentai
+from src.services import resilience
+from src.utils.cache import SingleFlight, TTLCache, content_hash, stable_hash
 
 load_dotenv()
 
+# Identical documents uploaded at the same time (e.g. a shared template) are processed once.
+inflight = SingleFlight()
+
+# Extractions started speculatively when a file is uploaded, picked up by the later
+# process_document call for the same content. Uploads nobody acts on expire.
+PREFETCH_ENABLED = os.getenv("DOCAI_PREFETCH", "1") != "0"
+PREFETCH_TTL_SECONDS = 600
+_prefetched = TTLCache(ttl=PREFETCH_TTL_SECONDS, maxsize=32)
+_prefetch_executor = ThreadPoolExecutor(max_workers=int(os.getenv("DOCAI_PREFETCH_WORKERS", "2")),
+                                        thread_name_prefix="docai-prefetch")
+
+def _key(file_content: bytes, mime_type: str) -> str:
+    return stable_hash("document_ai", content_hash(file_content), mime_type)
+
+def prefetch_document(file_content: bytes, mime_type: str) -> bool:
+    """
+    Starts extracting a document in the background, so that a later
+    `process_document` call for the same content only waits for what is left.
+
+    Returns:
+        bool: True if an extraction was started, False if prefetching is disabled
+        or this content is already being (or has been) extracted.
+    """
+    if not PREFETCH_ENABLED:
+        return False
+    key = _key(file_content, mime_type)
+    if _prefetched.get(key) is not None:
+        return False
+    _prefetched.set(key, _prefetch_executor.submit(inflight.do, key, _process_document, file_content, mime_type))
+    print(f"[INFO] Started speculative Document AI extraction ({len(file_content):,} bytes).")
+    return True
+
 def process_document(file_content: bytes, mime_type: str) -> str:
     """
     Processes a document using Google Cloud Document AI to extract its text.
@@ -16,6 +51,21 @@ def process_document(file_content: bytes, mime_type: str) -> str:
     Returns:
         str: The extracted text content or a formatted error message.
     """
+    key = _key(file_content, mime_type)
+    prefetched: Future = _prefetched.get(key)
+    if prefetched is not None:
+        if prefetched.cancel():
+            # Still queued behind other prefetches; extracting now is faster than waiting for a worker.
+            _prefetched.invalidate(lambda k: k == key)
+        else:
+            text = prefetched.result()
+            if not text.startswith("Error"):
+                return text
+            # The speculative run failed (e.g. a transient outage); forget it and try again now.
+            _prefetched.invalidate(lambda k: k == key)
+    return inflight.do(key, _process_document, file_content, mime_type)
+
+def _process_document(file_content: bytes, mime_type: str) -> str:
     project_id = os.getenv("GCP_PROJECT_ID")
     location = "us"  # Document AI processors are typically in 'us' or 'eu'
     processor_id = os.getenv("DOCAI_PROCESSOR_ID")
@@ -31,7 +81,7 @@ def process_document(file_content: bytes, mime_type: str) -> str:
         raw_document = documentai.RawDocument(content=file_content, mime_type=mime_type)
         request = documentai.ProcessRequest(name=name, raw_document=raw_document)
 
-        result = client.process_document(request=request)
+        result = resilience.call("document_ai", client.process_document, request=request)
         print("[INFO] Document AI processing successful.")
         return result.document.text
     except Exception as e:
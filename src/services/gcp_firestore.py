@@ -1,15 +1,23 @@
 import os
+import time
+import queue
+import random
+import threading
+from concurrent.futures import Future
 from dotenv import load_dotenv
 from google.cloud import firestore
 
 load_dotenv()
 
+# Firestore rejects a WriteBatch with more than 500 operations.
+MAX_BATCH_SIZE = 500
+
 # --- Initialization ---
 try:
     project_id = os.getenv("GCP_PROJECT_ID")
     if not project_id:
         raise ValueError("GCP_PROJECT_ID must be set to initialize Firestore.")
-    
+
     db = firestore.Client(project=project_id)
     print("[INFO] Firestore client initialized successfully.")
 except Exception as e:
@@ -17,25 +25,321 @@ except Exception as e:
     db = None
 
 # --- Core Functions ---
-def save_record(collection_name: str, data: dict) -> tuple[bool, str]:
+def save_record(collection_name: str, data: dict, doc_id: str = None) -> tuple[bool, str]:
     """
     Saves a dictionary as a new document in a specified Firestore collection.
 
     Args:
         collection_name (str): The name of the collection (e.g., 'scan_history').
         data (dict): The data to save. A 'createdAt' timestamp will be added.
+        doc_id (str): Optional document ID; an existing document with this ID is replaced.
 
     Returns:
         tuple[bool, str]: (Success_flag, Document_ID or error_message).
     """
     if not db:
         return False, "Error: Firestore client is not initialized."
-        
+
     try:
         data['createdAt'] = firestore.SERVER_TIMESTAMP
-        doc_ref = db.collection(collection_name).add(data)[1]
+        if doc_id:
+            doc_ref = db.collection(collection_name).document(doc_id)
+            doc_ref.set(data)
+        else:
+            doc_ref = db.collection(collection_name).add(data)[1]
         print(f"[INFO] Record saved to '{collection_name}' with ID: {doc_ref.id}")
         return True, doc_ref.id
     except Exception as e:
         print(f"[ERROR] Failed to save record to Firestore: {e}")
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+def get_record(collection_name: str, doc_id: str) -> dict | None:
+    """
+    Fetches a single document by ID.
+
+    Returns:
+        dict | None: The document fields plus its 'id', or None if it does not exist or on error.
+    """
+    if not db:
+        return None
+
+    try:
+        snapshot = db.collection(collection_name).document(doc_id).get()
+        if not snapshot.exists:
+            return None
+        return {**snapshot.to_dict(), 'id': snapshot.id}
+    except Exception as e:
+        print(f"[ERROR] Failed to read record from Firestore: {e}")
+        return None
+
+def query_records(collection_name: str, filters: list[tuple] = None, order_by: str = 'createdAt',
+                  descending: bool = True, limit: int = None, start_after: str = None,
+                  select: list[str] = None) -> list[dict]:
+    """
+    Queries a collection with equality/range filters, ordering and cursor pagination.
+
+    Args:
+        collection_name (str): The collection to query.
+        filters (list[tuple]): (field, op, value) triples, e.g. ('standard', '==', 'EU (GDPR/MDR)').
+        order_by (str): Field to order by. Defaults to 'createdAt'.
+        descending (bool): Sort direction.
+        limit (int): Maximum number of documents to return.
+        start_after (str): Document ID of the last result of the previous page.
+        select (list[str]): Optional field projection; other fields are not transferred.
+
+    Returns:
+        list[dict]: Matching documents, each with its 'id'. Empty on error.
+    """
+    if not db:
+        return []
+
+    try:
+        collection = db.collection(collection_name)
+        query = collection
+        for field, op, value in filters or []:
+            query = query.where(filter=firestore.FieldFilter(field, op, value))
+        if order_by:
+            direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            query = query.order_by(order_by, direction=direction)
+        if select:
+            query = query.select(list(select))
+        if start_after:
+            cursor = collection.document(start_after).get()
+            if cursor.exists:
+                query = query.start_after(cursor)
+        if limit:
+            query = query.limit(limit)
+        return [{**snapshot.to_dict(), 'id': snapshot.id} for snapshot in query.stream()]
+    except Exception as e:
+        print(f"[ERROR] Failed to query Firestore: {e}")
+        return []
+
+def _filtered(collection_name: str, filters: list[tuple] = None):
+    query = db.collection(collection_name)
+    for field, op, value in filters or []:
+        query = query.where(filter=firestore.FieldFilter(field, op, value))
+    return query
+
+def count_records(collection_name: str, filters: list[tuple] = None) -> int | None:
+    """
+    Counts matching documents with a server-side aggregation query, without reading them.
+
+    Returns:
+        int | None: The count, or None on error.
+    """
+    if not db:
+        return None
+
+    try:
+        return int(_filtered(collection_name, filters).count(alias="count").get()[0][0].value)
+    except Exception as e:
+        print(f"[ERROR] Failed to run Firestore count aggregation: {e}")
+        return None
+
+def sum_records(collection_name: str, field: str, filters: list[tuple] = None) -> float | None:
+    """
+    Sums a numeric field over matching documents with a server-side aggregation query.
+
+    Returns:
+        float | None: The sum, or None on error.
+    """
+    if not db:
+        return None
+
+    try:
+        return _filtered(collection_name, filters).sum(field, alias="total").get()[0][0].value or 0
+    except Exception as e:
+        print(f"[ERROR] Failed to run Firestore sum aggregation: {e}")
+        return None
+
+# --- Sharded Counters ---
+# High-volume counters are spread over shard documents, one set per day, so
+# concurrent increments do not contend on a single document.
+COUNTER_COLLECTION = "counter_shards"
+COUNTER_SHARDS = 10
+
+def increment_counter(name: str, amount: int = 1) -> bool:
+    """Adds `amount` to a sharded counter for today's date."""
+    if not db:
+        return False
+
+    try:
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        shard = random.randrange(COUNTER_SHARDS)
+        db.collection(COUNTER_COLLECTION).document(f"{name}:{day}:{shard}").set(
+            {"name": name, "day": day, "count": firestore.Increment(amount)}, merge=True
+        )
+        return True
+    except Exception as e:
+        print(f"[ERROR] Failed to increment Firestore counter '{name}': {e}")
+        return False
+
+def get_counter(name: str, since_day: str = None) -> int | None:
+    """Returns a counter's total, optionally only from `since_day` (YYYY-MM-DD) onwards."""
+    filters = [("name", "==", name)]
+    if since_day:
+        filters.append(("day", ">=", since_day))
+    total = sum_records(COUNTER_COLLECTION, "count", filters)
+    return None if total is None else int(total)
+
+# --- Buffered Batch Writer ---
+class BufferedWriter:
+    """
+    Queues records and commits them to Firestore from a background thread
+    in WriteBatch commits of up to 500 documents.
+
+    A batch is flushed as soon as it is full or `flush_interval` seconds after
+    its first record was queued, whichever comes first. Failed commits are
+    retried with jittered exponential backoff before their futures fail.
+    """
+
+    def __init__(self, client=None, batch_size: int = MAX_BATCH_SIZE, flush_interval: float = 1.0,
+                 max_queue_size: int = 20000, max_retries: int = 3, backoff_base: float = 0.5):
+        self._client = client
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        # Queueing and starting shutdown share this lock, so nothing is queued after the final drain.
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="firestore-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else db
+
+    def submit(self, collection_name: str, data: dict) -> Future:
+        """
+        Queues a record for writing without blocking the caller.
+
+        Args:
+            collection_name (str): The target collection.
+            data (dict): The data to save. A 'createdAt' timestamp will be added.
+
+        Returns:
+            Future: Resolves to the new document ID, or raises if the write failed.
+                    Fails immediately once the writer is closing or its queue is full.
+        """
+        future = Future()
+        if not self.client:
+            future.set_exception(RuntimeError("Error: Firestore client is not initialized."))
+            return future
+        with self._lock:
+            if self._closing.is_set():
+                future.set_exception(RuntimeError("Error: Firestore writer is closed."))
+                return future
+            try:
+                self._queue.put_nowait((collection_name, data, future))
+            except queue.Full:
+                future.set_exception(BufferError("Error: Firestore write queue is full; record rejected."))
+        return future
+
+    def submit_many(self, collection_name: str, records: list[dict]) -> list[Future]:
+        """Queues several records for the same collection, returning one future per record."""
+        return [self.submit(collection_name, record) for record in records]
+
+    def flush(self, timeout: float = None) -> None:
+        """
+        Blocks until every record queued so far has been committed or has failed.
+        Once the writer is closing it only waits for the background thread to finish.
+        """
+        marker = Future()
+        while True:
+            with self._lock:
+                if self._closing.is_set():
+                    self._thread.join(timeout=timeout)
+                    return
+                try:
+                    self._queue.put_nowait((None, None, marker))
+                    break
+                except queue.Full:
+                    pass
+            # Wait for room in the queue, or for close() to take over.
+            self._closing.wait(0.05)
+        marker.result(timeout=timeout)
+
+    def close(self, timeout: float = None) -> None:
+        """Rejects new records, flushes pending ones and stops the background thread."""
+        with self._lock:
+            if self._closing.is_set():
+                return
+            self._closing.set()
+            try:
+                # Only wakes an idle thread; a full queue means it is busy and will see the event.
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        pending = []
+        deadline = None
+        while not self._closing.is_set():
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = ()
+            self._accept(item, pending)
+            if item and pending and deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if not pending:
+                deadline = None
+
+            if len(pending) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._commit(pending)
+                pending.clear()
+                deadline = None
+
+        # Nothing can be queued once closing is set, so this drain sees every remaining record and marker.
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._accept(item, pending)
+            if len(pending) >= self.batch_size:
+                self._commit(pending)
+                pending.clear()
+        self._commit(pending)
+
+    def _accept(self, item, pending: list) -> None:
+        """Adds a queued record to `pending`, or commits everything pending for a flush marker."""
+        if not item:
+            return
+        if item[0] is None:
+            self._commit(pending)
+            pending.clear()
+            item[2].set_result(None)
+        elif item[2].set_running_or_notify_cancel():
+            pending.append(item)
+
+    def _commit(self, pending: list) -> None:
+        if not pending:
+            return
+        refs = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                client = self.client
+                # Document IDs are fixed on the first attempt, so a retried commit cannot write duplicates.
+                if refs is None:
+                    refs = [client.collection(name).document() for name, _, _ in pending]
+                batch = client.batch()
+                for ref, (_, data, _) in zip(refs, pending):
+                    batch.set(ref, {**data, 'createdAt': firestore.SERVER_TIMESTAMP})
+                batch.commit()
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"[ERROR] Failed to commit batch of {len(pending)} records to Firestore: {e}")
+                    for _, _, future in pending:
+                        future.set_exception(e)
+                    return
+                time.sleep(self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+        for ref, (_, _, future) in zip(refs, pending):
+            future.set_result(ref.id)
+        print(f"[INFO] Batch of {len(pending)} records committed to Firestore.")
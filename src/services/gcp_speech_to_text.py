@@ -1,4 +1,5 @@
 from google.cloud import speech
+from src.services import resilience
 
 def transcribe_audio(audio_content: bytes, language_code: str = "en-IN") -> str:
     """
@@ -18,7 +19,7 @@ def transcribe_audio(audio_content: bytes, language_code: str = "en-IN") -> str:
             language_code=language_code,
             enable_automatic_punctuation=True
         )
-        response = client.recognize(config=config, audio=audio)
+        response = resilience.call("speech_to_text", client.recognize, config=config, audio=audio)
 
         transcript = "".join(result.alternatives[0].transcript for result in response.results)
         
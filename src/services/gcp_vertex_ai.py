@@ -1,15 +1,44 @@
 # src/services/gcp_vertex_ai.py
 
 import os
+import json
+import inspect
+import itertools
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
 from dotenv import load_dotenv
 import vertexai
-from vertexai.generative_models import GenerativeModel
+from vertexai.generative_models import GenerationConfig, GenerativeModel
+from src.services import resilience
+from src.services.context_cache import (ContextCache, LocalContextCacheBackend, SUPPORTS_CONTEXT_CACHE,
+                                        VertexContextCacheBackend, is_missing_cache_error)
+from src.services.model_router import ModelRouter, Target
+from src.utils.cache import SingleFlight, stable_hash
 import google.auth
 import google.auth.transport.requests
 
 # Load environment variables from .env for local development
 load_dotenv()
 
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-lite-001")
+# Failover and hedging targets: the same model in other regions, then another model in GCP_REGION.
+FALLBACK_REGIONS = [r.strip() for r in os.getenv("GCP_FALLBACK_REGIONS", "").split(",") if r.strip()]
+FALLBACK_MODEL = os.getenv("GEMINI_FALLBACK_MODEL")
+# Prompts longer than this go to GEMINI_LARGE_PROMPT_MODEL when it is set.
+LARGE_PROMPT_CHARS = 400_000
+LARGE_PROMPT_MODEL = os.getenv("GEMINI_LARGE_PROMPT_MODEL")
+# Deadline for calls without a profile, and the extra time allowed per 1,000 prompt characters.
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", "120"))
+DEADLINE_SECONDS_PER_1K_CHARS = 0.05
+# A stream that sends nothing for this long after its first chunk is abandoned.
+STREAM_IDLE_SECONDS = float(os.getenv("GEMINI_STREAM_IDLE_SECONDS", "60"))
+# Streams whose first chunk is slower than this percentile of earlier streams are hedged to the next target.
+STREAM_HEDGE_PERCENTILE = 90
+
+project_id = region = None
+
 # --- Vertex AI Initialization ---
 try:
     # Attempt to get credentials automatically (works for Cloud Run or local gcloud)
@@ -28,31 +57,294 @@ try:
     vertexai.init(project=project_id, location=region, credentials=creds)
 
     # Initialize the model
-    model = GenerativeModel("gemini-2.0-flash-lite-001")
+    model = GenerativeModel(DEFAULT_MODEL)
     print(f"[INFO] Vertex AI initialized successfully for project '{project_id}' in region '{region}'.")
 
 except Exception as e:
     print(f"[ERROR] Failed to initialize Vertex AI: {e}")
     model = None
 
+# --- Generation Profiles ---
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Output budget, sampling settings, model and latency budget for one kind of task."""
+    max_output_tokens: int
+    temperature: float
+    stop_sequences: tuple[str, ...] = ()
+    model: str = DEFAULT_MODEL
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+    # Hedge to the next target once a call is slower than this latency percentile (None: never hedge).
+    hedge_percentile: Optional[float] = None
+
+    def settings(self) -> dict:
+        """The profile as GenerationConfig keyword arguments."""
+        settings = {"max_output_tokens": self.max_output_tokens, "temperature": self.temperature}
+        if self.stop_sequences:
+            settings["stop_sequences"] = list(self.stop_sequences)
+        return settings
+
+def _profile(name: str, **defaults) -> GenerationProfile:
+    # A profile's model can be swapped per deployment, e.g. GEMINI_COMPLIANCE_AUDIT_MODEL.
+    return GenerationProfile(model=os.getenv(f"GEMINI_{name.upper()}_MODEL", DEFAULT_MODEL), **defaults)
+
+PROFILES = {
+    # Chat answers are asked to stay under ~500 characters; the budget leaves room to finish the sentence.
+    # Interactive, so it is hedged; the background tasks only get deadlines.
+    "copilot": _profile("copilot", max_output_tokens=256, temperature=0.3, deadline_seconds=20, hedge_percentile=90),
+    "compliance_audit": _profile("compliance_audit", max_output_tokens=4096, temperature=0.1, deadline_seconds=300),
+    "test_generation": _profile("test_generation", max_output_tokens=8192, temperature=0.2, deadline_seconds=300),
+    "synthetic_data": _profile("synthetic_data", max_output_tokens=8192, temperature=0.9, deadline_seconds=180),
+    # Rolling Co-Pilot conversation summaries, written in the background.
+    "conversation_summary": _profile("conversation_summary", max_output_tokens=256, temperature=0.1, deadline_seconds=60),
+}
+
+def get_profile(name: Optional[str]) -> Optional[GenerationProfile]:
+    """Looks up a generation profile by name (None means the model defaults)."""
+    if name is None:
+        return None
+    if name not in PROFILES:
+        raise ValueError(f"Unknown generation profile '{name}'. Choose from: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+# --- Routing ---
+router = ModelRouter()
+# Streams are routed on time to first chunk, which is tracked apart from full-response latencies.
+stream_router = ModelRouter(max_workers=8)
+# Identical calls made at the same time (e.g. from several sessions) share one request.
+inflight = SingleFlight()
+_models: dict[Target, GenerativeModel] = {}
+_models_lock = threading.Lock()
+
+def _context_cache_backend():
+    # CONTEXT_CACHE=local uses the in-process stand-in; "off" always sends prefixes inline.
+    mode = os.getenv("CONTEXT_CACHE", "auto")
+    if mode == "local":
+        return LocalContextCacheBackend()
+    if mode == "auto" and SUPPORTS_CONTEXT_CACHE and region:
+        return VertexContextCacheBackend(region)
+    return None
+
+# Fixed prompt prefixes (personas, system prompts) are referenced by cache handle where possible.
+context_cache = ContextCache(_context_cache_backend())
+
+def targets_for(profile: Optional[GenerationProfile], prompt: str) -> list[Target]:
+    """The model/region pairs that may serve a call, in configured preference order."""
+    primary = profile.model if profile else DEFAULT_MODEL
+    if LARGE_PROMPT_MODEL and len(prompt) > LARGE_PROMPT_CHARS:
+        primary = LARGE_PROMPT_MODEL
+    targets = [Target(primary, region)]
+    targets += [Target(primary, r) for r in FALLBACK_REGIONS if r != region]
+    if FALLBACK_MODEL and FALLBACK_MODEL != primary:
+        targets.append(Target(FALLBACK_MODEL, region))
+    return targets
+
+def _deadline(profile: Optional[GenerationProfile], prompt: str) -> float:
+    base = profile.deadline_seconds if profile else DEFAULT_DEADLINE_SECONDS
+    return base + len(prompt) / 1000 * DEADLINE_SECONDS_PER_1K_CHARS
+
+def _client_for(target: Target) -> GenerativeModel:
+    """The client for a target, created on first use. The default model in GCP_REGION is `model`."""
+    if target == Target(DEFAULT_MODEL, region):
+        return model
+    with _models_lock:
+        if target not in _models:
+            _models[target] = GenerativeModel(target.resource_name(project_id))
+        return _models[target]
+
+def _generation_config(generation_config: Optional[GenerationConfig], profile: Optional[GenerationProfile]):
+    if generation_config is not None or profile is None:
+        return generation_config
+    return GenerationConfig(**profile.settings())
+
+JSON_MIME_TYPE = "application/json"
+# Older SDK releases can request JSON output but cannot constrain it with a schema;
+# there the schema is spelled out in the prompt instead.
+SUPPORTS_RESPONSE_SCHEMA = "response_schema" in inspect.signature(GenerationConfig.__init__).parameters
+
 # --- Core Function to Generate Text ---
-def generate_text(prompt: str) -> str:
+def generate_text(prompt: str, generation_config: GenerationConfig = None, profile: str = None,
+                  prefix: str = None) -> str:
     """
     Generate text from a prompt using Vertex AI Gemini model.
 
     Args:
         prompt (str): The input prompt for the model.
+        generation_config (GenerationConfig): Optional sampling and output settings.
+            Takes precedence over the profile's settings.
+        profile (str): Optional generation profile (see PROFILES) selecting the
+            output budget, sampling settings, model and deadline.
+        prefix (str): Optional fixed block (persona, instructions) that goes ahead
+            of `prompt`. It is referenced through the context cache when it can be
+            cached and sent inline otherwise.
 
     Returns:
-        str: Generated text or an error message if initialization failed.
+        str: Generated text or an error message if initialization failed, every
+        target failed, or no target answered before the deadline.
     """
+    selected = get_profile(profile)
     if not model:
         return "Error: Vertex AI client is not initialized. Check server logs."
+    config = _generation_config(generation_config, selected)
+    key = stable_hash("generate_text", prefix, prompt, config.to_dict() if config else None, profile)
+    return inflight.do(key, _generate_text, prompt, config, selected, prefix)
 
-    try:
-        response = model.generate_content(prompt)
+def _generate_text(prompt: str, config: Optional[GenerationConfig], selected: Optional[GenerationProfile],
+                   prefix: str = None) -> str:
+    full_prompt = f"{prefix}{prompt}" if prefix else prompt
+
+    def call(target: Target) -> str:
+        client, contents = _client_for(target), full_prompt
+        handle = context_cache.lookup(prefix, target) if prefix else None
+        if handle is not None:
+            client, contents = context_cache.client(handle, target, client), prompt
+        try:
+            # Retries and quota back-off are per region, where Vertex AI quotas apply.
+            response = resilience.call(f"vertex_ai/{target.region}", client.generate_content,
+                                       contents, generation_config=config)
+        except Exception as e:
+            if handle is not None and is_missing_cache_error(e):
+                # The cache was deleted or expired server-side; the next attempt creates a new one.
+                context_cache.invalidate(prefix, target, handle)
+            raise
         return response.text
+
+    try:
+        return router.run(call, targets_for(selected, full_prompt), _deadline(selected, full_prompt),
+                          selected.hedge_percentile if selected else None)
     except Exception as e:
         error_message = f"Error: Could not generate response from Vertex AI. Details: {e}"
         print(f"[ERROR] {error_message}")
         return error_message
+
+def stream_text(prompt: str, generation_config: GenerationConfig = None, profile: str = None) -> Iterator[str]:
+    """
+    Streams generated text from the Vertex AI Gemini model chunk by chunk.
+
+    Args:
+        prompt (str): The input prompt for the model.
+        generation_config (GenerationConfig): Optional sampling and output settings.
+        profile (str): Optional generation profile (see `generate_text`).
+
+    The first chunk must arrive within the profile's deadline; a target that
+    is slow to start is hedged to the next one, as in `generate_text`. After
+    that, a stream that goes quiet for STREAM_IDLE_SECONDS is abandoned.
+
+    Yields:
+        str: Text chunks as they arrive, or a single error message if the call failed.
+    """
+    selected = get_profile(profile)
+    if not model:
+        yield "Error: Vertex AI client is not initialized. Check server logs."
+        return
+
+    config = _generation_config(generation_config, selected)
+
+    def open_on(target: Target) -> tuple[Any, Iterator]:
+        return resilience.call(f"vertex_ai/{target.region}", _open_stream, _client_for(target), prompt, config)
+
+    try:
+        # A hedged stream that loses the race is left unread and closes with its connection.
+        first, responses = stream_router.run(open_on, targets_for(selected, prompt), _deadline(selected, prompt),
+                                             STREAM_HEDGE_PERCENTILE)
+        rest = _with_idle_timeout(responses, STREAM_IDLE_SECONDS)
+        for response in itertools.chain([first] if first is not None else [], rest):
+            if response.candidates and response.candidates[0].content.parts:
+                yield response.text
+    except Exception as e:
+        error_message = f"Error: Could not stream response from Vertex AI. Details: {e}"
+        print(f"[ERROR] {error_message}")
+        yield error_message
+
+def _open_stream(client: GenerativeModel, prompt: str, config: Optional[GenerationConfig]) -> tuple[Any, Iterator]:
+    """
+    Starts a streamed request and waits for its first chunk, where quota and
+    availability errors surface, so the resilience policy can retry them.
+    Errors after the first chunk are not retried: text has already been yielded.
+    """
+    responses = iter(client.generate_content(prompt, generation_config=config, stream=True))
+    return next(responses, None), responses
+
+def _with_idle_timeout(responses: Iterator, idle_seconds: float) -> Iterator:
+    """Re-yields `responses`, read on a helper thread, and raises TimeoutError if none arrives for `idle_seconds`."""
+    chunks = queue.Queue()
+
+    def pump():
+        try:
+            for response in responses:
+                chunks.put((response, None))
+        except Exception as e:
+            chunks.put((None, e))
+            return
+        chunks.put((None, None))
+
+    threading.Thread(target=pump, name="gemini-stream", daemon=True).start()
+    while True:
+        try:
+            response, error = chunks.get(timeout=idle_seconds)
+        except queue.Empty:
+            raise TimeoutError(f"Gemini stream sent nothing for {idle_seconds:.0f}s.")
+        if error is not None:
+            raise error
+        if response is None:
+            return
+        yield response
+
+# --- Structured (JSON) Output ---
+def object_array_schema(properties: dict[str, str | None]) -> dict:
+    """
+    Builds a response schema for an array of objects.
+
+    Args:
+        properties (dict[str, str | None]): Required keys mapped to their OpenAPI
+            type ("string", "number", ...), or None to leave the value's type open.
+    """
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {key: ({"type": kind} if kind else {}) for key, kind in properties.items()},
+            "required": list(properties),
+        },
+    }
+
+def json_generation_config(response_schema: dict = None, profile: str = None, **config) -> GenerationConfig:
+    """
+    Generation config for JSON output, constrained by `response_schema` where
+    the SDK supports it. Explicit settings override the profile's.
+    """
+    selected = get_profile(profile)
+    config = {**(selected.settings() if selected else {}), **config}
+    if response_schema is not None and SUPPORTS_RESPONSE_SCHEMA:
+        return GenerationConfig(response_mime_type=JSON_MIME_TYPE, response_schema=response_schema, **config)
+    return GenerationConfig.from_dict({"response_mime_type": JSON_MIME_TYPE, **config})
+
+def json_prompt(prompt: str, response_schema: dict = None) -> str:
+    """The prompt to send with `json_generation_config`: the schema is inlined when it cannot be enforced."""
+    if response_schema is None or SUPPORTS_RESPONSE_SCHEMA:
+        return prompt
+    return f"{prompt}\n    The response must conform to this JSON schema:\n    {json.dumps(response_schema)}\n"
+
+def generate_json(prompt: str, response_schema: dict = None, profile: str = None, **config) -> Any:
+    """
+    Generate JSON from a prompt using Gemini's JSON output mode.
+
+    Args:
+        prompt (str): The input prompt for the model.
+        response_schema (dict): Optional schema the output must follow (see `object_array_schema`).
+        profile (str): Optional generation profile (see `generate_text`).
+        **config: Further GenerationConfig settings, e.g. temperature.
+
+    Returns:
+        Any: The decoded JSON; the raw text if it could not be decoded (for
+        example when cut off by the output token limit); or an error message.
+    """
+    response_text = generate_text(json_prompt(prompt, response_schema),
+                                  generation_config=json_generation_config(response_schema, profile, **config),
+                                  profile=profile)
+    if response_text.startswith("Error"):
+        return response_text
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        print(f"[ERROR] Vertex AI returned undecodable JSON ({e}); returning the raw text.")
+        return response_text
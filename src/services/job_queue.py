@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(".cache", "job_queue.sqlite3"))
+
+QUEUED, LEASED, SUCCEEDED, DEAD = "queued", "leased", "succeeded", "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    status        TEXT NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    available_at  REAL NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    result        TEXT,
+    last_error    TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority DESC, available_at);
+"""
+
+class DurableQueue:
+    """
+    SQLite-backed job queue shared by the app and separate worker processes.
+
+    Jobs are leased rather than popped: a worker that dies mid-job lets its
+    lease expire and the job becomes available again. Failed jobs are retried
+    with jittered exponential backoff and dead-lettered after `max_attempts`;
+    so are jobs whose lease expired on their last attempt. Each process should
+    open its own DurableQueue on the same path; within a process, one instance
+    can be shared between threads (e.g. a worker and its heartbeat).
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, backoff_base: float = 5.0, backoff_cap: float = 600.0):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # The connection is shared between threads; sqlite3 does not serialise access to it.
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _transaction(self):
+        """Holds the write lock on the database for a read-then-update sequence."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params=()) -> sqlite3.Row | None:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params=()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def enqueue(self, kind: str, payload: dict, priority: int = 0, max_attempts: int = 3,
+                delay: float = 0.0) -> str:
+        """
+        Adds a job to the queue. Higher priorities are leased first.
+
+        Returns:
+            str: The job ID.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, payload, priority, status, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload), priority, QUEUED, max_attempts, now + delay, now, now),
+        )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float = 300.0, kinds: list[str] = None) -> dict | None:
+        """
+        Atomically claims the highest-priority ready job, including jobs whose
+        previous lease expired. Expired jobs that are out of attempts are
+        dead-lettered instead. Returns None when nothing is ready.
+        """
+        now = time.time()
+        kind_filter, params = "", [QUEUED, now, LEASED, now]
+        if kinds:
+            kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params.extend(kinds)
+
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, last_error = COALESCE(last_error, 'Lease expired on the last attempt.'), "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?))"
+                f"{kind_filter} ORDER BY priority DESC, available_at, created_at LIMIT 1",
+                params,
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, now + lease_seconds, now, row["id"]),
+            )
+
+        job = self._to_job(row)
+        job.update(status=LEASED, lease_owner=worker_id, attempts=row["attempts"] + 1)
+        return job
+
+    def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        """Heartbeat for long jobs. Returns False if the lease was lost to another worker."""
+        cursor = self._execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (time.time() + lease_seconds, time.time(), job_id, LEASED, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result=None) -> bool:
+        """Marks a leased job as succeeded and stores its JSON-serialisable result."""
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (SUCCEEDED, json.dumps(result, default=str), time.time(), job_id, LEASED, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retryable: bool = True) -> str | None:
+        """
+        Records a failed attempt. The job is re-queued with backoff, or
+        dead-lettered once it is out of attempts or the error is not retryable.
+
+        Returns:
+            str | None: The job's new status, or None if the lease was lost.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, LEASED, worker_id),
+            ).fetchone()
+            if row is None:
+                return None
+
+            if not retryable or row["attempts"] >= row["max_attempts"]:
+                status, available_at = DEAD, now
+            else:
+                delay = min(self.backoff_cap, self.backoff_base * 2 ** (row["attempts"] - 1))
+                status, available_at = QUEUED, now + delay * random.uniform(0.5, 1.5)
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, available_at, error[:2000], now, job_id, LEASED, worker_id),
+            )
+        return status
+
+    def get(self, job_id: str) -> dict | None:
+        row = self._fetchone("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._to_job(row) if row else None
+
+    def dead_letters(self, limit: int = 100) -> list[dict]:
+        rows = self._fetchall(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (DEAD, limit)
+        )
+        return [self._to_job(row) for row in rows]
+
+    def requeue(self, job_id: str) -> bool:
+        """Moves a dead-lettered job back to the queue with a fresh set of attempts."""
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (QUEUED, time.time(), time.time(), job_id, DEAD),
+        )
+        return cursor.rowcount == 1
+
+    def stats(self) -> dict:
+        """Returns the number of jobs per status."""
+        rows = self._fetchall("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_job(row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from src.services import gcp_firestore
+
+load_dotenv()
+
+DEFAULT_PATH = os.getenv("LOCAL_STORE_PATH", os.path.join(".cache", "local_store.sqlite3"))
+# How often a queried collection is re-synced from Firestore, so writes by other instances show up.
+SYNC_INTERVAL_SECONDS = float(os.getenv("LOCAL_STORE_SYNC_SECONDS", "60"))
+
+_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    doc_id     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (collection, doc_id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_collection_created
+    ON records (collection, created_at, doc_id);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT NOT NULL,
+    day   TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, day)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    watermark  REAL NOT NULL
+);
+"""
+
+def _to_epoch(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("latin-1")
+    return str(value)
+
+def _column(field: str) -> str:
+    if field == "createdAt":
+        return "created_at"
+    if field == "id":
+        return "doc_id"
+    # Field names are interpolated into a JSON path, so only allow plain identifiers.
+    if not all(part.isidentifier() for part in field.split(".")):
+        raise ValueError(f"Unsupported field name '{field}'.")
+    return f"json_extract(data, '$.{field}')"
+
+def _comparable(field: str, value):
+    return _to_epoch(value) if field == "createdAt" else value
+
+class LocalStore:
+    """
+    Embedded SQLite (WAL mode) store exposing the same save/get/query surface
+    as `gcp_firestore`. Records are kept as JSON with the collection and
+    creation time in indexed columns.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def save_record(self, collection_name: str, data: dict, doc_id: str = None,
+                    created_at=None) -> tuple[bool, str]:
+        """
+        Saves a record, replacing any existing record with the same ID.
+
+        Returns:
+            tuple[bool, str]: (Success_flag, Document_ID or error_message).
+        """
+        doc_id = doc_id or uuid.uuid4().hex
+        fields = {k: v for k, v in data.items() if k not in ("id", "createdAt")}
+        created = _to_epoch(created_at) if created_at is not None else time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO records (collection, doc_id, created_at, data) VALUES (?, ?, ?, ?)",
+                    (collection_name, doc_id, created, json.dumps(fields, default=_json_default)),
+                )
+            return True, doc_id
+        except Exception as e:
+            print(f"[ERROR] Failed to save record to local store: {e}")
+            return False, str(e)
+
+    def save_records(self, collection_name: str, records: list[dict]) -> tuple[bool, list[str]]:
+        """Saves many records in a single transaction."""
+        rows = []
+        now = time.time()
+        for record in records:
+            fields = {k: v for k, v in record.items() if k not in ("id", "createdAt")}
+            created = _to_epoch(record["createdAt"]) if isinstance(record.get("createdAt"), (datetime, int, float)) else now
+            rows.append((collection_name, record.get("id") or uuid.uuid4().hex, created,
+                         json.dumps(fields, default=_json_default)))
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO records (collection, doc_id, created_at, data) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            return True, [row[1] for row in rows]
+        except Exception as e:
+            with self._lock:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+            print(f"[ERROR] Failed to save records to local store: {e}")
+            return False, [str(e)] * len(records)
+
+    def get_record(self, collection_name: str, doc_id: str) -> dict | None:
+        """Fetches a single record by ID, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, created_at, data FROM records WHERE collection = ? AND doc_id = ?",
+                (collection_name, doc_id),
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def query_records(self, collection_name: str, filters: list[tuple] = None, order_by: str = "createdAt",
+                      descending: bool = True, limit: int = None, start_after: str = None,
+                      select: list[str] = None) -> list[dict]:
+        """
+        Queries a collection using the same arguments as `gcp_firestore.query_records`.
+
+        Ordering on 'createdAt' is served by the (collection, created_at) index.
+        """
+        where, params = self._where(collection_name, filters)
+
+        order_column = _column(order_by or "createdAt")
+        direction = "DESC" if descending else "ASC"
+        if start_after:
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"SELECT {order_column}, doc_id FROM records WHERE collection = ? AND doc_id = ?",
+                    (collection_name, start_after),
+                ).fetchone()
+            if cursor:
+                where.append(f"({order_column}, doc_id) {'<' if descending else '>'} (?, ?)")
+                params.extend(cursor)
+
+        if select:
+            projection = ", ".join(_column(f) if f not in ("createdAt", "id") else "NULL"
+                                   for f in select)
+            columns = f"doc_id, created_at, json_array({projection})"
+        else:
+            columns = "doc_id, created_at, data"
+        sql = (f"SELECT {columns} FROM records WHERE {' AND '.join(where)} "
+               f"ORDER BY {order_column} {direction}, doc_id {direction}")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if select:
+            return [self._to_projection(row, select) for row in rows]
+        return [self._to_record(row) for row in rows]
+
+    def count_records(self, collection_name: str, filters: list[tuple] = None) -> int:
+        """Counts matching records without loading them."""
+        where, params = self._where(collection_name, filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM records WHERE {' AND '.join(where)}", params).fetchone()[0]
+
+    def sum_records(self, collection_name: str, field: str, filters: list[tuple] = None) -> float:
+        """Sums a numeric field over matching records."""
+        where, params = self._where(collection_name, filters)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT TOTAL({_column(field)}) FROM records WHERE {' AND '.join(where)}", params
+            ).fetchone()
+        return row[0]
+
+    def increment_counter(self, name: str, amount: int = 1) -> bool:
+        """Adds `amount` to a counter for today's date."""
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO counters (name, day, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, day) DO UPDATE SET count = count + excluded.count",
+                (name, day, amount),
+            )
+        return True
+
+    def get_counter(self, name: str, since_day: str = None) -> int:
+        """Returns a counter's total, optionally only from `since_day` (YYYY-MM-DD) onwards."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM counters WHERE name = ? AND day >= ?",
+                (name, since_day or ""),
+            ).fetchone()
+        return row[0]
+
+    def get_sync_watermark(self, collection_name: str) -> datetime | None:
+        """The newest remote creation time synced into a collection, or None if it was never synced."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM sync_state WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return datetime.fromtimestamp(row[0], tz=timezone.utc) if row else None
+
+    def set_sync_watermark(self, collection_name: str, watermark) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (collection, watermark) VALUES (?, ?) "
+                "ON CONFLICT(collection) DO UPDATE SET watermark = MAX(watermark, excluded.watermark)",
+                (collection_name, _to_epoch(watermark)),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _where(collection_name: str, filters: list[tuple] = None) -> tuple[list[str], list]:
+        where, params = ["collection = ?"], [collection_name]
+        for field, op, value in filters or []:
+            if op not in _OPERATORS:
+                raise ValueError(f"Unsupported filter operator '{op}'.")
+            if op == "in":
+                values = [_comparable(field, v) for v in value]
+                where.append(f"{_column(field)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                where.append(f"{_column(field)} {_OPERATORS[op]} ?")
+                params.append(_comparable(field, value))
+        return where, params
+
+    @staticmethod
+    def _to_record(row) -> dict:
+        doc_id, created_at, data = row
+        return {**json.loads(data), "id": doc_id, "createdAt": datetime.fromtimestamp(created_at, tz=timezone.utc)}
+
+    @staticmethod
+    def _to_projection(row, select: list[str]) -> dict:
+        doc_id, created_at, values = row
+        record = {field: value for field, value in zip(select, json.loads(values))
+                  if field not in ("createdAt", "id")}
+        record.update(id=doc_id, createdAt=datetime.fromtimestamp(created_at, tz=timezone.utc))
+        return record
+
+class CachedStore:
+    """
+    Write-through local cache in front of Firestore.
+
+    Writes go to Firestore first and are mirrored locally under the same
+    document ID. Reads are served from SQLite; single-record misses fall
+    through to Firestore and are backfilled. Queries first pull remote records
+    created since the last sync, at most every `sync_interval` seconds per
+    collection. The sync position is the newest server-assigned `createdAt`
+    seen, not the local clock, so local writes and clock skew cannot hide
+    remote records.
+    """
+
+    def __init__(self, local: LocalStore, remote=gcp_firestore, sync_interval: float = SYNC_INTERVAL_SECONDS):
+        self.local = local
+        self.remote = remote
+        self.sync_interval = sync_interval
+        self._synced_at: dict[str, float] = {}
+        self._sync_lock = threading.Lock()
+
+    def save_record(self, collection_name: str, data: dict, doc_id: str = None) -> tuple[bool, str]:
+        local_copy = dict(data)
+        success, result = self.remote.save_record(collection_name, data, doc_id=doc_id)
+        if success:
+            self.local.save_record(collection_name, local_copy, doc_id=result)
+        return success, result
+
+    def get_record(self, collection_name: str, doc_id: str) -> dict | None:
+        record = self.local.get_record(collection_name, doc_id)
+        if record is None:
+            record = self.remote.get_record(collection_name, doc_id)
+            if record is not None:
+                self.local.save_record(collection_name, record, doc_id=doc_id, created_at=record.get("createdAt"))
+        return record
+
+    def query_records(self, collection_name: str, **kwargs) -> list[dict]:
+        self.sync_collection(collection_name)
+        return self.local.query_records(collection_name, **kwargs)
+
+    def count_records(self, collection_name: str, filters: list[tuple] = None) -> int:
+        count = self.remote.count_records(collection_name, filters)
+        return self.local.count_records(collection_name, filters) if count is None else count
+
+    def sum_records(self, collection_name: str, field: str, filters: list[tuple] = None) -> float:
+        total = self.remote.sum_records(collection_name, field, filters)
+        return self.local.sum_records(collection_name, field, filters) if total is None else total
+
+    def increment_counter(self, name: str, amount: int = 1) -> bool:
+        self.local.increment_counter(name, amount)
+        return self.remote.increment_counter(name, amount)
+
+    def get_counter(self, name: str, since_day: str = None) -> int:
+        total = self.remote.get_counter(name, since_day)
+        return self.local.get_counter(name, since_day) if total is None else total
+
+    def sync_collection(self, collection_name: str, force: bool = False) -> int:
+        """
+        Copies remote records created since the collection's sync watermark.
+        Runs at most once per `sync_interval` per collection unless forced.
+        """
+        with self._sync_lock:
+            last = self._synced_at.get(collection_name)
+            if last is not None and time.monotonic() - last < self.sync_interval and not force:
+                return 0
+            since = self.local.get_sync_watermark(collection_name)
+            # Inclusive, so records sharing the watermark's timestamp are not skipped; re-saving them is harmless.
+            filters = [("createdAt", ">=", since)] if since else None
+            records = self.remote.query_records(collection_name, filters=filters, descending=False)
+            if records:
+                self.local.save_records(collection_name, records)
+                stamps = [r["createdAt"] for r in records if isinstance(r.get("createdAt"), (datetime, int, float))]
+                if stamps:
+                    self.local.set_sync_watermark(collection_name, max(_to_epoch(stamp) for stamp in stamps))
+            self._synced_at[collection_name] = time.monotonic()
+            return len(records)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Returns the process-wide record store: a write-through cache when Firestore
+    is configured, otherwise a standalone offline SQLite store.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            local = LocalStore()
+            _store = CachedStore(local) if gcp_firestore.db else local
+            mode = "write-through cache for Firestore" if gcp_firestore.db else "standalone offline store"
+            print(f"[INFO] Local store at '{local.path}' initialized as {mode}.")
+        return _store
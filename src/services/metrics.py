@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from src.services import local_store, scan_history
+from src.utils.cache import TTLCache
+
+# Counter names incremented at write time by the generators.
+TEST_CASES_GENERATED = "test_cases_generated"
+DATA_RECORDS_CREATED = "data_records_created"
+
+# Window used for the "delta" shown under each dashboard metric.
+DELTA_DAYS = 7
+
+_cache = TTLCache(ttl=60, maxsize=4)
+
+def increment(name: str, amount: int = 1) -> None:
+    """Records `amount` new events on a counter. Failures are logged, never raised."""
+    if amount <= 0:
+        return
+    try:
+        local_store.get_store().increment_counter(name, amount)
+        _cache.invalidate()
+    except Exception as e:
+        print(f"[ERROR] Failed to increment counter '{name}': {e}")
+
+def _load_dashboard_metrics() -> dict:
+    store = local_store.get_store()
+    since = datetime.now(timezone.utc) - timedelta(days=DELTA_DAYS)
+    since_day = since.strftime("%Y-%m-%d")
+    recent = [("createdAt", ">=", since)]
+    history = scan_history.HISTORY_COLLECTION
+
+    return {
+        "compliance_checks": (store.count_records(history), store.count_records(history, recent)),
+        "high_risk_findings": (int(store.sum_records(history, "risk_count")),
+                               int(store.sum_records(history, "risk_count", recent))),
+        "test_cases_generated": (store.get_counter(TEST_CASES_GENERATED),
+                                 store.get_counter(TEST_CASES_GENERATED, since_day)),
+        "data_records_created": (store.get_counter(DATA_RECORDS_CREATED),
+                                 store.get_counter(DATA_RECORDS_CREATED, since_day)),
+    }
+
+def get_dashboard_metrics() -> dict:
+    """
+    Returns the dashboard headline metrics as {name: (total, last_7_days)}.
+
+    Totals come from server-side count/sum aggregations and sharded counters,
+    so the cost does not grow with history size. Results are cached briefly.
+    """
+    try:
+        return _cache.get_or_load("dashboard", _load_dashboard_metrics)
+    except Exception as e:
+        print(f"[ERROR] Failed to load dashboard metrics: {e}")
+        return {}
@@ -0,0 +1,148 @@
+"""
+Latency-aware routing of Gemini calls across models and regions.
+
+Every call gets a deadline. The targets for a call (model + region pairs)
+are tried fastest-first by recently observed latency; a target that fails
+hands over to the next one, and a target that is slower than the configured
+latency percentile gets a hedged duplicate on the next target. The first
+answer wins and the slower call is abandoned.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Latency samples kept per target, and how many are needed before percentiles are trusted.
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 10
+
+@dataclass(frozen=True)
+class Target:
+    """A model in a region."""
+    model: str
+    region: str
+
+    def resource_name(self, project_id: str) -> str:
+        """The full Vertex AI resource name, which pins calls to this target's region."""
+        return f"projects/{project_id}/locations/{self.region}/publishers/google/models/{self.model}"
+
+    def __str__(self) -> str:
+        return f"{self.model}@{self.region}"
+
+class LatencyTracker:
+    """Rolling window of call latencies per target."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: dict[Target, deque] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, target: Target, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(target, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, target: Target, percentile: float) -> Optional[float]:
+        """The latency below which `percentile` percent of recent calls finished, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(target, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+class DeadlineExceeded(TimeoutError):
+    """No target answered before the call's deadline."""
+
+class ModelRouter:
+    """Runs calls against a list of targets with deadlines, failover and hedging."""
+
+    def __init__(self, max_workers: int = 16, tracker: LatencyTracker = None):
+        self.tracker = tracker or LatencyTracker()
+        # Abandoned calls keep running here until the SDK returns, so the pool is larger than
+        # the number of callers we expect at once.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+
+    def order(self, targets: list[Target]) -> list[Target]:
+        """Targets by median recent latency; targets without enough samples keep their configured place."""
+        def key(indexed: tuple[int, Target]):
+            position, target = indexed
+            median = self.tracker.percentile(target, 50)
+            return (0, median, position) if median is not None else (1, 0.0, position)
+        return [target for _, target in sorted(enumerate(targets), key=key)]
+
+    def run(self, call: Callable[[Target], T], targets: list[Target], deadline: float,
+            hedge_percentile: float = None) -> T:
+        """
+        Calls `call(target)` until one target answers.
+
+        Args:
+            call (Callable[[Target], T]): Performs the request against one target.
+            targets (list[Target]): Candidate targets, in configured preference order.
+            deadline (float): Seconds the caller is willing to wait in total.
+            hedge_percentile (float): Send one duplicate to the next target once the
+                first call runs longer than this latency percentile (None disables hedging).
+
+        Returns:
+            T: The first successful result.
+
+        Raises:
+            DeadlineExceeded: No target answered in time.
+            Exception: The last target's error, if every target failed.
+        """
+        remaining = self.order(targets)
+        start = time.monotonic()
+        end = start + deadline
+        hedge_at = None
+        if hedge_percentile is not None and len(remaining) > 1:
+            # Until there are enough samples, hedge at half the deadline.
+            threshold = self.tracker.percentile(remaining[0], hedge_percentile)
+            hedge_at = start + (threshold if threshold is not None else deadline / 2)
+
+        pending: dict[Future, Target] = {}
+        last_error: Optional[Exception] = None
+
+        def launch():
+            target = remaining.pop(0)
+            pending[self._executor.submit(self._timed, call, target, deadline)] = target
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            wake = min(end, hedge_at) if hedge_at is not None and remaining else end
+            done, _ = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                target = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    print(f"[ERROR] Gemini call to {target} failed: {e}")
+                    if remaining and not pending:
+                        launch()
+            if done:
+                continue
+            if time.monotonic() >= end:
+                break
+            if remaining:
+                print(f"[INFO] Gemini call to {pending[next(iter(pending))]} is slow; hedging to {remaining[0]}.")
+                launch()
+                hedge_at = None
+
+        if pending or last_error is None:
+            raise DeadlineExceeded(f"No response from Gemini within {deadline:.0f}s.")
+        raise last_error
+
+    def _timed(self, call: Callable[[Target], T], target: Target, deadline: float) -> T:
+        start = time.monotonic()
+        try:
+            result = call(target)
+        except Exception:
+            # Failures count as slow so the target drops down the order.
+            self.tracker.record(target, max(deadline, time.monotonic() - start))
+            raise
+        self.tracker.record(target, time.monotonic() - start)
+        return result
@@ -0,0 +1,229 @@
+"""
+Shared resilience layer for calls to Google Cloud services.
+
+Each service (or Vertex AI region) gets a CallPolicy that:
+
+* classifies errors by gRPC status: quota errors and transient errors are
+  retried with jittered exponential backoff, everything else fails at once;
+* trips a circuit breaker after repeated transient failures, so callers fail
+  fast (and the model router fails over) while the service recovers;
+* limits concurrent calls with an AIMD limiter that halves the limit on quota
+  errors and grows it back by one per window of successful calls.
+
+The service modules keep their "Error: ..." return values; the policy only
+decides how many attempts happen before that error is returned.
+"""
+
+import os
+import time
+import random
+import threading
+from typing import Any, Callable, Optional
+from google.api_core import exceptions as api_exceptions
+
+QUOTA = "quota"
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+_QUOTA_STATUSES = {"RESOURCE_EXHAUSTED"}
+_TRANSIENT_STATUSES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "ABORTED"}
+_TRANSIENT_HTTP = {500, 502, 503, 504}
+
+def classify(error: Exception) -> str:
+    """Classifies an exception from a Google Cloud client as QUOTA, TRANSIENT or PERMANENT."""
+    status = None
+    if isinstance(error, api_exceptions.GoogleAPICallError):
+        if error.grpc_status_code is not None:
+            status = error.grpc_status_code.name
+        elif error.code == 429:
+            return QUOTA
+        elif error.code in _TRANSIENT_HTTP:
+            return TRANSIENT
+    elif callable(getattr(error, "code", None)):
+        # A raw grpc.RpcError.
+        try:
+            status = error.code().name
+        except Exception:
+            status = None
+    if status in _QUOTA_STATUSES:
+        return QUOTA
+    if status in _TRANSIENT_STATUSES or isinstance(error, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    return PERMANENT
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt, capped."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class CircuitOpenError(RuntimeError):
+    """The service's circuit breaker is open; the call was not attempted."""
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets one trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError unless a call may go ahead."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("Service temporarily unavailable (circuit open); try again shortly.")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive increase and multiplicative decrease.
+
+    Each successful call adds 1/limit, so the limit grows by one per window of
+    `limit` successes. A quota error halves it, at most once per `cooldown`
+    seconds so that a burst of 429s from the same overload counts once.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, cooldown: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Waits for a free slot; returns False if none freed up within `timeout` seconds."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._in_flight < int(self._limit), timeout=timeout) and self._take()
+
+    def _take(self) -> bool:
+        self._in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            self._cond.notify()
+
+    def on_quota_error(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._limit = max(self.minimum, self._limit * self.decrease_factor)
+                self._last_decrease = now
+
+class CallPolicy:
+    """Retries, circuit breaker and concurrency limit for one service."""
+
+    def __init__(self, name: str, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0,
+                 breaker: CircuitBreaker = None, limiter: AIMDLimiter = None, acquire_timeout: float = 60.0):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or AIMDLimiter()
+        self.acquire_timeout = acquire_timeout
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Calls `fn(*args, **kwargs)`, retrying quota and transient errors.
+
+        Raises:
+            CircuitOpenError: The breaker is open.
+            TimeoutError: No concurrency slot became free in time.
+            Exception: The call's own error once it is permanent or attempts run out.
+        """
+        for attempt in range(self.max_attempts):
+            # Take the slot first: before_call() may claim the half-open trial, which must then be attempted.
+            if not self.limiter.acquire(timeout=self.acquire_timeout):
+                raise TimeoutError(f"{self.name}: no free call slot within {self.acquire_timeout:.0f}s.")
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self.limiter.release()
+                raise
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify(e)
+                if kind == PERMANENT:
+                    # The service answered; the request itself was bad.
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if kind == QUOTA:
+                    self.limiter.on_quota_error()
+                if attempt + 1 == self.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                print(f"[INFO] {self.name}: {kind} error ({e}); retry {attempt + 1} in {delay:.1f}s.")
+            else:
+                self.limiter.on_success()
+                self.breaker.record_success()
+                return result
+            finally:
+                self.limiter.release()
+            time.sleep(delay)
+
+_policies: dict[str, CallPolicy] = {}
+_policies_lock = threading.Lock()
+
+def get_policy(service: str) -> CallPolicy:
+    """The shared policy for a service, e.g. "document_ai" or "vertex_ai/us-central1"."""
+    with _policies_lock:
+        if service not in _policies:
+            _policies[service] = CallPolicy(
+                service,
+                max_attempts=int(os.getenv("GCP_RETRY_ATTEMPTS", "4")),
+                limiter=AIMDLimiter(initial=int(os.getenv("GCP_INITIAL_CONCURRENCY", "8")),
+                                    maximum=int(os.getenv("GCP_MAX_CONCURRENCY", "32"))),
+            )
+        return _policies[service]
+
+def call(service: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Calls `fn` under the shared policy for `service` (see CallPolicy.call)."""
+    return get_policy(service).call(fn, *args, **kwargs)
@@ -0,0 +1,118 @@
+import re
+from datetime import datetime
+from src.services import artifact_store, gcp_firestore, local_store
+from src.utils.cache import TTLCache, content_hash
+
+HISTORY_COLLECTION = "scan_history"
+REPORT_COLLECTION = "scan_reports"
+
+# Fields returned by list queries. Report bodies live in their own collection
+# so listing history never transfers them.
+SUMMARY_FIELDS = [
+    "file_name", "doc_hash", "standard", "max_severity",
+    "risk_count", "warning_count", "pass_count", "report_id", "report_artifact_id",
+]
+
+SEVERITIES = ["High", "Medium", "Pass", "None"]
+
+# Reports above this size go to the chunked artifact store instead of a single document.
+INLINE_REPORT_LIMIT = 900 * 1024
+
+_cache = TTLCache(ttl=30, maxsize=512)
+_report_cache = TTLCache(ttl=300, maxsize=16)
+
+def summarize_report(report: str) -> dict:
+    """Counts the findings in a compliance report and derives its highest severity."""
+    risk = len(re.findall(r"\[Risk - High\]", report))
+    warning = len(re.findall(r"\[Warning - Medium\]", report))
+    passed = len(re.findall(r"\[Pass\]", report))
+    max_severity = "High" if risk else "Medium" if warning else "Pass" if passed else "None"
+    return {"risk_count": risk, "warning_count": warning, "pass_count": passed, "max_severity": max_severity}
+
+def record_scan(file_name: str, file_content: bytes, standard: str, report: str) -> tuple[bool, str]:
+    """
+    Persists a completed compliance scan: the report body and a small summary record.
+
+    Returns:
+        tuple[bool, str]: (Success_flag, Scan_ID or error_message).
+    """
+    store = local_store.get_store()
+    summary = {
+        "file_name": file_name,
+        "doc_hash": content_hash(file_content),
+        "standard": standard,
+        **summarize_report(report),
+    }
+
+    if gcp_firestore.db and len(report.encode("utf-8")) > INLINE_REPORT_LIMIT:
+        success, report_ref = artifact_store.save_artifact(f"report-{summary['doc_hash'][:12]}", report)
+        summary["report_artifact_id"] = report_ref
+    else:
+        success, report_ref = store.save_record(REPORT_COLLECTION, {"report": report})
+        summary["report_id"] = report_ref
+    if not success:
+        return False, report_ref
+
+    success, scan_id = store.save_record(HISTORY_COLLECTION, summary)
+    if success:
+        _cache.invalidate()
+    return success, scan_id
+
+def list_scans(standard: str = None, severity: str = None, since: datetime = None, until: datetime = None,
+               page_size: int = 20, cursor: str = None) -> tuple[list[dict], str | None]:
+    """
+    Lists scan summaries, newest first, one page at a time.
+
+    Args:
+        standard (str): Only scans against this standard.
+        severity (str): Only scans whose highest finding is 'High', 'Medium', 'Pass' or 'None'.
+        since (datetime): Only scans created at or after this time.
+        until (datetime): Only scans created before this time.
+        page_size (int): Number of scans per page.
+        cursor (str): The cursor returned with the previous page.
+
+    Returns:
+        tuple[list[dict], str | None]: (Scan summaries, cursor for the next page or None).
+    """
+    filters = []
+    if standard:
+        filters.append(("standard", "==", standard))
+    if severity:
+        filters.append(("max_severity", "==", severity))
+    if since:
+        filters.append(("createdAt", ">=", since))
+    if until:
+        filters.append(("createdAt", "<", until))
+
+    def load():
+        scans = local_store.get_store().query_records(
+            HISTORY_COLLECTION, filters=filters, limit=page_size, start_after=cursor, select=SUMMARY_FIELDS
+        )
+        next_cursor = scans[-1]["id"] if len(scans) == page_size else None
+        return scans, next_cursor
+
+    key = ("list", standard, severity, since, until, page_size, cursor)
+    return _cache.get_or_load(key, load)
+
+def get_scans_by_hash(doc_hash: str, limit: int = 20) -> list[dict]:
+    """Returns the most recent scans of the document with the given content hash."""
+    return _cache.get_or_load(
+        ("hash", doc_hash, limit),
+        lambda: local_store.get_store().query_records(
+            HISTORY_COLLECTION, filters=[("doc_hash", "==", doc_hash)], limit=limit, select=SUMMARY_FIELDS
+        ),
+    )
+
+def get_report(scan: dict) -> str | None:
+    """Loads the full report body for a scan summary returned by `list_scans`."""
+    if scan.get("report_artifact_id"):
+        key = ("artifact", scan["report_artifact_id"])
+        success, report = _report_cache.get_or_load(key, lambda: artifact_store.load_artifact(scan["report_artifact_id"]))
+        return report if success else None
+    if scan.get("report_id"):
+        record = _report_cache.get_or_load(
+            ("report", scan["report_id"]),
+            lambda: local_store.get_store().get_record(REPORT_COLLECTION, scan["report_id"]),
+        )
+        return record["report"] if record else None
+    return None
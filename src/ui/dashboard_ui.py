@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from src.services import metrics, scan_history
 
 def show_dashboard():
     # Professional header with gradient background
@@ -21,16 +21,22 @@ def show_dashboard():
     """, unsafe_allow_html=True)
 
     # Status indicators
+    metrics_data = metrics.get_dashboard_metrics()
     col1, col2, col3, col4 = st.columns(4)
     
-    with col1:
-        st.metric("Active Projects", "12", "3")
-    with col2:
-        st.metric("Compliance Checks", "156", "23")
-    with col3:
-        st.metric("Test Cases Generated", "2,847", "156")
-    with col4:
-        st.metric("Data Records Created", "45,231", "2,156")
+    for col, (key, label) in zip([col1, col2, col3, col4], [
+        ("compliance_checks", "Compliance Checks"),
+        ("high_risk_findings", "High-Risk Findings"),
+        ("test_cases_generated", "Test Cases Generated"),
+        ("data_records_created", "Data Records Created"),
+    ]):
+        total, recent = metrics_data.get(key, (None, None))
+        with col:
+            st.metric(
+                label,
+                "—" if total is None else f"{total:,}",
+                None if not recent else f"{recent:,} this week",
+            )
 
     st.divider()
 
@@ -119,16 +125,7 @@ def show_dashboard():
     # Recent activity section
     st.divider()
     st.subheader("Recent Activity")
-    
-    recent_activity = pd.DataFrame({
-        'Timestamp': [datetime.now() - timedelta(hours=i) for i in range(5)],
-        'Action': ['Compliance Scan', 'Test Case Generation', 'Data Generation', 'Compliance Scan', 'Test Case Generation'],
-        'Project': ['HealthApp v2.1', 'MediTrack Pro', 'PatientPortal', 'HealthApp v2.0', 'MediTrack Pro'],
-        'Status': ['Completed', 'In Progress', 'Completed', 'Completed', 'Completed'],
-        'Duration': ['2m 34s', 'Processing...', '1m 12s', '3m 45s', '2m 18s']
-    })
-    
-    st.dataframe(recent_activity, use_container_width=True, hide_index=True)
+    show_scan_history()
 
     # Team Section
     st.divider()
@@ -168,3 +165,60 @@ def show_dashboard():
                 <p style="margin-top:0.5rem; color:#4b5563; font-size:0.9rem;">{member['desc']}</p>
             </div>
             """, unsafe_allow_html=True)
+
+
+def show_scan_history(page_size: int = 10):
+    """Renders a filterable, paginated table of past compliance scans."""
+    if "history_cursors" not in st.session_state:
+        st.session_state.history_cursors = [None]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        standard = st.selectbox(
+            "Standard",
+            ["All", "India (DPDPA/CDSCO)", "USA (HIPAA/FDA)", "EU (GDPR/MDR)"],
+            key="history_standard",
+            on_change=lambda: st.session_state.update(history_cursors=[None]),
+        )
+    with col2:
+        severity = st.selectbox(
+            "Highest Severity",
+            ["All"] + scan_history.SEVERITIES,
+            key="history_severity",
+            on_change=lambda: st.session_state.update(history_cursors=[None]),
+        )
+
+    cursors = st.session_state.history_cursors
+    scans, next_cursor = scan_history.list_scans(
+        standard=None if standard == "All" else standard,
+        severity=None if severity == "All" else severity,
+        page_size=page_size,
+        cursor=cursors[-1],
+    )
+
+    if not scans:
+        st.info("No compliance scans recorded yet. Run the Compliance Scanner to build your history.")
+        return
+
+    history = pd.DataFrame([{
+        "Timestamp": scan.get("createdAt"),
+        "Document": scan.get("file_name"),
+        "Standard": scan.get("standard"),
+        "Highest Severity": scan.get("max_severity"),
+        "High Risks": scan.get("risk_count"),
+        "Warnings": scan.get("warning_count"),
+        "Passes": scan.get("pass_count"),
+    } for scan in scans])
+    st.dataframe(history, use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        if st.button("Previous", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", disabled=next_cursor is None, use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
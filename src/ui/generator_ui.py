@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
-from src.modules import test_case_generator, synthetic_data_hub
+from src.modules import workflows
 from src.services import jira_integration
+from src.ui.job_ui import prefetch_extraction, start_job, track_job
+from src.utils.job_runner import SUCCEEDED, FAILED
+
+def _run_test_case_generation(file_name: str, file_content: bytes, mime_type: str) -> tuple[pd.DataFrame, str]:
+    """Background job: generates the test suite and keeps the source file name with it."""
+    return workflows.generate_test_cases(file_content, mime_type, stream=True), file_name
 
 def show_test_case_generator():
     # Professional header
@@ -56,26 +62,38 @@ def show_test_case_generator():
             help="Upload your requirements document for test case generation"
         )
 
+        # Text extraction starts now, so generation only waits for Gemini.
+        prefetch_extraction("test_cases_prefetched_file", uploaded_file)
+
         if uploaded_file:
             st.success(f"✅ File '{uploaded_file.name}' uploaded successfully ({uploaded_file.size:,} bytes)")
             
             col1, col2 = st.columns([1, 2])
             with col1:
-                if st.button("🧪 Generate Test Cases", use_container_width=True, type="primary"):
-                    with st.spinner("AI is analyzing requirements and building your test suite..."):
-                        try:
-                            file_content = uploaded_file.getvalue()
-                            test_cases_df = test_case_generator.generate_test_cases_from_doc(file_content, uploaded_file.type)
-                            st.session_state.test_cases_df = test_cases_df
-                            st.session_state.test_cases_filename = uploaded_file.name
-                            st.success("Test cases generated successfully!")
-                        except Exception as e:
-                            st.error(f"Generation failed: {str(e)}")
-                            st.session_state.test_cases_df = None
+                generation_running = bool(st.session_state.get("test_cases_job_id"))
+                if st.button("🧪 Generate Test Cases", use_container_width=True, type="primary", disabled=generation_running):
+                    start_job(
+                        "test_cases_job_id", _run_test_case_generation,
+                        uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type,
+                        kind="test_case_generation",
+                    )
             
             with col2:
                 st.info("**Ready to generate comprehensive test cases from your requirements document**")
     
+    # Generation runs in the background; poll it and collect the result when done.
+    job = track_job("test_cases_job_id", "AI is analyzing requirements and building your test suite")
+    if job is not None:
+        if job.status == SUCCEEDED:
+            st.session_state.test_cases_df, st.session_state.test_cases_filename = job.result
+            st.success("Test cases generated successfully!")
+            skipped = len(st.session_state.test_cases_df.attrs.get("parse_errors", []))
+            if skipped:
+                st.warning(f"{skipped} malformed test case(s) in the AI response were skipped.")
+        elif job.status == FAILED:
+            st.error(f"Generation failed: {job.message}")
+            st.session_state.test_cases_df = None
+
     # Display generated test cases
     if 'test_cases_df' in st.session_state and st.session_state.test_cases_df is not None:
         st.divider()
@@ -95,6 +113,15 @@ def show_test_case_generator():
             edge_cases = len(st.session_state.test_cases_df[st.session_state.test_cases_df['type'].str.contains('edge', case=False, na=False)])
             st.metric("Edge Cases", edge_cases)
         
+        coverage = st.session_state.test_cases_df.attrs.get("coverage")
+        if coverage:
+            total = len(coverage["covered"]) + len(coverage["uncovered"])
+            st.caption(f"Requirement coverage: {len(coverage['covered'])} of {total} requirements have test cases.")
+            if coverage["uncovered"]:
+                st.warning(f"Requirements without test cases: {', '.join(coverage['uncovered'])}")
+            if coverage["unknown"]:
+                st.warning(f"Test cases reference unknown requirement IDs: {', '.join(coverage['unknown'])}")
+
         # Display the test cases table
         st.dataframe(st.session_state.test_cases_df, use_container_width=True, height=400)
 
@@ -283,20 +310,26 @@ def show_synthetic_data_generator():
 
         col1, col2 = st.columns([1, 2])
         with col1:
-            if st.button(" Generate Data", type="primary", use_container_width=True):
-                with st.spinner("AI is generating your synthetic dataset..."):
-                    try:
-                        json_str, df = synthetic_data_hub.generate_synthetic_data(user_prompt)
-                        st.session_state.synthetic_data_json = json_str
-                        st.session_state.synthetic_data_df = df
-                        st.success("Data generated successfully!")
-                    except Exception as e:
-                        st.error(f"Generation failed: {str(e)}")
-                        st.session_state.synthetic_data_df = None
+            generation_running = bool(st.session_state.get("synthetic_data_job_id"))
+            if st.button(" Generate Data", type="primary", use_container_width=True, disabled=generation_running):
+                start_job("synthetic_data_job_id", workflows.generate_synthetic_data, user_prompt,
+                          stream=True, kind="synthetic_data")
         
         with col2:
             st.info("**Ready to generate privacy-compliant synthetic data based on your requirements**")
 
+    job = track_job("synthetic_data_job_id", "AI is generating your synthetic dataset")
+    if job is not None:
+        if job.status == SUCCEEDED:
+            st.session_state.synthetic_data_json, st.session_state.synthetic_data_df = job.result
+            st.success("Data generated successfully!")
+            skipped = len(st.session_state.synthetic_data_df.attrs.get("parse_errors", []))
+            if skipped:
+                st.warning(f"{skipped} malformed record(s) in the AI response were skipped.")
+        elif job.status == FAILED:
+            st.error(f"Generation failed: {job.message}")
+            st.session_state.synthetic_data_df = None
+
     # Display generated data
     if 'synthetic_data_df' in st.session_state and st.session_state.synthetic_data_df is not None:
         st.divider()
@@ -0,0 +1,69 @@
+import pandas as pd
+import streamlit as st
+from src.services import gcp_doc_ai
+from src.utils import job_runner
+
+# st.fragment is still experimental in the pinned Streamlit release.
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@_fragment(run_every=1.0)
+def _job_status(job_id: str, label: str):
+    job = job_runner.get_runner().get(job_id)
+    if job is None or job.done:
+        # Rerun the whole page so the caller can consume the result.
+        st.rerun()
+    status = job.message or ("Waiting for a free worker..." if job.status == job_runner.QUEUED else "Working...")
+    st.progress(job.progress, text=f"{label}: {status} ({job.elapsed:.0f}s)")
+    # Rows the job has published so far (see job_runner.report_partial).
+    partial = list(job.partial)
+    if partial:
+        st.caption(f"{len(partial)} rows received so far")
+        st.dataframe(pd.DataFrame(partial), use_container_width=True, hide_index=True)
+
+def prefetch_extraction(state_key: str, uploaded_file) -> None:
+    """
+    Starts Document AI extraction of a newly uploaded file in the background,
+    once per upload, so the later analysis only waits for the LLM step.
+    """
+    if uploaded_file is None or st.session_state.get(state_key) == uploaded_file.file_id:
+        return
+    st.session_state[state_key] = uploaded_file.file_id
+    gcp_doc_ai.prefetch_document(uploaded_file.getvalue(), uploaded_file.type)
+
+def start_job(state_key: str, fn, *args, kind: str, **kwargs) -> None:
+    """Submits a background job and remembers its ID in the session under `state_key`."""
+    try:
+        job = job_runner.get_runner().submit(fn, *args, kind=kind, **kwargs)
+        st.session_state[state_key] = job.id
+    except RuntimeError as e:
+        st.error(str(e))
+
+def track_job(state_key: str, label: str):
+    """
+    Polls the job whose ID is stored under `state_key`.
+
+    While the job runs, renders a self-refreshing progress bar and returns None.
+    Once it has finished, forgets the ID and returns the Job exactly once so
+    the page can store its result. The ID lives in session state, so a job
+    keeps running and is picked up again after navigating away and back.
+    """
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return None
+
+    job = job_runner.get_runner().get(job_id)
+    if job is None:
+        del st.session_state[state_key]
+        return None
+    if job.done:
+        del st.session_state[state_key]
+        return job
+
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        _job_status(job_id, label)
+    with col2:
+        if job.status == job_runner.QUEUED and st.button("Cancel", key=f"cancel_{state_key}", use_container_width=True):
+            job_runner.get_runner().cancel(job_id)
+            st.rerun()
+    return None
@@ -1,7 +1,16 @@
 import streamlit as st
 import os
-from src.modules.compliance_scanner import analyze_document_compliance
+from src.modules import workflows
+from src.modules.compliance_scanner import COMPLIANCE_STANDARDS
 from src.utils.report_generator import handle_report_display_and_download 
+from src.ui.job_ui import prefetch_extraction, start_job, track_job
+from src.utils.job_runner import SUCCEEDED, FAILED
+
+def _run_scan(file_name: str, file_content: bytes, mime_type: str, standard: str, expert_persona: str,
+              incremental: bool = False) -> dict:
+    """Background job: runs the shared scan workflow and keeps the file details the page displays."""
+    result = workflows.run_scan(file_name, file_content, mime_type, standard, expert_persona, incremental=incremental)
+    return {**result, "file_name": file_name, "file_size": len(file_content)}
 
 def show_scanner():
     # Professional header
@@ -39,23 +48,7 @@ def show_scanner():
 
     # Standards selection with enhanced UI
     st.subheader("Compliance Standards")
-    standards = {
-        "India (DPDPA/CDSCO)": {
-            "description": "Indian Digital Personal Data Protection Act (DPDPA) and CDSCO telemedicine guidelines",
-            "expert_persona": "An expert on the Indian Digital Personal Data Protection Act (DPDPA) and CDSCO telemedicine guidelines.",
-            "color": "#059669"
-        },
-        "USA (HIPAA/FDA)": {
-            "description": "US Health Insurance Portability and Accountability Act (HIPAA) and FDA SaMD guidelines",
-            "expert_persona": "An expert on the US Health Insurance Portability and Accountability Act (HIPAA) and FDA guidelines for software as a medical device (SaMD).",
-            "color": "#dc2626"
-        },
-        "EU (GDPR/MDR)": {
-            "description": "EU General Data Protection Regulation (GDPR) and Medical Device Regulation (MDR)",
-            "expert_persona": "An expert on the EU General Data Protection Regulation (GDPR) and Medical Device Regulation (MDR).",
-            "color": "#7c3aed"
-        }
-    }
+    standards = COMPLIANCE_STANDARDS
     
     # Create tabs for standards selection
     tab1, tab2, tab3 = st.tabs(["🇮🇳 India (DPDPA)", "🇺🇸 USA (HIPAA/FDA)", "🇪🇺 EU (GDPR/MDR)"])
@@ -123,37 +116,51 @@ def show_scanner():
             help="Upload your requirements document for compliance analysis"
         )
 
+    # Text extraction starts now, while the user picks a standard and options.
+    prefetch_extraction("scanner_prefetched_file", uploaded_file)
+
     # Analysis section
     if uploaded_file is not None:
         st.success(f"✅ File '{uploaded_file.name}' uploaded successfully ({uploaded_file.size:,} bytes)")
         
+        incremental = st.toggle(
+            "Re-audit changed sections only",
+            value=False,
+            help="Reuse findings for sections that are unchanged since a previous scan against the same standard."
+        )
         col1, col2 = st.columns([1, 2])
         with col1:
-            if st.button("🔍 Analyze Document", type="primary", use_container_width=True):
-                with st.spinner("Executing compliance analysis... This may take a few moments."):
-                    try:
-                        file_content = uploaded_file.getvalue()
-                        mime_type = uploaded_file.type
-                        
-                        # Get the selected standard
-                        selected_standard = st.session_state.selected_standard
-                        expert_persona = standards[selected_standard]['expert_persona']
-                        
-                        report = analyze_document_compliance(file_content, mime_type, expert_persona)
-                        
-                        # Store report and filename for reuse
-                        st.session_state.scanner_report = report
-                        st.session_state.scanner_filename = f"Compliance_Report_{uploaded_file.name.split('.')[0]}"
-                        st.session_state.scanner_standard = selected_standard
-                        
-                        st.success("Analysis completed successfully!")
-                        
-                    except Exception as e:
-                        st.error(f"Analysis failed: {str(e)}")
-                        st.session_state.scanner_report = None
+            scan_running = bool(st.session_state.get("scanner_job_id"))
+            if st.button("🔍 Analyze Document", type="primary", use_container_width=True, disabled=scan_running):
+                # Get the selected standard
+                selected_standard = st.session_state.selected_standard
+                start_job(
+                    "scanner_job_id", _run_scan,
+                    uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type,
+                    selected_standard, standards[selected_standard]['expert_persona'], incremental,
+                    kind="compliance_scan",
+                )
+                st.session_state.scanner_report = None
         
         with col2:
             st.info(f"**Selected Standard:** {st.session_state.selected_standard}")
+
+    # The scan runs in the background; poll it and collect the result when done.
+    job = track_job("scanner_job_id", "Executing compliance analysis")
+    if job is not None:
+        if job.status == SUCCEEDED:
+            result = job.result
+            # Store report and filename for reuse
+            st.session_state.scanner_report = result["report"]
+            st.session_state.scanner_filename = f"Compliance_Report_{result['file_name'].split('.')[0]}"
+            st.session_state.scanner_standard = result["standard"]
+            st.session_state.scanner_file_size = result["file_size"]
+            if result.get("history_error"):
+                st.warning(f"Report generated but could not be saved to scan history: {result['history_error']}")
+            st.success("Analysis completed successfully!")
+        elif job.status == FAILED:
+            st.error(f"Analysis failed: {job.message}")
+            st.session_state.scanner_report = None
     
     # Display and Download Section
     if 'scanner_report' in st.session_state and st.session_state.scanner_report:
@@ -165,7 +172,8 @@ def show_scanner():
         with col1:
             st.metric("Standard Analyzed", st.session_state.get('scanner_standard', 'Unknown'))
         with col2:
-            st.metric("Document Size", f"{uploaded_file.size:,} bytes" if uploaded_file else "Unknown")
+            file_size = st.session_state.get('scanner_file_size')
+            st.metric("Document Size", f"{file_size:,} bytes" if file_size else "Unknown")
         with col3:
             st.metric("Analysis Status", "Completed")
         
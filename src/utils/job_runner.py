@@ -0,0 +1,153 @@
+"""
+Process-wide background job runner for long AI pipelines.
+
+Jobs run on a bounded thread pool shared by every Streamlit session, so a
+rerun, a page switch or a closed tab does not discard work in progress.
+Sessions keep only the job ID and poll for status, progress and the result.
+"""
+
+import time
+import uuid
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+
+_current = threading.local()
+
+@dataclass
+class Job:
+    """Status, progress and result handle of one background job."""
+    id: str
+    kind: str
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Items published while the job runs, e.g. rows of a streamed table.
+    partial: list = field(default_factory=list, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    @property
+    def result(self) -> Any:
+        """The job's return value, or raises its exception. Blocks until the job finishes."""
+        return self.future.result()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self.future.exception() if self.status == FAILED else None
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+def report_progress(fraction: float, message: str = None) -> None:
+    """
+    Updates the progress of the job running on the calling thread.
+    Does nothing when called outside a job, so pipeline code can call it freely.
+    """
+    job = current_job()
+    if job is not None:
+        job.progress = min(max(fraction, 0.0), 1.0)
+        if message is not None:
+            job.message = message
+
+def current_job() -> Optional[Job]:
+    """Returns the job running on the calling thread, or None outside a job."""
+    return getattr(_current, "job", None)
+
+def report_partial(items: list, job: Job = None) -> None:
+    """
+    Publishes partial results of the job running on the calling thread (or of
+    `job`, for worker threads the job started) so the UI can show them early.
+    """
+    job = job or current_job()
+    if job is not None:
+        job.partial.extend(items)
+
+class JobRunner:
+    """Runs callables on a bounded pool and tracks them by job ID."""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, retention: float = 3600.0):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, kind: str = "job", **kwargs) -> Job:
+        """
+        Schedules `fn(*args, **kwargs)` and returns its Job immediately.
+
+        Raises:
+            RuntimeError: If too many jobs are already waiting for a worker.
+        """
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if pending >= self.max_pending:
+                raise RuntimeError("Error: Too many jobs are waiting. Please try again shortly.")
+            job = Job(id=uuid.uuid4().hex, kind=kind)
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, kind: str = None) -> list[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a job that has not started yet."""
+        job = self.get(job_id)
+        if job and job.future.cancel():
+            job.status, job.finished_at = CANCELLED, time.time()
+            return True
+        return False
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        job.status, job.started_at = RUNNING, time.time()
+        _current.job = job
+        try:
+            result = fn(*args, **kwargs)
+            job.status, job.progress = SUCCEEDED, 1.0
+            return result
+        except BaseException as e:
+            job.status, job.message = FAILED, str(e)
+            print(f"[ERROR] Background job {job.id} ({job.kind}) failed: {e}")
+            raise
+        finally:
+            job.finished_at = time.time()
+            _current.job = None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner() -> JobRunner:
+    """Returns the process-wide job runner shared by all sessions."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -0,0 +1,115 @@
+"""
+Incremental parsing of JSON arrays of objects as they stream from an LLM.
+
+The parser tracks brace depth (ignoring braces inside strings) and decodes
+each top-level object as soon as it closes. Anything between objects, such
+as the array brackets, commas, markdown fences or stray prose, is skipped.
+An object that fails to decode is recorded and skipped instead of failing
+the whole response.
+"""
+
+import json
+from typing import Iterable, Iterator
+
+TRUNCATED_ERROR = "truncated object at end of response"
+
+class JsonArrayStream:
+    """Feed text chunks in; get complete JSON objects out."""
+
+    def __init__(self):
+        self.objects = 0
+        self.errors: list[dict] = []
+        # Set by close(): the response ended inside an object or before the array closed.
+        self.truncated = False
+        self._opened = self._closed = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consumes the next chunk and returns the objects it completed, in order."""
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode(buffer[self._start:i + 1])
+                    if obj is not None:
+                        completed.append(obj)
+                    self._start = None
+            elif self._depth == 0 and char == "[":
+                self._opened = True
+            elif self._depth == 0 and char == "]" and self._opened:
+                self._closed = True
+
+        # Drop consumed text so long streams do not keep growing the buffer.
+        keep_from = self._start if self._start is not None else len(buffer)
+        self._buffer = buffer[keep_from:]
+        self._pos = len(self._buffer)
+        if self._start is not None:
+            self._start = 0
+        return completed
+
+    def close(self) -> str:
+        """
+        Ends the stream. An object still open at this point is recorded as
+        truncated and its text is returned (empty string if none), so callers
+        can try to repair or continue it. `truncated` is also set when the
+        array was opened but never closed, e.g. output cut off after a comma.
+        """
+        remainder = self._buffer if self._start is not None else ""
+        if remainder.strip():
+            self.errors.append({"error": TRUNCATED_ERROR, "text": remainder})
+        self.truncated = bool(remainder.strip()) or (self._opened and not self._closed)
+        self._buffer, self._pos, self._start, self._depth = "", 0, None, 0
+        self._in_string = self._escape = self._opened = self._closed = False
+        return remainder
+
+    def _decode(self, text: str) -> dict | None:
+        try:
+            # strict=False tolerates raw control characters such as newlines inside strings.
+            obj = json.loads(text, strict=False)
+        except json.JSONDecodeError as e:
+            self.errors.append({"error": str(e), "text": text})
+            return None
+        self.objects += 1
+        return obj
+
+def iter_json_objects(chunks: Iterable[str], parser: JsonArrayStream = None) -> Iterator[dict]:
+    """Yields each object from a stream of text chunks as soon as it is complete."""
+    parser = parser or JsonArrayStream()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+def parse_json_array(text: str) -> tuple[list[dict], list[dict]]:
+    """
+    Parses a complete response with the streaming parser.
+
+    Returns:
+        tuple[list[dict], list[dict]]: (Decoded objects, errors for skipped objects).
+    """
+    parser = JsonArrayStream()
+    objects = parser.feed(text)
+    parser.close()
+    return objects, parser.errors
@@ -40,13 +40,13 @@ def _generate_report_pdf(report_markdown: str, title: str) -> bytes:
         if "Risk" in tag: pdf.set_text_color(220, 53, 69) # Red
         elif "Warning" in tag: pdf.set_text_color(255, 193, 7) # Yellow/Amber
         elif "Pass" in tag: pdf.set_text_color(25, 135, 84) # Green
-        pdf.multi_cell(0, 7, f"{tag}\n{content.splitlines()[0]}")
+        pdf.multi_cell(0, 7, f"{tag}\n{(content.splitlines() or [''])[0]}", new_x="LMARGIN", new_y="NEXT")
         pdf.set_text_color(0, 0, 0)
         pdf.set_font('Helvetica', '', 11)
-        pdf.multi_cell(0, 7, "\n".join(content.splitlines()[1:]).strip())
+        pdf.multi_cell(0, 7, "\n".join(content.splitlines()[1:]).strip(), new_x="LMARGIN", new_y="NEXT")
         pdf.ln(5)
 
-    return pdf.output(dest='S').encode('latin-1')
+    return bytes(pdf.output())
 
 def _generate_report_docx(report_markdown: str, title: str) -> bytes:
     """Generates a DOCX document from a markdown report."""
@@ -74,6 +74,26 @@ def _generate_report_json(report_markdown: str) -> bytes:
         
     return json.dumps(findings_list, indent=4).encode('utf-8')
 
+REPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "json": "application/json",
+    "md": "text/markdown",
+    "txt": "text/plain",
+}
+
+def render_report(report_markdown: str, fmt: str, title: str = "Compliance Report") -> bytes:
+    """Renders a markdown compliance report to one of REPORT_FORMATS, for use outside the UI."""
+    if fmt == "pdf":
+        return _generate_report_pdf(report_markdown, title)
+    if fmt == "docx":
+        return _generate_report_docx(report_markdown, title)
+    if fmt == "json":
+        return _generate_report_json(report_markdown)
+    if fmt in ("md", "txt"):
+        return report_markdown.encode('utf-8')
+    raise ValueError(f"Unsupported report format '{fmt}'. Choose one of: {', '.join(REPORT_FORMATS)}")
+
 # --- Main UI Function ---
 def handle_report_display_and_download(report_markdown: str, base_filename: str):
     """
@@ -0,0 +1,155 @@
+"""
+Similarity cache for short natural-language questions.
+
+Queries are normalised (case, punctuation, contractions, filler words such as
+"explain" or "basics"), turned into hashed TF-IDF vectors of words and
+character trigrams, and compared by cosine similarity against a NumPy matrix
+of cached queries. A hit above the threshold returns the cached answer, so
+paraphrases of a common question are answered without a model call.
+"""
+
+import re
+import zlib
+import threading
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+_CONTRACTIONS = {
+    "what's": "what is", "whats": "what is", "how's": "how is", "it's": "it is", "isn't": "is not",
+    "doesn't": "does not", "don't": "do not", "can't": "cannot", "won't": "will not", "i'm": "i am",
+}
+_CONTRACTION = re.compile(r"\b(" + "|".join(map(re.escape, _CONTRACTIONS)) + r")\b")
+
+# Words that do not change what is being asked. Negations are deliberately kept.
+_STOPWORDS = frozenset("""
+a an the is are was were be been of to in on for and or with by as at it its this that these those
+what which who whom how why when where do does did can could would should shall will may might must
+i me my we our you your please tell explain explained describe define definition meaning mean means
+basic basics overview intro introduction summary summarize about give quick brief briefly simple
+""".split())
+
+@dataclass
+class CacheHit:
+    answer: str
+    score: float
+    matched_query: str
+
+def normalize(text: str) -> str:
+    """Lower-cases, expands contractions and strips punctuation."""
+    text = _CONTRACTION.sub(lambda m: _CONTRACTIONS[m.group(1)], text.lower().replace("’", "'"))
+    text = re.sub(r"'s\b", "", text)
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def _terms(normalized: str) -> list[str]:
+    terms = []
+    for token in normalized.split():
+        if token in _STOPWORDS:
+            continue
+        # Crude plural folding: "requirements" and "requirement" share a term.
+        if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+class SemanticCache:
+    """Thread-safe LRU cache of answers, looked up by question similarity."""
+
+    # Character trigrams catch typos and inflections; words carry most of the weight.
+    TRIGRAM_WEIGHT = 0.3
+
+    def __init__(self, threshold: float = 0.85, maxsize: int = 512, dim: int = 2048):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.dim = dim
+        self.version: Optional[str] = None
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._tf = np.zeros((self.maxsize, self.dim), dtype=np.float32)
+        self._doc_freq = np.zeros(self.dim, dtype=np.float32)
+        self._queries: list[Optional[str]] = [None] * self.maxsize
+        self._answers: list[Optional[str]] = [None] * self.maxsize
+        self._last_used = np.zeros(self.maxsize, dtype=np.int64)
+        self._by_text: dict[str, int] = {}
+        self._clock = 0
+
+    def vectorize(self, query: str) -> Optional[np.ndarray]:
+        """The hashed term-frequency vector of a query, or None if it has no meaningful terms."""
+        terms = _terms(normalize(query))
+        if not terms:
+            return None
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in terms:
+            vector[zlib.crc32(b"w:" + term.encode()) % self.dim] += 1.0
+            padded = f"#{term}#"
+            for i in range(len(padded) - 2):
+                vector[zlib.crc32(b"c:" + padded[i:i + 3].encode()) % self.dim] += self.TRIGRAM_WEIGHT
+        return vector
+
+    def ensure_version(self, version: str) -> None:
+        """Drops every entry when `version` (e.g. a hash of the prompt template) changes."""
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+
+    def lookup(self, query: str) -> Optional[CacheHit]:
+        """The cached answer for the most similar earlier query, if similar enough."""
+        vector = self.vectorize(query)
+        with self._lock:
+            used = [i for i, q in enumerate(self._queries) if q is not None]
+            if vector is None or not used:
+                self.misses += 1
+                return None
+            row = self._by_text.get(normalize(query))
+            if row is not None:
+                score = 1.0
+            else:
+                idf = self._idf()
+                weighted = self._tf[used] * idf
+                query_weighted = vector * idf
+                norms = np.linalg.norm(weighted, axis=1) * np.linalg.norm(query_weighted)
+                scores = (weighted @ query_weighted) / np.maximum(norms, 1e-9)
+                best = int(np.argmax(scores))
+                row, score = used[best], float(scores[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._clock += 1
+            self._last_used[row] = self._clock
+            return CacheHit(self._answers[row], score, self._queries[row])
+
+    def store(self, query: str, answer: str) -> None:
+        """Caches an answer, evicting the least recently used entry when full."""
+        vector = self.vectorize(query)
+        if vector is None:
+            return
+        key = normalize(query)
+        with self._lock:
+            row = self._by_text.get(key)
+            if row is None:
+                free = [i for i, q in enumerate(self._queries) if q is None]
+                row = free[0] if free else int(np.argmin(self._last_used))
+                if self._queries[row] is not None:
+                    self._doc_freq -= self._tf[row] > 0
+                    del self._by_text[normalize(self._queries[row])]
+            else:
+                self._doc_freq -= self._tf[row] > 0
+            self._tf[row] = vector
+            self._doc_freq += vector > 0
+            self._queries[row], self._answers[row] = query, answer
+            self._by_text[key] = row
+            self._clock += 1
+            self._last_used[row] = self._clock
+
+    def _idf(self) -> np.ndarray:
+        count = sum(q is not None for q in self._queries)
+        return np.log((1.0 + count) / (1.0 + self._doc_freq)) + 1.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_text)
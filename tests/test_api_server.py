@@ -0,0 +1,158 @@
+"""
+Automated tests for the HTTP API.
+"""
+
+import pytest
+import json
+import threading
+import time
+import base64
+import sys
+import os
+from unittest.mock import patch
+from tornado.testing import AsyncHTTPTestCase
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.api import server
+from src.utils import job_runner
+
+DOC = {"file_name": "srs.pdf", "mime_type": "application/pdf", "content_b64": base64.b64encode(b"%PDF").decode()}
+
+class TestApiServer(AsyncHTTPTestCase):
+    """Test cases for submit-and-poll endpoints, streaming and request validation."""
+
+    def get_app(self):
+        return server.make_app()
+
+    def setUp(self):
+        super().setUp()
+        runner = job_runner.JobRunner(max_workers=2)
+        patcher = patch('src.api.server.job_runner.get_runner', return_value=runner)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(runner.shutdown)
+
+    def post_json(self, path, body):
+        return self.fetch(path, method="POST", body=json.dumps(body))
+
+    def wait_for_job(self, job_id):
+        for _ in range(100):
+            data = json.loads(self.fetch(f"/api/v1/jobs/{job_id}").body)
+            if data["status"] in (job_runner.SUCCEEDED, job_runner.FAILED):
+                return data
+            time.sleep(0.02)
+        raise AssertionError("job did not finish")
+
+    def test_health_and_standards(self):
+        """Health and standards endpoints answer synchronously."""
+        assert json.loads(self.fetch("/healthz").body) == {"status": "ok"}
+        names = [s["name"] for s in json.loads(self.fetch("/api/v1/standards").body)["standards"]]
+        assert "EU (GDPR/MDR)" in names
+
+    @patch('src.modules.workflows.scan_history.record_scan', return_value=(True, "scan-1"))
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_scan_submit_and_poll(self, mock_analyze, mock_record):
+        """A scan returns 202 with a job ID and its report once finished."""
+        mock_analyze.return_value = "[Warning - Medium] Vague retention period"
+
+        response = self.post_json("/api/v1/scans", {**DOC, "standard": "EU (GDPR/MDR)"})
+        assert response.code == 202
+        job = json.loads(response.body)
+        assert response.headers["Location"] == job["status_url"]
+
+        data = self.wait_for_job(job["id"])
+        assert data["status"] == job_runner.SUCCEEDED
+        assert data["result"]["max_severity"] == "Medium"
+        assert data["result"]["scan_id"] == "scan-1"
+        mock_analyze.assert_called_once()
+        assert mock_analyze.call_args[0][:2] == (b"%PDF", "application/pdf")
+
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_scan_error_marks_job_failed(self, mock_analyze):
+        """Service error strings are reported as failed jobs."""
+        mock_analyze.return_value = "Error: Document AI unavailable"
+        job = json.loads(self.post_json("/api/v1/scans", {**DOC, "standard": "USA (HIPAA/FDA)"}).body)
+
+        data = self.wait_for_job(job["id"])
+        assert data["status"] == job_runner.FAILED
+        assert "Document AI unavailable" in data["error"]
+
+    @patch('src.modules.workflows.metrics.increment')
+    @patch('src.modules.workflows.synthetic_data_hub.generate_synthetic_data')
+    def test_stream_emits_rows_then_done(self, mock_generate, mock_increment):
+        """The stream endpoint sends one line per result row and a final done line."""
+        import pandas as pd
+        mock_generate.return_value = ("[]", pd.DataFrame([{"name": "A"}, {"name": "B"}]))
+        job = json.loads(self.post_json("/api/v1/synthetic-data", {"prompt": "two people"}).body)
+
+        lines = [json.loads(line) for line in self.fetch(f"/api/v1/jobs/{job['id']}/stream").body.splitlines()]
+        rows = [line["row"] for line in lines if line["event"] == "row"]
+        assert rows == [{"name": "A"}, {"name": "B"}]
+        assert lines[-1]["event"] == "done"
+        assert lines[-1]["status"] == job_runner.SUCCEEDED
+
+    @patch('src.modules.workflows.metrics.increment')
+    @patch('src.modules.workflows.synthetic_data_hub.generate_synthetic_data')
+    def test_stream_emits_partial_rows_while_running(self, mock_generate, mock_increment):
+        """Rows the job publishes before it finishes are streamed as partial lines."""
+        import pandas as pd
+        release = threading.Event()
+
+        def generate(prompt, stream=False):
+            job_runner.report_partial([{"name": "A"}])
+            release.wait(timeout=5)
+            return "[]", pd.DataFrame([{"name": "A"}])
+
+        mock_generate.side_effect = generate
+        job = json.loads(self.post_json("/api/v1/synthetic-data", {"prompt": "one person"}).body)
+        threading.Timer(0.3, release.set).start()
+
+        lines = [json.loads(line) for line in self.fetch(f"/api/v1/jobs/{job['id']}/stream").body.splitlines()]
+        events = [line["event"] for line in lines]
+        assert events.index("partial") < events.index("row")
+        assert [line["row"] for line in lines if line["event"] == "partial"] == [{"name": "A"}]
+
+    def test_validation_errors(self):
+        """Bad requests are rejected with JSON errors."""
+        assert self.post_json("/api/v1/scans", {**DOC, "standard": "SOX"}).code == 400
+        assert self.post_json("/api/v1/test-cases", {"mime_type": "application/pdf"}).code == 400
+        assert self.post_json("/api/v1/synthetic-data", {"prompt": " "}).code == 400
+        assert self.post_json("/api/v1/synthetic-data", {"prompt": ["two", "people"]}).code == 400
+        assert self.post_json("/api/v1/scans", {**DOC, "standard": ["SOX"]}).code == 400
+        response = self.fetch("/api/v1/test-cases", method="POST", body="not json")
+        assert response.code == 400
+        assert "error" in json.loads(response.body)
+        assert self.fetch("/api/v1/jobs/" + "0" * 32).code == 404
+
+    def test_document_fields_must_be_strings(self):
+        """Non-string document fields are rejected with 400 before anything is decoded or submitted."""
+        for bad in ({"content_b64": 12345}, {"content_b64": ["aGk="]}, {"mime_type": ["x"]}, {"file_name": {"a": 1}}):
+            with patch('src.api.server.job_runner.get_runner') as mock_runner:
+                response = self.post_json("/api/v1/scans", {**DOC, **bad, "standard": "EU (GDPR/MDR)"})
+            assert response.code == 400
+            mock_runner.assert_not_called()
+
+    def test_document_size_limit(self):
+        """Documents above the size limit are rejected."""
+        with patch('src.api.server.MAX_DOCUMENT_BYTES', 2):
+            assert self.post_json("/api/v1/test-cases", DOC).code == 413
+
+    def test_api_key_required_when_configured(self):
+        """With API_KEY set, requests need a matching bearer token."""
+        with patch.dict(os.environ, {"API_KEY": "secret"}):
+            assert self.fetch("/api/v1/standards").code == 401
+            ok = self.fetch("/api/v1/standards", headers={"Authorization": "Bearer secret"})
+            assert ok.code == 200
+            assert self.fetch("/healthz").code == 200
+
+    def test_render_report(self):
+        """Reports render to the requested format with its content type."""
+        response = self.post_json("/api/v1/reports/render", {"report": "[Pass] Encrypted", "format": "pdf"})
+        assert response.code == 200
+        assert response.headers["Content-Type"] == "application/pdf"
+        assert response.body.startswith(b"%PDF")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
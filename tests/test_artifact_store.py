@@ -0,0 +1,135 @@
+"""
+Automated tests for chunked artifact storage.
+"""
+
+import pytest
+import itertools
+from unittest.mock import patch
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import artifact_store
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeDocument:
+    def __init__(self, store, collection, doc_id):
+        self.store, self.collection, self.id = store, collection, doc_id
+
+    def get(self):
+        return FakeSnapshot(self.id, self.store.docs.get((self.collection, self.id)))
+
+class FakeCollection:
+    def __init__(self, store, name):
+        self.store, self.name = store, name
+
+    def document(self, doc_id=None):
+        return FakeDocument(self.store, self.name, doc_id or f"doc-{next(self.store.ids)}")
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store, self.writes = store, []
+
+    def set(self, ref, data):
+        self.writes.append((ref, data))
+
+    def commit(self):
+        for ref, data in self.writes:
+            self.store.docs[(ref.collection, ref.id)] = data
+            self.store.writes += 1
+
+class FakeFirestore:
+    """In-memory stand-in for the Firestore client surface used by the artifact store."""
+
+    def __init__(self):
+        self.docs, self.writes, self.ids = {}, 0, itertools.count(1)
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in reversed(list(refs))]
+
+class TestArtifactStore:
+    """Test cases for compressed, chunked artifact storage."""
+
+    def test_round_trip_large_text(self):
+        """A payload larger than one chunk is stored and reassembled intact."""
+        client = FakeFirestore()
+        report = "[Risk - High] Missing encryption at rest.\n" * 60000
+
+        with patch.object(artifact_store, "CHUNK_SIZE", 256 * 1024):
+            ok, artifact_id = artifact_store.save_artifact("report", report, client=client)
+            assert ok
+            manifest = artifact_store.get_manifest(artifact_id, client)
+            assert len(manifest["chunks"]) > 1
+
+            ok, loaded = artifact_store.load_artifact(artifact_id, client)
+        assert ok
+        assert loaded == report
+
+    def test_chunks_are_compressed(self):
+        """Stored chunk documents are smaller than the raw payload."""
+        client = FakeFirestore()
+        payload = b"patient_id,name,age\n" * 10000
+
+        ok, artifact_id = artifact_store.save_artifact("dataset", payload, codec="gzip", client=client)
+        stored = sum(len(doc["data"]) for (coll, _), doc in client.docs.items()
+                     if coll == artifact_store.CHUNK_COLLECTION)
+        assert ok
+        assert stored < len(payload) / 10
+
+    def test_identical_chunks_are_deduplicated(self):
+        """Saving the same content twice only uploads its chunks once."""
+        client = FakeFirestore()
+        suite = [{"id": f"TC{i:04d}", "description": "Login works"} for i in range(2000)]
+
+        artifact_store.save_artifact("suite-v1", suite, codec="gzip", client=client)
+        writes_after_first = client.writes
+        ok, second_id = artifact_store.save_artifact("suite-v2", suite, codec="gzip", client=client)
+
+        assert ok
+        assert client.writes == writes_after_first + 1  # Only the new manifest.
+        assert artifact_store.load_artifact(second_id, client) == (True, suite)
+
+    def test_stream_yields_chunks_in_order(self):
+        """Streaming reassembly yields chunks in manifest order."""
+        client = FakeFirestore()
+        payload = bytes(range(256)) * 40
+
+        with patch.object(artifact_store, "CHUNK_SIZE", 1000), \
+             patch.object(artifact_store, "READ_WINDOW", 3):
+            _, artifact_id = artifact_store.save_artifact("blob", payload, codec="gzip", client=client)
+            chunks = list(artifact_store.iter_artifact(artifact_id, client))
+
+        assert all(len(chunk) <= 1000 for chunk in chunks)
+        assert b"".join(chunks) == payload
+
+    def test_missing_artifact(self):
+        """Loading an unknown artifact reports an error."""
+        ok, message = artifact_store.load_artifact("missing", FakeFirestore())
+        assert not ok
+        assert "not found" in message
+
+    def test_uninitialized_client(self):
+        """Saving without a Firestore client fails cleanly."""
+        with patch.object(artifact_store.gcp_firestore, "db", None):
+            ok, message = artifact_store.save_artifact("report", "text")
+        assert not ok
+        assert "not initialized" in message
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,77 @@
+"""
+Automated tests for the headless batch scanner.
+"""
+
+import pytest
+import json
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import batch_scan
+
+@pytest.fixture
+def docs(tmp_path):
+    folder = tmp_path / "docs"
+    (folder / "nested").mkdir(parents=True)
+    (folder / "a.txt").write_text("REQ-1 Store patient data")
+    (folder / "nested" / "b.pdf").write_bytes(b"%PDF b")
+    (folder / "ignored.csv").write_text("x")
+    return folder
+
+class TestBatchScan:
+    """Test cases for document discovery, the scan pipeline and resuming."""
+
+    def test_resolve_standards(self):
+        """Fragments resolve to full standard names; ambiguous or unknown names are rejected."""
+        assert batch_scan.resolve_standards(["gdpr", "HIPAA", "gdpr"]) == ["EU (GDPR/MDR)", "USA (HIPAA/FDA)"]
+        assert len(batch_scan.resolve_standards(["all"])) == 3
+        with pytest.raises(ValueError):
+            batch_scan.resolve_standards(["SOX"])
+
+    def test_find_documents(self, docs):
+        """Directories are searched recursively for supported extensions."""
+        paths = batch_scan.find_documents([str(docs)])
+        assert [os.path.basename(p) for p in paths] == ["a.txt", "b.pdf"]
+
+    @patch('batch_scan.compliance_scanner.audit_extracted_text')
+    @patch('batch_scan.compliance_scanner.extract_document_text')
+    def test_run_extracts_once_and_resumes(self, mock_extract, mock_audit, docs, tmp_path):
+        """Each document is extracted once per run and completed tasks are skipped on the next run."""
+        mock_extract.return_value = "REQ-1 Store patient data"
+        mock_audit.return_value = "[Risk - High] No consent"
+        out = tmp_path / "out"
+        paths = batch_scan.find_documents([str(docs)])
+        standards = ["EU (GDPR/MDR)", "USA (HIPAA/FDA)"]
+
+        scanner = batch_scan.BatchScanner(str(out), standards, ["md"], record_history=False)
+        totals = scanner.run(paths, workers=2)
+
+        assert totals == {"succeeded": 4, "failed": 0, "skipped_documents": 0}
+        assert mock_extract.call_count == 2
+        assert mock_audit.call_count == 4
+        results = [json.loads(line) for line in (out / "results.jsonl").read_text().splitlines()]
+        assert {r["max_severity"] for r in results} == {"High"}
+        assert all(os.path.exists(p) for r in results for p in r["outputs"])
+
+        rerun = batch_scan.BatchScanner(str(out), standards, ["md"], record_history=False)
+        assert rerun.run(paths) == {"succeeded": 0, "failed": 0, "skipped_documents": 2}
+        assert mock_extract.call_count == 2
+
+    @patch('batch_scan.compliance_scanner.audit_extracted_text')
+    @patch('batch_scan.compliance_scanner.extract_document_text')
+    def test_failed_tasks_are_retried_next_run(self, mock_extract, mock_audit, docs, tmp_path):
+        """Failures are reported but not recorded in the manifest."""
+        mock_extract.return_value = "Error: Document AI unavailable"
+        paths = batch_scan.find_documents([str(docs / "a.txt")])
+
+        scanner = batch_scan.BatchScanner(str(tmp_path / "out"), ["EU (GDPR/MDR)"], ["md"], record_history=False)
+        assert scanner.run(paths)["failed"] == 1
+        mock_audit.assert_not_called()
+        assert scanner.pending_tasks(batch_scan.content_hash(b"REQ-1 Store patient data")) == ["scan:EU (GDPR/MDR)"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,159 @@
+"""
+Automated tests for cached prompt prefixes.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import ai_copilot, compliance_scanner
+from src.services import gcp_vertex_ai
+from src.services.context_cache import ContextCache, LocalContextCacheBackend
+from src.services.model_router import Target
+
+TARGET = Target("gemini-test", "us-central1")
+PREFIX = "You are an auditor. " * 10
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache(clock):
+    return ContextCache(LocalContextCacheBackend(), ttl=3600, refresh_margin=300, min_tokens=0, clock=clock)
+
+class TestContextCache:
+    """Test cases for creating, refreshing and falling back from cached prefixes."""
+
+    def test_created_once_per_prefix_and_target(self, cache):
+        """Repeated lookups reuse the handle; another target gets its own."""
+        handle = cache.lookup(PREFIX, TARGET)
+        assert cache.lookup(PREFIX, TARGET) == handle
+        assert cache.lookup(PREFIX, Target("gemini-test", "europe-west4")) != handle
+        assert cache.backend.created == 2
+
+    def test_refreshed_before_expiry(self, cache, clock):
+        """Inside the refresh margin the TTL is extended and the handle kept."""
+        handle = cache.lookup(PREFIX, TARGET)
+        clock.now = 3400
+        assert cache.lookup(PREFIX, TARGET) == handle
+        assert cache.backend.refreshed == 1
+        clock.now = 6000
+        assert cache.lookup(PREFIX, TARGET) == handle
+        assert cache.backend.created == 1
+
+    def test_expired_handle_is_recreated(self, cache, clock):
+        """A handle past its TTL is not refreshed but replaced."""
+        handle = cache.lookup(PREFIX, TARGET)
+        clock.now = 4000
+        assert cache.lookup(PREFIX, TARGET) != handle
+        assert cache.backend.created == 2
+        # The replaced handle is deleted rather than left to linger.
+        assert handle not in cache.backend.prefixes
+
+    def test_invalidating_an_old_handle_keeps_its_replacement(self, cache):
+        """A late failure on a replaced handle does not drop the new one."""
+        old = cache.lookup(PREFIX, TARGET)
+        cache.invalidate(PREFIX, TARGET, old)
+        new = cache.lookup(PREFIX, TARGET)
+        cache.invalidate(PREFIX, TARGET, old)
+        assert cache.lookup(PREFIX, TARGET) == new
+
+    def test_short_prefix_is_sent_inline(self, clock):
+        """Prefixes below the service minimum are not cached."""
+        cache = ContextCache(LocalContextCacheBackend(), min_tokens=4096, clock=clock)
+        assert cache.lookup(PREFIX, TARGET) is None
+        assert cache.backend.created == 0
+
+    def test_backend_error_falls_back_to_inline(self, cache):
+        """A failed create means the caller sends the prefix inline."""
+        with patch.object(cache.backend, "create", side_effect=RuntimeError("quota")):
+            assert cache.lookup(PREFIX, TARGET) is None
+
+class TestPrefixedGeneration:
+    """Test cases for sending cached prefixes through generate_text."""
+
+    def test_cached_prefix_is_reused_across_requests(self, cache):
+        """The prefix is cached once and each request adds only its own text."""
+        model = MagicMock()
+        model.generate_content.return_value.text = "ok"
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+             patch('src.services.gcp_vertex_ai.context_cache', cache):
+            gcp_vertex_ai.generate_text("first document", prefix=PREFIX)
+            gcp_vertex_ai.generate_text("second document", prefix=PREFIX)
+
+        assert cache.backend.created == 1
+        # The local stand-in sends the prefix inline, so the model sees the same prompt as without a cache.
+        assert model.generate_content.call_args[0][0] == PREFIX + "second document"
+
+    def test_no_backend_sends_prefix_inline(self):
+        """Without cache support the prefix is prepended to the prompt."""
+        model = MagicMock()
+        model.generate_content.return_value.text = "ok"
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai.context_cache', ContextCache(None)):
+            gcp_vertex_ai.generate_text("document", prefix=PREFIX)
+        assert model.generate_content.call_args[0][0] == PREFIX + "document"
+
+    def test_failed_cached_call_drops_the_handle(self, cache):
+        """A request that fails with a cached handle forgets it, so the next one recreates it."""
+        model = MagicMock()
+        model.generate_content.side_effect = ValueError("cached content not found")
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+             patch('src.services.gcp_vertex_ai.context_cache', cache):
+            assert gcp_vertex_ai.generate_text("document", prefix=PREFIX).startswith("Error")
+            model.generate_content.side_effect = None
+            model.generate_content.return_value.text = "ok"
+            assert gcp_vertex_ai.generate_text("document", prefix=PREFIX) == "ok"
+        assert cache.backend.created == 2
+        assert cache.backend.deleted == 1
+
+    def test_other_failures_keep_the_handle(self, cache):
+        """Quota or timeout errors are not the cache's fault, so no new cache is created."""
+        model = MagicMock()
+        model.generate_content.side_effect = ValueError("400 prompt blocked by safety filters")
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+             patch('src.services.gcp_vertex_ai.context_cache', cache):
+            assert gcp_vertex_ai.generate_text("document", prefix=PREFIX).startswith("Error")
+            assert gcp_vertex_ai.generate_text("other document", prefix=PREFIX).startswith("Error")
+        assert cache.backend.created == 1
+        assert cache.backend.deleted == 0
+
+class TestStaticPrefixes:
+    """Test cases for the fixed prompt blocks sent as prefixes."""
+
+    def test_audit_prefix_is_shared_per_persona(self):
+        """Every audit for a persona uses the same prefix; the document goes in the prompt."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="[Pass] ok") as mock_vertex_ai:
+            compliance_scanner.audit_extracted_text("REQ-001: Users log in.", "A SOC 2 auditor")
+            compliance_scanner.audit_extracted_text("REQ-002: Data is exported.", "A SOC 2 auditor")
+
+        first, second = mock_vertex_ai.call_args_list
+        assert first.kwargs["prefix"] == second.kwargs["prefix"] == compliance_scanner.audit_instructions("A SOC 2 auditor")
+        assert "A SOC 2 auditor" not in first[0][0]
+        assert "REQ-002" in second[0][0]
+
+    def test_copilot_sends_system_prompt_as_prefix(self):
+        """The Co-Pilot's system instructions are the prefix, the question is the prompt."""
+        ai_copilot.answer_cache.ensure_version("reset")
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="An answer.") as mock_vertex_ai:
+            ai_copilot.answer_question("What does the minimum necessary standard require?")
+        assert mock_vertex_ai.call_args.kwargs["prefix"] == ai_copilot.COPILOT_SYSTEM_PROMPT
+        assert "SYSTEM INSTRUCTIONS" not in mock_vertex_ai.call_args[0][0]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,143 @@
+"""
+Automated tests for the Co-Pilot conversation memory.
+"""
+
+import pytest
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import ai_copilot
+from src.modules.conversation_memory import ConversationMemory, estimate_tokens
+from src.utils.job_runner import JobRunner
+
+def _summarize_as_list(summary: str, messages: list[dict]) -> str:
+    return ", ".join(filter(None, [summary] + [m["content"] for m in messages]))
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=1)
+    yield runner
+    runner.shutdown()
+
+class TestConversationMemory:
+    """Test cases for the context window, rolling summary and history cap."""
+
+    def test_recent_turns_fit_the_budget(self, runner):
+        """Once older turns are summarised, only the newest turns that fit the token budget are returned verbatim."""
+        memory = ConversationMemory(token_budget=3 * estimate_tokens("x" * 40) + estimate_tokens("s"),
+                                    summarize=lambda summary, messages: "s", runner=runner)
+        for i in range(6):
+            memory.add("user" if i % 2 == 0 else "assistant", f"{i}" * 40)
+        memory.context()
+        memory.wait(timeout=5)
+        summary, recent = memory.context()
+        assert summary == "s"
+        assert [m["content"][0] for m in recent] == ["3", "4", "5"]
+
+    def test_older_turns_are_summarized_in_background(self, runner):
+        """Turns leaving the window are folded into the summary without blocking, batch by batch."""
+        memory = ConversationMemory(token_budget=estimate_tokens("x" * 40), summarize=_summarize_as_list,
+                                    runner=runner)
+        memory.add("user", "a" * 40)
+        memory.add("assistant", "b" * 40)
+        memory.context()
+        memory.wait(timeout=5)
+        assert memory.summary == "a" * 40
+
+        memory.add("user", "c" * 40)
+        memory.context()
+        memory.wait(timeout=5)
+        # The previous summary is extended, not rebuilt from the whole history; it also
+        # takes its share of the budget, so the window shrinks.
+        assert memory.summary == ", ".join(["a" * 40, "b" * 40, "c" * 40])
+
+    def test_question_does_not_wait_for_summary(self, runner):
+        """context() returns at once while a summary update is still running."""
+        release = threading.Event()
+
+        def slow_summary(summary, messages):
+            release.wait(timeout=5)
+            return "done"
+
+        memory = ConversationMemory(token_budget=estimate_tokens("x" * 40), summarize=slow_summary, runner=runner)
+        memory.add("user", "a" * 40)
+        memory.add("assistant", "b" * 40)
+        # The turn being summarised is still sent verbatim until its summary lands.
+        assert memory.context() == ("", [{"role": "user", "content": "a" * 40},
+                                         {"role": "assistant", "content": "b" * 40}])
+        release.set()
+        memory.wait(timeout=5)
+        assert memory.summary == "done"
+
+    def test_failed_summary_keeps_previous(self, runner):
+        """If summarisation fails, the old summary stays and the turns are retried later."""
+        memory = ConversationMemory(token_budget=estimate_tokens("x" * 40), summarize=lambda s, m: None,
+                                    runner=runner)
+        memory.add("user", "a" * 40)
+        memory.add("assistant", "b" * 40)
+        memory.context()
+        memory.wait(timeout=5)
+        assert memory.summary == "" and memory._summarized == 0
+        assert [m["content"][0] for m in memory.context()[1]] == ["a", "b"]
+
+    def test_unsummarized_turns_are_trimmed_from_the_oldest(self, runner):
+        """Turns waiting for a summary get their own budget; the oldest are left out first."""
+        memory = ConversationMemory(token_budget=2 * estimate_tokens("x" * 40), summarize=lambda s, m: None,
+                                    runner=runner)
+        for i in range(6):
+            memory.add("user", f"{i}" * 40)
+        assert [m["content"][0] for m in memory.context()[1]] == ["2", "3", "4", "5"]
+    def test_stored_history_is_capped(self, runner):
+        """The oldest messages are dropped beyond the cap once they are summarised."""
+        memory = ConversationMemory(token_budget=1, max_messages=4, summarize=_summarize_as_list, runner=runner)
+        for i in range(10):
+            memory.add("user", str(i))
+            memory.context()
+            memory.wait(timeout=5)
+        assert len(memory.messages) <= 4
+        assert memory.messages[-1]["content"] == "9"
+        assert memory.summary.startswith("0, 1, 2")
+
+    def test_unsummarized_turns_survive_the_cap(self, runner):
+        """Turns are not dropped before they are summarised, up to twice the cap."""
+        memory = ConversationMemory(max_messages=4, summarize=lambda s, m: None, runner=runner)
+        for i in range(6):
+            memory.add("user", str(i))
+        assert len(memory.messages) == 6
+        for i in range(6, 10):
+            memory.add("user", str(i))
+        assert [m["content"] for m in memory.messages] == [str(i) for i in range(2, 10)]
+
+class TestCopilotFollowUps:
+    """Test cases for sending conversation context with Co-Pilot questions."""
+
+    def test_follow_up_carries_previous_turns(self, runner):
+        """The second question is sent with the first question and answer, and bypasses the cache."""
+        memory = ConversationMemory(runner=runner)
+        ai_copilot.answer_cache.ensure_version("reset")
+        with patch('src.services.gcp_vertex_ai.generate_text',
+                   side_effect=["GDPR requires breach notice within 72 hours.", "HIPAA allows 60 days."]) as mock_vertex_ai:
+            ai_copilot.answer_question("How fast must a breach be reported under GDPR?", memory)
+            ai_copilot.answer_question("And under HIPAA?", memory)
+
+        first, second = (call[0][0] for call in mock_vertex_ai.call_args_list)
+        assert "CONVERSATION SO FAR" not in first
+        assert "Assistant: GDPR requires breach notice within 72 hours." in second
+        assert len(memory.messages) == 4
+        assert len(ai_copilot.answer_cache) == 1
+
+    def test_failed_answer_is_not_remembered(self, runner):
+        """An error response is not added to the conversation."""
+        memory = ConversationMemory(runner=runner)
+        ai_copilot.answer_cache.ensure_version("reset")
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded"):
+            ai_copilot.answer_question("What is GDPR?", memory)
+        assert memory.messages == []
+
+if __name__ == "__main__":
+    pytest.main([__file__])
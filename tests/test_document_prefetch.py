@@ -0,0 +1,95 @@
+"""
+Automated tests for speculative Document AI extraction on upload.
+"""
+
+import pytest
+import threading
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services import gcp_doc_ai
+from src.modules.compliance_scanner import analyze_document_compliance
+
+@pytest.fixture(autouse=True)
+def clear_prefetched():
+    gcp_doc_ai._prefetched.invalidate()
+    yield
+    gcp_doc_ai._prefetched.invalidate()
+
+class TestDocumentPrefetch:
+    """Test cases for starting extraction before the user asks for it."""
+
+    def test_later_call_reuses_prefetched_text(self):
+        """Extraction runs once, and the analysis call picks up its result."""
+        with patch('src.services.gcp_doc_ai._process_document', return_value="REQ-001: Log in.") as mock_process:
+            assert gcp_doc_ai.prefetch_document(b"%PDF-1", "application/pdf")
+            assert not gcp_doc_ai.prefetch_document(b"%PDF-1", "application/pdf")
+            assert gcp_doc_ai.process_document(b"%PDF-1", "application/pdf") == "REQ-001: Log in."
+        assert mock_process.call_count == 1
+
+    def test_call_during_prefetch_waits_for_it(self):
+        """A click while extraction is still running waits for it instead of starting another."""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_extraction(file_content, mime_type):
+            started.set()
+            release.wait(timeout=5)
+            return "REQ-001: Log in."
+
+        with patch('src.services.gcp_doc_ai._process_document', side_effect=slow_extraction) as mock_process, \
+             patch('src.services.gcp_vertex_ai.generate_text', return_value="[Pass] REQ-001 is fine."):
+            gcp_doc_ai.prefetch_document(b"%PDF-2", "application/pdf")
+            assert started.wait(timeout=5)
+            threading.Timer(0.05, release.set).start()
+            report = analyze_document_compliance(b"%PDF-2", "application/pdf", "A SOC 2 auditor")
+
+        assert report.startswith("[Pass]")
+        assert mock_process.call_count == 1
+
+    def test_queued_prefetch_is_cancelled_and_extracted_now(self):
+        """A prefetch still waiting for a worker does not hold up the call for its document."""
+        busy, release = threading.Event(), threading.Event()
+
+        def extraction(file_content, mime_type):
+            if file_content == b"%PDF-busy":
+                busy.set()
+                release.wait(timeout=5)
+            return f"text of {file_content.decode()}"
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            with patch('src.services.gcp_doc_ai._prefetch_executor', executor), \
+                 patch('src.services.gcp_doc_ai._process_document', side_effect=extraction) as mock_process:
+                gcp_doc_ai.prefetch_document(b"%PDF-busy", "application/pdf")
+                assert busy.wait(timeout=5)
+                gcp_doc_ai.prefetch_document(b"%PDF-5", "application/pdf")
+                assert gcp_doc_ai.process_document(b"%PDF-5", "application/pdf") == "text of %PDF-5"
+                assert not release.is_set()
+                release.set()
+            assert mock_process.call_count == 2
+        finally:
+            release.set()
+            executor.shutdown(wait=True)
+
+    def test_failed_prefetch_is_retried(self):
+        """An error from the speculative run is not served; the call extracts again."""
+        with patch('src.services.gcp_doc_ai._process_document',
+                   side_effect=["Error calling Document AI. Details: 503", "REQ-001: Log in."]) as mock_process:
+            gcp_doc_ai.prefetch_document(b"%PDF-3", "application/pdf")
+            assert gcp_doc_ai.process_document(b"%PDF-3", "application/pdf") == "REQ-001: Log in."
+        assert mock_process.call_count == 2
+
+    def test_prefetch_can_be_disabled(self):
+        """With DOCAI_PREFETCH=0 nothing starts until the document is processed."""
+        with patch('src.services.gcp_doc_ai.PREFETCH_ENABLED', False), \
+             patch('src.services.gcp_doc_ai._process_document') as mock_process:
+            assert not gcp_doc_ai.prefetch_document(b"%PDF-4", "application/pdf")
+        mock_process.assert_not_called()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
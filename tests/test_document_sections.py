@@ -0,0 +1,113 @@
+"""
+Automated tests for document sectioning and incremental compliance re-scans.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules.document_sections import segment_text
+from src.modules import compliance_scanner
+from src.services.local_store import LocalStore
+
+DOCUMENT = """Telemedicine Platform Requirements
+Version 1.0
+
+1. INTRODUCTION
+This document describes the platform.
+REQ-001: The system shall store patient records.
+REQ-002: The system shall encrypt data at rest.
+# Retention
+Data is kept for a reasonable period.
+"""
+
+class TestSegmentText:
+    """Test cases for splitting extracted text into sections."""
+
+    def test_sections_follow_headings_and_requirement_ids(self):
+        """Headings and requirement lines start sections; leading text is a preamble."""
+        sections = segment_text(DOCUMENT)
+        assert [s.key for s in sections] == ["Preamble", "1. INTRODUCTION", "REQ-001", "REQ-002", "Retention"]
+        assert "".join(s.text for s in sections) == DOCUMENT
+        assert all(DOCUMENT[s.start:s.end] == s.text for s in sections)
+
+    def test_hash_ignores_whitespace_and_tracks_edits(self):
+        """Re-flowed text keeps its hash; edited text does not."""
+        original = {s.key: s.hash for s in segment_text(DOCUMENT)}
+        reflowed = {s.key: s.hash for s in segment_text(DOCUMENT.replace("store patient", "store   patient"))}
+        edited = {s.key: s.hash for s in segment_text(DOCUMENT.replace("at rest", "at rest and in transit"))}
+
+        assert reflowed == original
+        assert [k for k in original if edited[k] != original[k]] == ["REQ-002"]
+
+    def test_duplicate_keys_are_made_unique(self):
+        """Repeated requirement IDs get distinct keys."""
+        keys = [s.key for s in segment_text("REQ-1 first\nREQ-1 again\n")]
+        assert keys == ["REQ-1", "REQ-1 (2)"]
+
+    def test_text_without_boundaries_is_one_section(self):
+        """Plain prose is a single 'Document' section."""
+        sections = segment_text("the system stores data.\nit is encrypted.")
+        assert [s.key for s in sections] == ["Document"]
+
+class TestIncrementalAudit:
+    """Test cases for re-auditing only changed sections."""
+
+    @pytest.fixture(autouse=True)
+    def store(self):
+        store = LocalStore(":memory:")
+        with patch('src.modules.compliance_scanner.local_store.get_store', return_value=store):
+            yield store
+
+    @staticmethod
+    def sectioned_response(keys):
+        return "\n".join(f"### Section: {key}\n[Pass] {key} looks fine." for key in keys)
+
+    def test_only_changed_sections_are_sent_again(self):
+        """Unchanged sections are served from the cache and marked as such."""
+        keys = [s.key for s in segment_text(DOCUMENT)]
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            mock_vertex_ai.return_value = self.sectioned_response(keys)
+            first = compliance_scanner.audit_sections_incrementally(DOCUMENT, "GDPR auditor")
+            assert "5 of 5 sections re-audited" in first
+
+            revised = DOCUMENT.replace("at rest", "at rest and in transit")
+            mock_vertex_ai.return_value = "### Section: REQ-002\n[Risk - High] Key management is unspecified."
+            second = compliance_scanner.audit_sections_incrementally(revised, "GDPR auditor")
+
+        prompt = mock_vertex_ai.call_args[0][0]
+        assert "=== SECTION: REQ-002 ===" in prompt
+        assert "REQ-001" not in prompt
+        assert "1 of 5 sections re-audited" in second
+        assert "### Section: REQ-002 (Changed)\n[Risk - High]" in second
+        assert "### Section: REQ-001 (Unchanged)\n[Pass] REQ-001 looks fine." in second
+
+    def test_cache_is_per_standard(self):
+        """Findings for one standard are not reused for another."""
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            mock_vertex_ai.return_value = "[Pass] Fine."
+            compliance_scanner.audit_sections_incrementally("plain text", "GDPR auditor")
+            compliance_scanner.audit_sections_incrementally("plain text", "HIPAA auditor")
+        assert mock_vertex_ai.call_count == 2
+
+    def test_unattributed_response_is_kept_but_not_cached(self):
+        """A response without section headers is shown as-is and re-audited next time."""
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            mock_vertex_ai.return_value = "[Warning - Medium] Retention period is vague."
+            report = compliance_scanner.audit_sections_incrementally(DOCUMENT, "GDPR auditor")
+            compliance_scanner.audit_sections_incrementally(DOCUMENT, "GDPR auditor")
+
+        assert "[Warning - Medium] Retention period is vague." in report
+        assert mock_vertex_ai.call_count == 2
+
+    def test_vertex_error_is_returned(self):
+        """Errors from Gemini are returned unchanged."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded"):
+            assert compliance_scanner.audit_sections_incrementally(DOCUMENT, "GDPR auditor") == "Error: quota exceeded"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,197 @@
+"""
+Automated tests for the buffered Firestore writer.
+"""
+
+import pytest
+import time
+import itertools
+import threading
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.gcp_firestore import BufferedWriter
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref, data))
+
+    def commit(self):
+        if self.client.failures_left > 0:
+            self.client.failures_left -= 1
+            raise ConnectionError("transient failure")
+        self.client.commits.append(self.writes)
+
+class FakeFirestore:
+    """Minimal stand-in for the Firestore client surface used by the writer."""
+
+    def __init__(self, failures=0):
+        self.failures_left = failures
+        self.commits = []
+        self._ids = itertools.count(1)
+
+    def collection(self, name):
+        collection = MagicMock()
+        collection.document.side_effect = lambda: MagicMock(id=f"{name}-{next(self._ids)}")
+        return collection
+
+    def batch(self):
+        return FakeBatch(self)
+
+class TestBufferedWriter:
+    """Test cases for the batched background writer."""
+
+    def test_submit_returns_document_ids(self):
+        """Each future resolves to the ID of the document it created."""
+        client = FakeFirestore()
+        writer = BufferedWriter(client=client, flush_interval=0.05)
+
+        futures = writer.submit_many("test_suites", [{"row": i} for i in range(3)])
+        writer.flush(timeout=5)
+
+        ids = [future.result(timeout=5) for future in futures]
+        assert ids == ["test_suites-1", "test_suites-2", "test_suites-3"]
+        assert len(client.commits) == 1
+        writer.close()
+
+    def test_batches_are_capped_at_batch_size(self):
+        """Records are committed in batches no larger than the configured size."""
+        client = FakeFirestore()
+        writer = BufferedWriter(client=client, batch_size=4, flush_interval=10)
+
+        futures = writer.submit_many("rows", [{"row": i} for i in range(10)])
+        writer.flush(timeout=5)
+
+        assert [len(commit) for commit in client.commits] == [4, 4, 2]
+        assert all(future.done() for future in futures)
+        writer.close()
+
+    def test_batch_size_never_exceeds_firestore_limit(self):
+        """Requested batch sizes above 500 are clamped."""
+        writer = BufferedWriter(client=FakeFirestore(), batch_size=5000)
+        assert writer.batch_size == 500
+        writer.close()
+
+    def test_transient_failures_are_retried(self):
+        """A failed commit is retried before the futures fail."""
+        client = FakeFirestore(failures=2)
+        writer = BufferedWriter(client=client, flush_interval=0.01, backoff_base=0.001)
+
+        future = writer.submit("rows", {"row": 1})
+        assert future.result(timeout=5) == "rows-1"
+        writer.close()
+
+    def test_exhausted_retries_fail_every_future(self):
+        """When retries run out every record in the batch reports the error."""
+        client = FakeFirestore(failures=10)
+        writer = BufferedWriter(client=client, flush_interval=0.01, max_retries=1, backoff_base=0.001)
+
+        futures = writer.submit_many("rows", [{"row": 1}, {"row": 2}])
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(timeout=5)
+        writer.close()
+
+    def test_full_queue_rejects_new_records(self):
+        """Records are rejected instead of blocking once the queue is full."""
+        client = FakeFirestore()
+        release = threading.Event()
+        original_batch = client.batch
+
+        def blocking_batch():
+            release.wait(timeout=5)
+            return original_batch()
+
+        client.batch = blocking_batch
+        writer = BufferedWriter(client=client, batch_size=1, max_queue_size=1)
+
+        futures = [writer.submit("rows", {"row": i}) for i in range(3)]
+        rejected = [f for f in futures if f.done() and isinstance(f.exception(), BufferError)]
+        assert rejected
+        release.set()
+        writer.close()
+
+    def test_closed_writer_rejects_records(self):
+        """Submitting after close fails immediately."""
+        writer = BufferedWriter(client=FakeFirestore())
+        writer.close()
+
+        future = writer.submit("rows", {"row": 1})
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+
+    def test_failure_building_refs_fails_futures_and_keeps_writer(self):
+        """An error before the commit fails that batch's futures; later records are still written."""
+        client = FakeFirestore()
+        original_collection = client.collection
+        client.collection = MagicMock(side_effect=[ValueError("bad collection"), ValueError("bad collection")])
+        writer = BufferedWriter(client=client, flush_interval=0.01, max_retries=1, backoff_base=0.001)
+
+        failed = writer.submit("rows", {"row": 1})
+        with pytest.raises(ValueError):
+            failed.result(timeout=5)
+
+        client.collection = original_collection
+        assert writer.submit("rows", {"row": 2}).result(timeout=5).startswith("rows-")
+        writer.close()
+
+    def test_flush_after_close_returns(self):
+        """Flushing a closed writer does not block."""
+        writer = BufferedWriter(client=FakeFirestore())
+        writer.close()
+        writer.flush(timeout=1)
+
+    def test_close_with_full_queue_does_not_block(self):
+        """Closing while the queue is full returns at its timeout instead of waiting for room."""
+        client = FakeFirestore()
+        release = threading.Event()
+        original_batch = client.batch
+
+        def blocking_batch():
+            release.wait(timeout=5)
+            return original_batch()
+
+        client.batch = blocking_batch
+        writer = BufferedWriter(client=client, batch_size=1, max_queue_size=1)
+        futures = [writer.submit("rows", {"row": i}) for i in range(3)]
+
+        started = time.monotonic()
+        writer.close(timeout=0.2)
+        assert time.monotonic() - started < 1
+        with pytest.raises(RuntimeError):
+            writer.submit("rows", {"row": 4}).result(timeout=1)
+
+        release.set()
+        writer.close()
+        writer._thread.join(timeout=5)
+        assert all(f.done() for f in futures)
+
+    def test_records_racing_close_are_written_or_rejected(self):
+        """Every record submitted while close() runs is either committed or rejected, never stranded."""
+        writer = BufferedWriter(client=FakeFirestore(), flush_interval=0.01)
+        futures, start = [], threading.Event()
+
+        def submitter():
+            start.wait()
+            for i in range(200):
+                futures.append(writer.submit("rows", {"row": i}))
+
+        threads = [threading.Thread(target=submitter) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        writer.close()
+        for thread in threads:
+            thread.join()
+
+        assert all(f.done() for f in futures)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,138 @@
+"""
+Automated tests for the Vertex AI generation profiles.
+"""
+
+import pytest
+import threading
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services import gcp_vertex_ai
+from src.services.model_router import ModelRouter, Target
+
+PRIMARY, FALLBACK = Target("gemini-test", "us-central1"), Target("gemini-test", "europe-west4")
+
+def _chunk(text: str) -> MagicMock:
+    chunk = MagicMock()
+    chunk.text = text
+    return chunk
+
+def _stalling_stream(release: threading.Event, *chunks):
+    yield from chunks
+    release.wait(timeout=5)
+
+class TestGenerationProfiles:
+    """Test cases for task-specific generation settings."""
+
+    def test_profile_settings_reach_the_model(self):
+        """The profile's output budget and temperature are sent with the request."""
+        model = MagicMock()
+        model.generate_content.return_value.text = "ok"
+        with patch('src.services.gcp_vertex_ai.model', model):
+            assert gcp_vertex_ai.generate_text("hi", profile="copilot") == "ok"
+
+        config = model.generate_content.call_args.kwargs["generation_config"].to_dict()
+        assert config["max_output_tokens"] == gcp_vertex_ai.PROFILES["copilot"].max_output_tokens
+        assert config["temperature"] == pytest.approx(0.3)
+
+    def test_no_profile_keeps_model_defaults(self):
+        """Without a profile no generation config is sent."""
+        model = MagicMock()
+        with patch('src.services.gcp_vertex_ai.model', model):
+            gcp_vertex_ai.generate_text("hi")
+        assert model.generate_content.call_args.kwargs["generation_config"] is None
+
+    def test_json_config_merges_profile_and_overrides(self):
+        """Explicit settings win over the profile; JSON mode is kept."""
+        config = gcp_vertex_ai.json_generation_config(None, "synthetic_data", temperature=0.1).to_dict()
+        assert config["response_mime_type"] == "application/json"
+        assert config["max_output_tokens"] == 8192
+        assert config["temperature"] == pytest.approx(0.1)
+
+    def test_profile_model_is_created_once(self):
+        """A profile on another model gets its own client, cached across calls."""
+        profile = gcp_vertex_ai.GenerationProfile(max_output_tokens=10, temperature=0, model="gemini-pro-test")
+        with patch('src.services.gcp_vertex_ai.model', MagicMock()), \
+             patch('src.services.gcp_vertex_ai.project_id', "proj"), \
+             patch('src.services.gcp_vertex_ai.region', "us-central1"), \
+             patch('src.services.gcp_vertex_ai.GenerativeModel') as mock_model_class, \
+             patch.dict(gcp_vertex_ai.PROFILES, {"custom": profile}):
+            gcp_vertex_ai.generate_text("a", profile="custom")
+            gcp_vertex_ai.generate_text("b", profile="custom")
+        mock_model_class.assert_called_once_with(
+            "projects/proj/locations/us-central1/publishers/google/models/gemini-pro-test")
+        gcp_vertex_ai._models.clear()
+
+    def test_targets_cover_fallback_regions_and_model(self):
+        """Each profile is routed to its model in every region, then to the fallback model."""
+        with patch('src.services.gcp_vertex_ai.region', "us-central1"), \
+             patch('src.services.gcp_vertex_ai.FALLBACK_REGIONS', ["us-central1", "europe-west4"]), \
+             patch('src.services.gcp_vertex_ai.FALLBACK_MODEL', "gemini-pro"):
+            targets = gcp_vertex_ai.targets_for(gcp_vertex_ai.PROFILES["copilot"], "hi")
+        assert [str(t) for t in targets] == [
+            f"{gcp_vertex_ai.DEFAULT_MODEL}@us-central1", f"{gcp_vertex_ai.DEFAULT_MODEL}@europe-west4",
+            "gemini-pro@us-central1"]
+
+    def test_unknown_profile(self):
+        """Typos in profile names fail loudly."""
+        with pytest.raises(ValueError, match="Unknown generation profile"):
+            gcp_vertex_ai.generate_text("hi", profile="chat")
+
+class TestStreaming:
+    """Test cases for deadlines and failover on streamed responses."""
+
+    def test_stalled_first_chunk_fails_over(self):
+        """A target that sends nothing before its deadline share is hedged to the next target."""
+        release = threading.Event()
+        stalled, healthy = MagicMock(), MagicMock()
+        stalled.generate_content.side_effect = lambda *a, **k: _stalling_stream(release)
+        healthy.generate_content.side_effect = lambda *a, **k: iter([_chunk("a"), _chunk("b")])
+        try:
+            with patch('src.services.gcp_vertex_ai.model', MagicMock()), \
+                 patch('src.services.gcp_vertex_ai.stream_router', ModelRouter()), \
+                 patch('src.services.gcp_vertex_ai.targets_for', return_value=[PRIMARY, FALLBACK]), \
+                 patch('src.services.gcp_vertex_ai._deadline', return_value=0.4), \
+                 patch('src.services.gcp_vertex_ai._client_for',
+                       side_effect=lambda target: stalled if target == PRIMARY else healthy):
+                assert list(gcp_vertex_ai.stream_text("prompt")) == ["a", "b"]
+        finally:
+            release.set()
+
+    def test_stalled_first_chunk_without_fallback_hits_the_deadline(self):
+        """With nowhere to fail over, a stream that never starts ends with an error at its deadline."""
+        release = threading.Event()
+        stalled = MagicMock()
+        stalled.generate_content.side_effect = lambda *a, **k: _stalling_stream(release)
+        try:
+            with patch('src.services.gcp_vertex_ai.model', MagicMock()), \
+                 patch('src.services.gcp_vertex_ai.stream_router', ModelRouter()), \
+                 patch('src.services.gcp_vertex_ai.targets_for', return_value=[PRIMARY]), \
+                 patch('src.services.gcp_vertex_ai._deadline', return_value=0.2), \
+                 patch('src.services.gcp_vertex_ai._client_for', return_value=stalled):
+                chunks = list(gcp_vertex_ai.stream_text("prompt"))
+        finally:
+            release.set()
+        assert len(chunks) == 1 and chunks[0].startswith("Error")
+
+    def test_stream_going_quiet_is_abandoned(self):
+        """A stream that stops sending between chunks ends with an error after the idle timeout."""
+        release = threading.Event()
+        model = MagicMock()
+        model.generate_content.side_effect = lambda *a, **k: _stalling_stream(release, _chunk("a"), _chunk("b"))
+        try:
+            with patch('src.services.gcp_vertex_ai.model', model), \
+                 patch('src.services.gcp_vertex_ai.targets_for', return_value=[PRIMARY]), \
+                 patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+                 patch('src.services.gcp_vertex_ai.STREAM_IDLE_SECONDS', 0.1):
+                chunks = list(gcp_vertex_ai.stream_text("prompt"))
+        finally:
+            release.set()
+        assert chunks[:2] == ["a", "b"]
+        assert len(chunks) == 3 and chunks[2].startswith("Error")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
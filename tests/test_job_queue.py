@@ -0,0 +1,203 @@
+"""
+Automated tests for the durable job queue and its handlers.
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services.job_queue import DurableQueue, QUEUED, LEASED, SUCCEEDED, DEAD
+from src.modules import job_handlers
+
+@pytest.fixture
+def queue(tmp_path):
+    q = DurableQueue(str(tmp_path / "queue.sqlite3"), backoff_base=0.0)
+    yield q
+    q.close()
+
+class TestDurableQueue:
+    """Test cases for leasing, retries and dead-lettering."""
+
+    def test_lease_respects_priority(self, queue):
+        """Higher-priority jobs are leased first, then oldest first."""
+        low = queue.enqueue("scan", {"n": 1})
+        high = queue.enqueue("scan", {"n": 2}, priority=5)
+        low2 = queue.enqueue("scan", {"n": 3})
+
+        assert [queue.lease("w")["id"] for _ in range(3)] == [high, low, low2]
+        assert queue.lease("w") is None
+
+    def test_lease_filters_by_kind(self, queue):
+        """Workers can restrict themselves to some job kinds."""
+        queue.enqueue("scan", {})
+        export = queue.enqueue("export", {})
+
+        job = queue.lease("w", kinds=["export"])
+        assert job["id"] == export
+        assert job["status"] == LEASED
+        assert job["attempts"] == 1
+
+    def test_leased_job_is_not_handed_out_twice(self, queue):
+        """A second worker does not get a job under a live lease."""
+        queue.enqueue("scan", {})
+        assert queue.lease("w1", lease_seconds=60) is not None
+        assert queue.lease("w2") is None
+
+    def test_expired_lease_is_reclaimed(self, queue):
+        """A job whose worker stopped heartbeating becomes available again."""
+        job_id = queue.enqueue("scan", {})
+        queue.lease("w1", lease_seconds=0.01)
+        time.sleep(0.02)
+
+        job = queue.lease("w2")
+        assert job["id"] == job_id
+        assert job["attempts"] == 2
+        # The old worker can no longer complete it.
+        assert not queue.complete(job_id, "w1", {})
+        assert queue.complete(job_id, "w2", {"ok": True})
+        assert queue.get(job_id)["result"] == {"ok": True}
+
+    def test_extend_lease(self, queue):
+        """Only the lease owner can extend it."""
+        job_id = queue.enqueue("scan", {})
+        queue.lease("w1", lease_seconds=0.01)
+        assert queue.extend_lease(job_id, "w1", lease_seconds=60)
+        assert not queue.extend_lease(job_id, "w2", lease_seconds=60)
+        time.sleep(0.02)
+        assert queue.lease("w2") is None
+
+    def test_failed_job_is_retried_with_backoff(self, tmp_path):
+        """A retryable failure re-queues the job after a delay."""
+        q = DurableQueue(str(tmp_path / "q.sqlite3"), backoff_base=60.0)
+        job_id = q.enqueue("scan", {})
+        q.lease("w")
+
+        assert q.fail(job_id, "w", "timeout") == QUEUED
+        job = q.get(job_id)
+        assert job["last_error"] == "timeout"
+        assert job["available_at"] > time.time() + 20
+        assert q.lease("w") is None
+        q.close()
+
+    def test_job_is_dead_lettered_after_max_attempts(self, queue):
+        """Jobs that keep failing end up in the dead-letter list and can be requeued."""
+        job_id = queue.enqueue("scan", {}, max_attempts=2)
+        for _ in range(2):
+            queue.lease("w")
+            status = queue.fail(job_id, "w", "boom")
+        assert status == DEAD
+        assert [j["id"] for j in queue.dead_letters()] == [job_id]
+
+        assert queue.requeue(job_id)
+        assert queue.lease("w")["attempts"] == 1
+
+    def test_expired_lease_on_last_attempt_is_dead_lettered(self, queue):
+        """A job whose worker keeps dying is not leased beyond max_attempts."""
+        job_id = queue.enqueue("scan", {}, max_attempts=2)
+        for _ in range(2):
+            assert queue.lease("w", lease_seconds=0.01)["id"] == job_id
+            time.sleep(0.02)
+
+        assert queue.lease("w") is None
+        job = queue.get(job_id)
+        assert job["status"] == DEAD and job["attempts"] == 2
+        assert job["last_error"] == "Lease expired on the last attempt."
+
+    def test_fail_requires_the_lease(self, queue):
+        """A worker whose lease was taken over cannot fail the new owner's attempt."""
+        job_id = queue.enqueue("scan", {})
+        queue.lease("w1", lease_seconds=0.01)
+        time.sleep(0.02)
+        queue.lease("w2", lease_seconds=60)
+
+        assert queue.fail(job_id, "w1", "late failure") is None
+        assert queue.get(job_id)["lease_owner"] == "w2"
+
+    def test_shared_between_threads(self, queue):
+        """Heartbeats from another thread can run alongside leasing and completing."""
+        job_ids = [queue.enqueue("scan", {}) for _ in range(20)]
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.is_set():
+                for job_id in job_ids:
+                    queue.extend_lease(job_id, "w", lease_seconds=60)
+
+        thread = threading.Thread(target=heartbeat)
+        thread.start()
+        try:
+            for _ in job_ids:
+                job = queue.lease("w", lease_seconds=60)
+                assert queue.complete(job["id"], "w", {"ok": True})
+        finally:
+            stop.set()
+            thread.join()
+        assert queue.stats() == {SUCCEEDED: 20}
+
+    def test_permanent_failure_skips_retries(self, queue):
+        """Non-retryable failures are dead-lettered on the first attempt."""
+        job_id = queue.enqueue("scan", {}, max_attempts=5)
+        queue.lease("w")
+        assert queue.fail(job_id, "w", "bad payload", retryable=False) == DEAD
+
+    def test_stats(self, queue):
+        """Stats count jobs per status."""
+        done = queue.enqueue("scan", {})
+        queue.enqueue("scan", {})
+        queue.lease("w")
+        queue.complete(done, "w")
+        assert queue.stats() == {QUEUED: 1, SUCCEEDED: 1}
+
+class TestJobHandlers:
+    """Test cases for the worker-side job handlers."""
+
+    @patch('src.modules.workflows.scan_history.record_scan')
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_scan_handler(self, mock_analyze, mock_record, tmp_path):
+        """Scans read the input file, record history and write the report."""
+        doc = tmp_path / "srs.pdf"
+        doc.write_bytes(b"%PDF")
+        mock_analyze.return_value = "[Risk - High] Missing consent"
+        mock_record.return_value = (True, "scan-1")
+
+        result = job_handlers.handle_scan({
+            "file_path": str(doc), "standard": "GDPR", "standard_persona": "a GDPR auditor",
+            "output_path": str(tmp_path / "out" / "report.md"),
+        })
+
+        mock_analyze.assert_called_once_with(b"%PDF", "application/pdf", "a GDPR auditor", incremental=False)
+        assert result["scan_id"] == "scan-1"
+        assert result["max_severity"] == "High"
+        assert (tmp_path / "out" / "report.md").read_text() == "[Risk - High] Missing consent"
+
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_scan_handler_raises_on_service_error(self, mock_analyze, tmp_path):
+        """Service error strings become retryable failures."""
+        doc = tmp_path / "srs.pdf"
+        doc.write_bytes(b"%PDF")
+        mock_analyze.return_value = "Error: quota exceeded"
+
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            job_handlers.handle_scan({"file_path": str(doc), "standard_persona": "auditor"})
+
+    def test_missing_input_is_permanent(self, tmp_path):
+        """A missing input file will never succeed, so it is not retried."""
+        with pytest.raises(job_handlers.PermanentJobError):
+            job_handlers.handle_scan({"file_path": str(tmp_path / "nope.pdf"), "standard_persona": "auditor"})
+
+    def test_export_handler(self, tmp_path):
+        """Exports render an inline report to the requested format."""
+        out = tmp_path / "report.json"
+        result = job_handlers.handle_export({"report": "[Pass] Encrypted", "format": "json", "output_path": str(out)})
+
+        assert result["format"] == "json"
+        assert out.exists() and out.stat().st_size == result["bytes"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
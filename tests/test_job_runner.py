@@ -0,0 +1,88 @@
+"""
+Automated tests for the background job runner.
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.job_runner import JobRunner, report_progress, SUCCEEDED, FAILED, CANCELLED, QUEUED
+
+class TestJobRunner:
+    """Test cases for job submission, status and results."""
+
+    def test_job_succeeds_with_result(self):
+        """A finished job exposes its status and return value."""
+        runner = JobRunner(max_workers=1)
+        job = runner.submit(lambda a, b: a + b, 2, b=3, kind="add")
+
+        assert job.result == 5
+        assert job.status == SUCCEEDED
+        assert job.progress == 1.0
+        assert runner.get(job.id) is job
+        runner.shutdown()
+
+    def test_job_failure_is_recorded(self):
+        """Exceptions mark the job failed and keep the message."""
+        runner = JobRunner(max_workers=1)
+
+        def boom():
+            raise ValueError("Vertex AI service unavailable")
+
+        job = runner.submit(boom)
+        with pytest.raises(ValueError):
+            job.result
+        assert job.status == FAILED
+        assert "Vertex AI service unavailable" in job.message
+        runner.shutdown()
+
+    def test_progress_is_reported_from_inside_the_job(self):
+        """report_progress updates the job running on the current thread."""
+        runner = JobRunner(max_workers=1)
+        seen = threading.Event()
+        release = threading.Event()
+
+        def work():
+            report_progress(0.5, "Halfway")
+            seen.set()
+            release.wait(timeout=5)
+
+        job = runner.submit(work)
+        assert seen.wait(timeout=5)
+        assert (job.progress, job.message) == (0.5, "Halfway")
+        release.set()
+        job.result
+        runner.shutdown()
+
+    def test_report_progress_outside_job_is_noop(self):
+        """Pipeline code can report progress when it is not running as a job."""
+        report_progress(0.3, "ignored")
+
+    def test_pending_jobs_are_bounded_and_cancellable(self):
+        """Queued jobs are capped and can be cancelled before they start."""
+        runner = JobRunner(max_workers=1, max_pending=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            release.wait(timeout=5)
+
+        runner.submit(blocker)
+        assert started.wait(timeout=5)
+        queued = runner.submit(lambda: None)
+        assert queued.status == QUEUED
+        with pytest.raises(RuntimeError):
+            runner.submit(lambda: None)
+
+        assert runner.cancel(queued.id)
+        assert queued.status == CANCELLED
+        release.set()
+        runner.shutdown()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
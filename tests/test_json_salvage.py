@@ -0,0 +1,80 @@
+"""
+Automated tests for salvaging truncated or invalid LLM JSON.
+"""
+
+import pytest
+import json
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import json_salvage
+from src.modules.synthetic_data_hub import generate_synthetic_data
+from src.modules.test_case_generator import generate_test_cases_from_text
+
+DOCUMENT = "REQ-001: Users can log in.\nREQ-002: Sessions expire.\nREQ-003: Passwords are hashed.\n"
+
+def _test_case(number: int, requirement_id: str) -> dict:
+    return {"id": f"TC{number:03d}", "requirement_id": requirement_id, "type": "positive",
+            "description": f"Verify {requirement_id}", "steps": "s", "expected_result": "e"}
+
+class TestSalvage:
+    """Test cases for continuation and repair calls."""
+
+    def test_truncated_test_cases_continue_with_missing_requirements_only(self):
+        """The follow-up prompt lists only uncovered requirements and results are merged."""
+        truncated = json.dumps([_test_case(1, "REQ-001")])[:-1] + ', {"id": "TC002", "requirement_id": "REQ-0'
+        continued = json.dumps([_test_case(1, "REQ-002"), _test_case(2, "REQ-003")])
+
+        with patch('src.services.gcp_vertex_ai.generate_text', side_effect=[truncated, continued]) as mock_vertex_ai:
+            df = generate_test_cases_from_text(DOCUMENT)
+
+        follow_up = mock_vertex_ai.call_args_list[1][0][0]
+        assert "REQ-002" in follow_up and "REQ-003" in follow_up
+        assert "REQ-001" not in follow_up
+        assert list(df["requirement_id"]) == ["REQ-001", "REQ-002", "REQ-003"]
+        assert list(df["id"]) == ["TC001", "TC002", "TC003"]
+        assert df.attrs["coverage"]["uncovered"] == []
+        assert "parse_errors" not in df.attrs
+
+    def test_invalid_objects_are_repaired_in_one_call(self):
+        """Only the invalid objects are sent back for repair."""
+        response = '[{"name": "Ann"}, {"name": "Bob",}, {"name": "Cy"}]'
+        with patch('src.services.gcp_vertex_ai.generate_text',
+                   side_effect=[response, '[{"name": "Bob"}]']) as mock_vertex_ai:
+            json_str, df = generate_synthetic_data("people")
+
+        assert '{"name": "Bob",}' in mock_vertex_ai.call_args_list[1][0][0]
+        assert "Ann" not in mock_vertex_ai.call_args_list[1][0][0]
+        assert sorted(df["name"]) == ["Ann", "Bob", "Cy"]
+
+    def test_default_continuation_repeats_request_and_last_item(self):
+        """Without a requirements index, the follow-up carries the request and where it stopped."""
+        with patch('src.services.gcp_vertex_ai.generate_text',
+                   side_effect=['[{"n": 1}, {"n": 2},', '[{"n": 3}]']) as mock_vertex_ai:
+            json_str, df = generate_synthetic_data("numbered rows")
+
+        follow_up = mock_vertex_ai.call_args_list[1][0][0]
+        assert "numbered rows" in follow_up and '{"n": 2}' in follow_up
+        assert list(df["n"]) == [1, 2, 3]
+
+    def test_failed_continuation_keeps_what_was_parsed(self):
+        """If the follow-up fails, the parsed objects are kept and the cut-off one is reported."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded"):
+            objects, errors = json_salvage.salvage_json_array(
+                [{"n": 1}], [{"error": "truncated object at end of response", "text": '{"n": '}], True,
+                json_salvage.continue_prompt("rows"))
+        assert objects == [{"n": 1}]
+        assert len(errors) == 1
+
+    def test_complete_response_makes_no_extra_calls(self):
+        """Valid, complete output is returned as is."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value='[{"n": 1}]') as mock_vertex_ai:
+            generate_synthetic_data("rows")
+        assert mock_vertex_ai.call_count == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,105 @@
+"""
+Automated tests for incremental JSON parsing and streamed generation.
+"""
+
+import pytest
+import json
+import threading
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.json_stream import JsonArrayStream, iter_json_objects, parse_json_array
+from src.utils.job_runner import JobRunner
+from src.modules.synthetic_data_hub import generate_synthetic_data
+from src.modules.test_case_generator import generate_test_cases_from_text
+
+def _chunks(text: str, size: int = 7) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class TestJsonArrayStream:
+    """Test cases for the incremental parser."""
+
+    def test_objects_are_emitted_as_soon_as_they_close(self):
+        """Each object is returned by the feed that completes it."""
+        parser = JsonArrayStream()
+        assert parser.feed('[{"a": 1') == []
+        assert parser.feed('}, {"a"') == [{"a": 1}]
+        assert parser.feed(': 2}]') == [{"a": 2}]
+        assert parser.close() == ""
+        assert parser.objects == 2
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Braces and escaped quotes in strings do not end an object."""
+        records = [{"text": "a } b { c", "quote": 'say "hi" \\ ok'}, {"nested": {"x": [1, {"y": 2}]}}]
+        assert list(iter_json_objects(_chunks(json.dumps(records), 3))) == records
+
+    def test_fences_and_prose_are_skipped(self):
+        """Markdown fences and surrounding text are ignored."""
+        text = 'Here you go:\n```json\n[\n  {"id": 1},\n  {"id": 2}\n]\n```\nDone.'
+        assert parse_json_array(text) == ([{"id": 1}, {"id": 2}], [])
+
+    def test_malformed_object_is_skipped(self):
+        """A bad object is recorded and parsing continues with the next one."""
+        objects, errors = parse_json_array('[{"id": 1}, {"id": 2,}, {"id": 3}]')
+        assert objects == [{"id": 1}, {"id": 3}]
+        assert len(errors) == 1 and errors[0]["text"] == '{"id": 2,}'
+
+    def test_truncated_remainder_is_returned(self):
+        """An object left open at the end is returned by close() and recorded."""
+        parser = JsonArrayStream()
+        assert parser.feed('[{"id": 1}, {"id": 2, "name": "Al') == [{"id": 1}]
+        assert parser.close() == '{"id": 2, "name": "Al'
+        assert parser.errors[0]["error"] == "truncated object at end of response"
+
+class TestStreamedGeneration:
+    """Test cases for streaming generation into a running job."""
+
+    def test_test_cases_are_published_while_streaming(self):
+        """Rows reach job.partial before the response has finished."""
+        records = [{"id": f"TC00{i}", "requirement_id": "REQ-001", "type": "positive",
+                    "description": "d", "steps": "s", "expected_result": "e"} for i in (1, 2)]
+        text = json.dumps(records)
+        first_row_seen, release = threading.Event(), threading.Event()
+        runner = JobRunner(max_workers=1)
+
+        def fake_stream(prompt, **kwargs):
+            cut = text.index("}") + 1
+            yield text[:cut]
+            first_row_seen.set()
+            release.wait(timeout=5)
+            yield text[cut:]
+
+        with patch('src.services.gcp_vertex_ai.stream_text', side_effect=fake_stream):
+            job = runner.submit(generate_test_cases_from_text, "REQ-001: Log in.", stream=True)
+            assert first_row_seen.wait(timeout=5)
+            assert [row["id"] for row in job.partial] == ["TC001"]
+            release.set()
+            df = job.result
+
+        assert list(df["id"]) == ["TC001", "TC002"]
+        assert len(job.partial) == 2
+        runner.shutdown()
+
+    def test_stream_error_before_any_row_fails(self):
+        """An error chunk with nothing parsed raises."""
+        with patch('src.services.gcp_vertex_ai.stream_text', return_value=iter(["Error: quota exceeded"])):
+            with pytest.raises(ValueError, match="quota exceeded"):
+                generate_synthetic_data("people", stream=True)
+
+    def test_synthetic_data_skips_malformed_records(self):
+        """Good records are kept and the skipped ones are listed on the frame."""
+        response = '[{"name": "Ann", "age": 30}, {"name": "Bob" "age": 41}, {"name": "Cy", "age": 52}]'
+        with patch('src.services.gcp_vertex_ai.stream_text', return_value=iter(_chunks(response))), \
+             patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: repair unavailable"):
+            json_str, df = generate_synthetic_data("people", stream=True)
+
+        assert list(df["name"]) == ["Ann", "Cy"]
+        assert len(df.attrs["parse_errors"]) == 1
+        assert json.loads(json_str)[1]["age"] == 52
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,177 @@
+"""
+Automated tests for the embedded SQLite record store.
+"""
+
+import pytest
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.local_store import LocalStore, CachedStore
+
+def make_store(records=5):
+    store = LocalStore(":memory:")
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(records):
+        store.save_record("scan_history", {
+            "standard": "EU (GDPR/MDR)" if i % 2 else "USA (HIPAA/FDA)",
+            "risk_count": i,
+            "report": "x" * 1000,
+        }, doc_id=f"scan-{i}", created_at=base + timedelta(minutes=i))
+    return store
+
+class TestLocalStore:
+    """Test cases for the SQLite backend."""
+
+    def test_save_and_get_record(self):
+        """A saved record is returned with its ID and creation time."""
+        store = LocalStore(":memory:")
+        ok, doc_id = store.save_record("scan_history", {"standard": "DPDPA"})
+
+        record = store.get_record("scan_history", doc_id)
+        assert ok
+        assert record["standard"] == "DPDPA"
+        assert record["id"] == doc_id
+        assert isinstance(record["createdAt"], datetime)
+
+    def test_get_missing_record(self):
+        """Unknown IDs return None."""
+        assert LocalStore(":memory:").get_record("scan_history", "nope") is None
+
+    def test_query_orders_by_created_at_descending(self):
+        """Queries default to newest first."""
+        ids = [r["id"] for r in make_store().query_records("scan_history")]
+        assert ids == ["scan-4", "scan-3", "scan-2", "scan-1", "scan-0"]
+
+    def test_query_filters(self):
+        """Equality, range and 'in' filters are applied."""
+        store = make_store()
+        eu = store.query_records("scan_history", filters=[("standard", "==", "EU (GDPR/MDR)")])
+        risky = store.query_records("scan_history", filters=[("risk_count", ">=", 3)])
+        chosen = store.query_records("scan_history", filters=[("id", "in", ["scan-0", "scan-2"])])
+
+        assert [r["id"] for r in eu] == ["scan-3", "scan-1"]
+        assert [r["id"] for r in risky] == ["scan-4", "scan-3"]
+        assert {r["id"] for r in chosen} == {"scan-0", "scan-2"}
+
+    def test_query_filters_on_created_at(self):
+        """createdAt filters accept datetimes."""
+        since = datetime(2026, 1, 1, 0, 2, tzinfo=timezone.utc)
+        records = make_store().query_records("scan_history", filters=[("createdAt", ">", since)])
+        assert [r["id"] for r in records] == ["scan-4", "scan-3"]
+
+    def test_cursor_pagination(self):
+        """start_after continues after the last document of the previous page."""
+        store = make_store()
+        first = store.query_records("scan_history", limit=2)
+        second = store.query_records("scan_history", limit=2, start_after=first[-1]["id"])
+        assert [r["id"] for r in second] == ["scan-2", "scan-1"]
+
+    def test_projection_omits_other_fields(self):
+        """select returns only the requested fields."""
+        records = make_store().query_records("scan_history", select=["standard"], limit=1)
+        assert set(records[0]) == {"standard", "id", "createdAt"}
+
+    def test_rejects_unsafe_field_names(self):
+        """Field names cannot inject SQL."""
+        with pytest.raises(ValueError):
+            make_store().query_records("scan_history", filters=[("x') OR 1=1 --", "==", 1)])
+
+    def test_count_and_sum_aggregations(self):
+        """Aggregations honour filters without loading records."""
+        store = make_store()
+        assert store.count_records("scan_history") == 5
+        assert store.count_records("scan_history", [("standard", "==", "EU (GDPR/MDR)")]) == 2
+        assert store.sum_records("scan_history", "risk_count") == 10
+        assert store.sum_records("scan_history", "risk_count", [("risk_count", "<", 2)]) == 1
+        assert store.count_records("empty") == 0
+
+    def test_counters(self):
+        """Counters accumulate per day and can be read over a window."""
+        store = LocalStore(":memory:")
+        store.increment_counter("test_cases_generated", 40)
+        store.increment_counter("test_cases_generated", 2)
+
+        assert store.get_counter("test_cases_generated") == 42
+        assert store.get_counter("test_cases_generated", since_day="2999-01-01") == 0
+        assert store.get_counter("unknown") == 0
+
+class TestCachedStore:
+    """Test cases for the write-through cache."""
+
+    def test_writes_go_through_to_remote(self):
+        """Records saved remotely are mirrored locally under the same ID."""
+        remote = MagicMock()
+        remote.save_record.return_value = (True, "remote-id")
+        store = CachedStore(LocalStore(":memory:"), remote=remote)
+
+        assert store.save_record("scan_history", {"standard": "DPDPA"}) == (True, "remote-id")
+        assert store.local.get_record("scan_history", "remote-id")["standard"] == "DPDPA"
+
+    def test_failed_remote_write_is_not_cached(self):
+        """Nothing is cached when Firestore rejects the write."""
+        remote = MagicMock()
+        remote.save_record.return_value = (False, "boom")
+        store = CachedStore(LocalStore(":memory:"), remote=remote)
+
+        store.save_record("scan_history", {"standard": "DPDPA"})
+        assert store.local.query_records("scan_history") == []
+
+    def test_read_miss_backfills_from_remote(self):
+        """A local miss is fetched from Firestore once, then served locally."""
+        remote = MagicMock()
+        remote.get_record.return_value = {"id": "r1", "standard": "DPDPA", "createdAt": datetime.now(timezone.utc)}
+        store = CachedStore(LocalStore(":memory:"), remote=remote)
+
+        assert store.get_record("scan_history", "r1")["standard"] == "DPDPA"
+        assert store.get_record("scan_history", "r1")["standard"] == "DPDPA"
+        remote.get_record.assert_called_once()
+
+    def test_first_query_syncs_newer_remote_records(self):
+        """The first query on a collection pulls remote records into the cache."""
+        remote = MagicMock()
+        remote.query_records.return_value = [
+            {"id": "r1", "standard": "DPDPA", "createdAt": datetime.now(timezone.utc)}
+        ]
+        store = CachedStore(LocalStore(":memory:"), remote=remote)
+
+        assert [r["id"] for r in store.query_records("scan_history")] == ["r1"]
+        store.query_records("scan_history")
+        remote.query_records.assert_called_once()
+
+    def test_sync_uses_server_watermark_not_local_clock(self):
+        """Records written locally with a later clock do not hide older-stamped remote records."""
+        server_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        remote = MagicMock()
+        remote.save_record.return_value = (True, "local-write")
+        remote.query_records.return_value = [{"id": "r1", "standard": "DPDPA", "createdAt": server_time}]
+        store = CachedStore(LocalStore(":memory:"), remote=remote, sync_interval=0)
+
+        store.save_record("scan_history", {"standard": "GDPR"})
+        store.query_records("scan_history")
+        assert remote.query_records.call_args.kwargs["filters"] is None
+
+        store.query_records("scan_history")
+        assert remote.query_records.call_args.kwargs["filters"] == [("createdAt", ">=", server_time)]
+
+    def test_collection_is_resynced_after_the_interval(self):
+        """Records written by another instance show up once the sync interval has passed."""
+        remote = MagicMock()
+        remote.query_records.return_value = []
+        store = CachedStore(LocalStore(":memory:"), remote=remote, sync_interval=60)
+
+        store.query_records("scan_history")
+        remote.query_records.return_value = [
+            {"id": "r2", "standard": "HIPAA", "createdAt": datetime.now(timezone.utc)}
+        ]
+        with patch('services.local_store.time.monotonic', return_value=time.monotonic() + 61):
+            assert [r["id"] for r in store.query_records("scan_history")] == ["r2"]
+        assert remote.query_records.call_count == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+"""
+Automated tests for latency-aware model routing.
+"""
+
+import pytest
+import time
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services.model_router import DeadlineExceeded, LatencyTracker, ModelRouter, Target, MIN_SAMPLES
+
+PRIMARY = Target("gemini-flash", "us-central1")
+SECONDARY = Target("gemini-flash", "europe-west4")
+
+def _call(delays: dict, calls: list):
+    """Fake request: sleeps per target, raises if the delay is an exception."""
+    def call(target):
+        calls.append(target)
+        delay = delays[target]
+        if isinstance(delay, Exception):
+            raise delay
+        time.sleep(delay)
+        return f"answer from {target.region}"
+    return call
+
+class TestModelRouter:
+    """Test cases for deadlines, failover and hedging."""
+
+    def test_fast_primary_is_not_hedged(self):
+        """A call that answers quickly uses a single target."""
+        calls = []
+        result = ModelRouter().run(_call({PRIMARY: 0, SECONDARY: 0}, calls), [PRIMARY, SECONDARY],
+                                   deadline=5, hedge_percentile=90)
+        assert result == "answer from us-central1"
+        assert calls == [PRIMARY]
+
+    def test_slow_primary_is_hedged_and_first_answer_wins(self):
+        """Past the latency percentile, a duplicate goes to the next target."""
+        router = ModelRouter()
+        for _ in range(MIN_SAMPLES):
+            router.tracker.record(PRIMARY, 0.05)
+        calls = []
+        started = time.monotonic()
+        result = router.run(_call({PRIMARY: 2, SECONDARY: 0}, calls), [PRIMARY, SECONDARY],
+                            deadline=5, hedge_percentile=90)
+        assert result == "answer from europe-west4"
+        assert calls == [PRIMARY, SECONDARY]
+        assert time.monotonic() - started < 1
+
+    def test_failure_fails_over(self):
+        """An error on one target moves on to the next."""
+        calls = []
+        result = ModelRouter().run(_call({PRIMARY: RuntimeError("503"), SECONDARY: 0}, calls),
+                                   [PRIMARY, SECONDARY], deadline=5)
+        assert result == "answer from europe-west4"
+
+    def test_every_target_failing_raises_the_last_error(self):
+        """With no target left, the last error is raised."""
+        with pytest.raises(RuntimeError, match="quota"):
+            ModelRouter().run(_call({PRIMARY: RuntimeError("503"), SECONDARY: RuntimeError("quota")}, []),
+                              [PRIMARY, SECONDARY], deadline=5)
+
+    def test_deadline(self):
+        """A call that outlives its deadline raises instead of blocking."""
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            ModelRouter().run(_call({PRIMARY: 2}, []), [PRIMARY], deadline=0.2)
+        assert time.monotonic() - started < 1
+
+    def test_targets_are_ordered_by_observed_latency(self):
+        """The faster target moves to the front once there are enough samples."""
+        tracker = LatencyTracker()
+        for _ in range(MIN_SAMPLES):
+            tracker.record(PRIMARY, 3.0)
+            tracker.record(SECONDARY, 0.5)
+        assert ModelRouter(tracker=tracker).order([PRIMARY, SECONDARY]) == [SECONDARY, PRIMARY]
+        assert ModelRouter().order([PRIMARY, SECONDARY]) == [PRIMARY, SECONDARY]
+
+    def test_resource_name_pins_the_region(self):
+        """Targets resolve to regional resource names."""
+        assert SECONDARY.resource_name("proj") == \
+            "projects/proj/locations/europe-west4/publishers/google/models/gemini-flash"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+"""
+Automated tests for the regulation corpus index and grounded Co-Pilot prompts.
+"""
+
+import pytest
+import json
+import numpy as np
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import ai_copilot, regulation_index
+from src.modules.regulation_index import RegulationIndex, load_corpus, tokenize
+
+@pytest.fixture
+def index(tmp_path):
+    return RegulationIndex(index_dir=str(tmp_path / "index"))
+
+class TestRegulationIndex:
+    """Test cases for building and searching the index."""
+
+    def test_corpus_is_well_formed(self):
+        """Every clause has a unique ID and a known compliance standard."""
+        clauses = load_corpus()
+        assert len({clause.id for clause in clauses}) == len(clauses)
+        assert {clause.standard for clause in clauses} == {
+            "India (DPDPA/CDSCO)", "USA (HIPAA/FDA)", "EU (GDPR/MDR)"}
+
+    def test_tokenize(self):
+        """Stopwords are dropped and simple plurals folded."""
+        assert tokenize("What are the Audit Controls for ePHI?") == ["audit", "control", "ephi"]
+
+    @pytest.mark.parametrize("query, citation", [
+        ("How soon must a personal data breach be notified to the supervisory authority?", "GDPR Art. 33"),
+        ("secure time-stamped audit trails for electronic records", "21 CFR 11.10"),
+        ("verifiable parental consent before processing a child's data", "DPDPA 2023 s.9"),
+        ("Safe Harbor de-identification identifiers", "45 CFR 164.514(b)"),
+    ])
+    def test_relevant_clause_ranks_first(self, index, query, citation):
+        """BM25 puts the clause that answers the question first."""
+        assert index.search(query)[0].clause.citation == citation
+
+    def test_standard_filter(self, index):
+        """Results can be restricted to one compliance standard."""
+        results = index.search("breach notification", k=5, standard="USA (HIPAA/FDA)")
+        assert results and all(r.clause.regulation == "HIPAA" for r in results)
+
+    def test_off_topic_query_returns_nothing(self, index):
+        """A question unrelated to the corpus gets no clauses."""
+        assert index.search("What is the weather in Paris today?") == []
+
+    def test_index_is_memory_mapped_and_reused(self, tmp_path, index):
+        """A second instance loads the saved postings without rebuilding."""
+        with patch.object(RegulationIndex, "_build") as mock_build:
+            reopened = RegulationIndex(index_dir=index.index_dir)
+        mock_build.assert_not_called()
+        assert isinstance(reopened._doc_ids, np.memmap)
+        assert reopened.search("minimum necessary")[0].clause.id == "hipaa-164-502b"
+
+    def test_changed_corpus_rebuilds(self, tmp_path, index):
+        """The index is rebuilt when the corpus no longer matches it."""
+        corpus = tmp_path / "corpus.jsonl"
+        corpus.write_text(json.dumps({"id": "x-1", "regulation": "X", "standard": "EU (GDPR/MDR)",
+                                      "citation": "X 1", "title": "Widgets", "text": "Widgets must be blue."}) + "\n")
+        rebuilt = RegulationIndex(corpus_path=str(corpus), index_dir=index.index_dir)
+        assert len(rebuilt) == 1
+        assert rebuilt.search("blue widgets", min_score=0.0)[0].clause.id == "x-1"
+
+class TestGroundedCopilot:
+    """Test cases for reference clauses in Co-Pilot prompts."""
+
+    def test_prompt_includes_relevant_clauses_only(self, index):
+        """The prompt carries the top clauses for the question, not the whole corpus."""
+        with patch.object(regulation_index, "get_index", return_value=index):
+            prompt = ai_copilot.build_prompt("Within how many hours must a GDPR data breach be reported?")
+        assert "[GDPR Art. 33]" in prompt
+        assert prompt.count("\n- [") == ai_copilot.REFERENCE_CLAUSES
+        assert "Rule 11" not in prompt
+
+    def test_unavailable_index_still_answers(self):
+        """If the index cannot be built, the question is sent without clauses."""
+        ai_copilot.answer_cache.ensure_version("reset")
+        with patch.object(regulation_index, "get_index", side_effect=OSError("read-only file system")), \
+             patch('src.services.gcp_vertex_ai.generate_text', return_value="An answer.") as mock_vertex_ai:
+            assert ai_copilot.answer_question("What does GDPR Article 32 require?") == "An answer."
+        assert "REFERENCE CLAUSES" not in mock_vertex_ai.call_args[0][0]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,116 @@
+"""
+Automated tests for the shared requirements index.
+"""
+
+import pytest
+import json
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules.requirements_index import build_index, get_index
+from src.modules.test_case_generator import generate_test_cases_from_text
+from src.modules.compliance_scanner import audit_extracted_text
+
+DOCUMENT = """Système de télémédecine
+1. SECURITY
+REQ-001: Patient data shall be encrypted at rest.
+- [REQ-002] Sessions expire
+  after 15 minutes.
+# Retention
+NFR-3.1 Records are kept for 7 years.
+REQ-001: Duplicate definition.
+"""
+
+class TestRequirementsIndex:
+    """Test cases for parsing and looking up requirements."""
+
+    def test_records_hold_section_text_and_byte_span(self):
+        """Each requirement knows its section, normalised text and byte span."""
+        index = build_index(DOCUMENT)
+        assert index.ids == ["REQ-001", "REQ-002", "NFR-3.1"]
+
+        requirement = index.get("REQ-002")
+        assert requirement.section == "1. SECURITY"
+        assert requirement.text == "Sessions expire after 15 minutes."
+        start, end = requirement.span
+        assert DOCUMENT.encode("utf-8")[start:end].decode("utf-8").startswith("- [REQ-002]")
+        assert index.get("NFR-3.1").section == "Retention"
+
+    def test_lookup_subset_and_prompt_text(self):
+        """Lookups are by ID and subsets keep document order."""
+        index = build_index(DOCUMENT)
+        assert "REQ-001" in index and "REQ-999" not in index
+        assert [r.id for r in index.subset(["NFR-3.1", "REQ-001", "X-1"])] == ["REQ-001", "NFR-3.1"]
+        assert index.to_prompt_text(index.subset(["REQ-001"])) == \
+            "REQ-001 (1. SECURITY): Patient data shall be encrypted at rest."
+
+    def test_coverage(self):
+        """Coverage splits referenced IDs into covered, uncovered and unknown."""
+        coverage = build_index(DOCUMENT).coverage(["REQ-001", "REQ-001", "FR-9", None])
+        assert coverage == {"covered": ["REQ-001"], "uncovered": ["REQ-002", "NFR-3.1"], "unknown": ["FR-9"]}
+
+    def test_only_document_label_prefixes_are_references(self):
+        """Strings like AES-256 match the ID pattern but are not requirement labels of this document."""
+        index = build_index(DOCUMENT)
+        assert index.labelled(["REQ-404", "AES-256", "SHA-256", "NFR-9", None]) == ["REQ-404", "NFR-9"]
+
+    def test_text_outside_requirements_is_kept(self):
+        """Prose under headings that carry no requirement ID is kept as unlabelled text."""
+        index = build_index("REQ-001: Users log in.\n# Audit\nAdmins can export the audit log as CSV.\n")
+        assert index.unlabelled_text == "# Audit\nAdmins can export the audit log as CSV."
+
+    def test_index_is_built_once_per_document(self):
+        """The index is cached by the document's content hash."""
+        assert get_index(DOCUMENT) is get_index(DOCUMENT)
+        assert get_index(DOCUMENT + "REQ-004 More.") is not get_index(DOCUMENT)
+
+    def test_text_without_requirement_ids(self):
+        """Documents without requirement IDs produce an empty index."""
+        assert len(build_index("The system stores data.")) == 0
+
+class TestTestGeneratorUsesIndex:
+    """Test cases for the test case generator consuming the index."""
+
+    def test_prompt_gets_requirements_and_result_gets_coverage(self):
+        """Gemini receives the parsed requirement list and the result records coverage."""
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            mock_vertex_ai.return_value = json.dumps([
+                {"id": "TC001", "requirement_id": "REQ-001", "type": "positive",
+                 "description": "d", "steps": "s", "expected_result": "e"},
+                {"id": "TC002", "requirement_id": "REQ-404", "type": "negative",
+                 "description": "d", "steps": "s", "expected_result": "e"},
+            ])
+            df = generate_test_cases_from_text(DOCUMENT)
+
+        assert "REQ-002 (1. SECURITY): Sessions expire after 15 minutes." in mock_vertex_ai.call_args[0][0]
+        assert df.attrs["coverage"]["covered"] == ["REQ-001"]
+        assert df.attrs["coverage"]["unknown"] == ["REQ-404"]
+
+    def test_unlabelled_text_is_its_own_shard(self):
+        """Sharded generation also covers text that is not under a requirement ID."""
+        text = "REQ-001: Users log in.\nREQ-002: Users log out.\n# Audit\nAdmins can export the audit log.\n"
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value=json.dumps([
+                {"id": "TC001", "requirement_id": "REQ-001", "type": "positive",
+                 "description": "d", "steps": "s", "expected_result": "e"}])) as mock_vertex_ai:
+            generate_test_cases_from_text(text, sharded=True)
+
+        prompts = [call[0][0] for call in mock_vertex_ai.call_args_list]
+        assert len(prompts) == 2
+        assert sum("Admins can export the audit log." in prompt for prompt in prompts) == 1
+
+class TestScannerTraceability:
+    """Test cases for the traceability section of compliance reports."""
+
+    def test_algorithm_names_are_not_unknown_references(self):
+        """AES-256 in a finding is not reported as a requirement missing from the document."""
+        with patch('src.services.gcp_vertex_ai.generate_text',
+                   return_value="[Pass] REQ-001 uses AES-256.\n[Risk - High] REQ-404 is not met."):
+            report = audit_extracted_text(DOCUMENT, "A SOC 2 auditor")
+        assert "- **References not found in the document:** REQ-404" in report.splitlines()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
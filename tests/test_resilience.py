@@ -0,0 +1,187 @@
+"""
+Automated tests for the GCP resilience layer.
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from google.api_core import exceptions as api_exceptions
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services import resilience
+from src.services.resilience import (
+    AIMDLimiter, CallPolicy, CircuitBreaker, CircuitOpenError, PERMANENT, QUOTA, TRANSIENT, classify,
+)
+
+def _policy(**kwargs) -> CallPolicy:
+    return CallPolicy("test", base_delay=0, **kwargs)
+
+class TestClassification:
+    """Test cases for mapping errors to retry behaviour."""
+
+    def test_status_codes(self):
+        """Quota, transient and permanent errors are told apart."""
+        assert classify(api_exceptions.ResourceExhausted("quota")) == QUOTA
+        assert classify(api_exceptions.ServiceUnavailable("503")) == TRANSIENT
+        assert classify(api_exceptions.DeadlineExceeded("slow")) == TRANSIENT
+        assert classify(api_exceptions.InvalidArgument("bad")) == PERMANENT
+        assert classify(api_exceptions.PermissionDenied("no")) == PERMANENT
+        assert classify(ConnectionError("reset")) == TRANSIENT
+        assert classify(ValueError("blocked")) == PERMANENT
+
+class TestCallPolicy:
+    """Test cases for retries, the circuit breaker and the concurrency limiter."""
+
+    def test_transient_errors_are_retried(self):
+        """A 503 followed by success returns the result."""
+        fn = MagicMock(side_effect=[api_exceptions.ServiceUnavailable("503"), "ok"])
+        assert _policy().call(fn, 1, key="v") == "ok"
+        assert fn.call_count == 2
+        fn.assert_called_with(1, key="v")
+
+    def test_permanent_errors_are_not_retried(self):
+        """Bad requests fail on the first attempt."""
+        fn = MagicMock(side_effect=api_exceptions.InvalidArgument("bad"))
+        with pytest.raises(api_exceptions.InvalidArgument):
+            _policy().call(fn)
+        assert fn.call_count == 1
+
+    def test_attempts_run_out(self):
+        """The last error is raised once every attempt failed."""
+        fn = MagicMock(side_effect=api_exceptions.ServiceUnavailable("503"))
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            _policy(max_attempts=3, breaker=CircuitBreaker(failure_threshold=10)).call(fn)
+        assert fn.call_count == 3
+
+    def test_breaker_opens_and_recovers(self):
+        """Repeated failures open the breaker; after the timeout one trial call closes it."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        policy = _policy(max_attempts=1, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(api_exceptions.ServiceUnavailable):
+                policy.call(MagicMock(side_effect=api_exceptions.ServiceUnavailable("503")))
+
+        fn = MagicMock(return_value="ok")
+        with pytest.raises(CircuitOpenError):
+            policy.call(fn)
+        fn.assert_not_called()
+
+        time.sleep(0.15)
+        assert breaker.state == "half_open"
+        assert policy.call(fn) == "ok"
+        assert breaker.state == "closed"
+
+    def test_slot_timeout_does_not_wedge_half_open_breaker(self):
+        """Waiting for a slot in vain does not use up the breaker's trial call."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        limiter = AIMDLimiter(initial=1)
+        policy = CallPolicy("test", max_attempts=1, base_delay=0, breaker=breaker, limiter=limiter,
+                            acquire_timeout=0.01)
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            policy.call(MagicMock(side_effect=api_exceptions.ServiceUnavailable("503")))
+        time.sleep(0.1)
+
+        assert limiter.acquire()
+        with pytest.raises(TimeoutError):
+            policy.call(MagicMock(return_value="ok"))
+        limiter.release()
+
+        assert breaker.state == "half_open"
+        assert policy.call(MagicMock(return_value="ok")) == "ok"
+        assert breaker.state == "closed"
+
+    def test_open_breaker_releases_the_slot(self):
+        """A call rejected by the breaker gives its concurrency slot back."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        limiter = AIMDLimiter(initial=1)
+        policy = _policy(max_attempts=1, breaker=breaker, limiter=limiter)
+        with pytest.raises(api_exceptions.ServiceUnavailable):
+            policy.call(MagicMock(side_effect=api_exceptions.ServiceUnavailable("503")))
+        with pytest.raises(CircuitOpenError):
+            policy.call(MagicMock())
+        assert limiter.in_flight == 0
+
+    def test_quota_errors_halve_the_limit_and_successes_grow_it(self):
+        """AIMD: multiplicative decrease on 429, additive increase on success."""
+        limiter = AIMDLimiter(initial=8, cooldown=0)
+        policy = _policy(limiter=limiter)
+        policy.call(MagicMock(side_effect=[api_exceptions.ResourceExhausted("429"), "ok"]))
+        assert limiter.limit == 4
+        for _ in range(4):
+            limiter.on_success()
+        assert limiter.limit == 5
+
+    def test_limiter_bounds_concurrency(self):
+        """No more calls run at once than the current limit."""
+        limiter = AIMDLimiter(initial=2)
+        policy = _policy(limiter=limiter)
+        peak, lock = [0], threading.Lock()
+
+        def work():
+            with lock:
+                peak[0] = max(peak[0], limiter.in_flight)
+            time.sleep(0.05)
+
+        threads = [threading.Thread(target=policy.call, args=(work,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] <= 3  # The limit grows by 1/limit per success while the threads run.
+
+    def test_services_share_one_policy(self):
+        """Service modules get the same policy object per service name."""
+        assert resilience.get_policy("dlp") is resilience.get_policy("dlp")
+        assert resilience.get_policy("vertex_ai/us-central1") is not resilience.get_policy("vertex_ai/europe-west4")
+
+class TestServiceIntegration:
+    """Test cases for the service modules using the policy."""
+
+    def test_document_ai_retries_transient_errors(self):
+        """A transient Document AI failure no longer surfaces as an error string."""
+        from src.services import gcp_doc_ai
+        result = MagicMock()
+        result.document.text = "extracted"
+        client = MagicMock()
+        client.processor_path.return_value = "projects/p/locations/us/processors/x"
+        client.process_document.side_effect = [api_exceptions.ServiceUnavailable("503"), result]
+        with patch.dict(os.environ, {"GCP_PROJECT_ID": "p", "DOCAI_PROCESSOR_ID": "x"}), \
+             patch('src.services.gcp_doc_ai.documentai.DocumentProcessorServiceClient', return_value=client), \
+             patch('src.services.resilience.backoff_delay', return_value=0):
+            assert gcp_doc_ai.process_document(b"pdf", "application/pdf") == "extracted"
+
+    def test_vertex_stream_retries_before_the_first_chunk(self):
+        """A streamed request that fails to open is retried under the region's policy."""
+        from src.services import gcp_vertex_ai
+        chunk = MagicMock()
+        chunk.text = "hello"
+        model = MagicMock()
+        model.generate_content.side_effect = [api_exceptions.ServiceUnavailable("503"), iter([chunk, chunk])]
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+             patch('src.services.resilience.backoff_delay', return_value=0), \
+             patch('src.services.resilience._policies', {}):
+            assert list(gcp_vertex_ai.stream_text("prompt")) == ["hello", "hello"]
+        assert model.generate_content.call_count == 2
+
+    def test_vertex_stream_error_after_retries(self):
+        """Once retries are used up the stream yields a single error message."""
+        from src.services import gcp_vertex_ai
+        model = MagicMock()
+        model.generate_content.side_effect = api_exceptions.ServiceUnavailable("503")
+        with patch('src.services.gcp_vertex_ai.model', model), \
+             patch('src.services.gcp_vertex_ai._client_for', return_value=model), \
+             patch('src.services.resilience.backoff_delay', return_value=0), \
+             patch('src.services.resilience._policies', {}), \
+             patch.dict(os.environ, {"GCP_RETRY_ATTEMPTS": "2"}):
+            chunks = list(gcp_vertex_ai.stream_text("prompt"))
+        assert len(chunks) == 1 and chunks[0].startswith("Error")
+        assert model.generate_content.call_count == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+"""
+Automated tests for the rule-pack pre-screen.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import compliance_scanner, rule_packs
+from src.modules.document_sections import segment_text
+
+GDPR_PERSONA = compliance_scanner.COMPLIANCE_STANDARDS["EU (GDPR/MDR)"]["expert_persona"]
+HIPAA_PERSONA = compliance_scanner.COMPLIANCE_STANDARDS["USA (HIPAA/FDA)"]["expert_persona"]
+
+DOCUMENT = """REQ-001: Patient records shall be encrypted at rest using AES-256.
+REQ-002: All traffic uses TLS 1.3.
+REQ-003: Data is kept for a reasonable period.
+REQ-004: Records may be shared with third-party marketing partners.
+REQ-005: Clinicians can view today's appointments.
+"""
+
+class TestRulePacks:
+    """Test cases for single-pass rule matching."""
+
+    def test_every_standard_has_a_pack(self):
+        """Each supported standard compiles to a rule pack."""
+        for standard in compliance_scanner.COMPLIANCE_STANDARDS:
+            assert rule_packs.get_rule_pack(standard) is not None
+        assert rule_packs.get_rule_pack("Unknown") is None
+
+    def test_pass_and_warning_findings(self):
+        """Matches produce Pass or Warning findings tied to their section."""
+        pack = rule_packs.get_rule_pack("EU (GDPR/MDR)")
+        result = pack.screen(DOCUMENT, segment_text(DOCUMENT))
+        by_rule = {(f.rule_id, f.section_key): f.severity for f in result.findings}
+
+        assert by_rule[("encryption-at-rest", "REQ-001")] == "Pass"
+        assert by_rule[("encryption-in-transit", "REQ-002")] == "Pass"
+        assert by_rule[("retention-period", "REQ-003")] == "Warning - Medium"
+        assert by_rule[("consent", None)] == "Warning - Medium"
+
+    def test_only_ambiguous_sections_are_residual(self):
+        """Sections with judgement-heavy wording or no matches stay with the LLM."""
+        pack = rule_packs.get_rule_pack("EU (GDPR/MDR)")
+        result = pack.screen(DOCUMENT, segment_text(DOCUMENT))
+
+        assert [s.key for s in result.resolved] == ["REQ-001", "REQ-002", "REQ-003"]
+        assert [s.key for s in result.residual] == ["REQ-004", "REQ-005"]
+
+    def test_escalation_wins_over_a_match(self):
+        """A short section that matches a rule but mentions plaintext goes to the LLM."""
+        text = "REQ-9: Passwords are stored in plaintext; backups are encrypted at rest.\n"
+        result = rule_packs.get_rule_pack("USA (HIPAA/FDA)").screen(text, segment_text(text))
+        assert [s.key for s in result.residual] == ["REQ-9"]
+
+    def test_negated_requirement_is_left_to_the_llm(self):
+        """A negated match is not reported as a Pass, nor marked as decided for the LLM."""
+        text = "REQ-001: Patient records shall not be encrypted at rest.\nREQ-002: All traffic uses TLS 1.3.\n"
+        result = rule_packs.get_rule_pack("USA (HIPAA/FDA)").screen(text, segment_text(text))
+
+        assert [s.key for s in result.residual] == ["REQ-001"]
+        assert not [f for f in result.findings if f.section_key == "REQ-001"]
+        assert "Encryption of stored data is specified." not in result.decided_checks()
+        assert "Encryption in transit is specified." in result.decided_checks()
+
+    def test_negated_requirement_reaches_gemini_undecided(self):
+        """The audit prompt contains the negated requirement and does not tell Gemini to skip its check."""
+        text = "REQ-001: Patient records shall not be encrypted at rest.\n"
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="[Risk - High] No encryption.") as mock_vertex_ai:
+            report = compliance_scanner.audit_extracted_text(text, HIPAA_PERSONA)
+
+        prompt = mock_vertex_ai.call_args[0][0]
+        assert "shall not be encrypted at rest" in prompt
+        assert "Encryption of stored data is specified" not in prompt
+        assert "[Pass]" not in report
+
+    def test_match_does_not_decide_unexplained_content(self):
+        """A section that matches a rule but also says something the rules do not cover goes to the LLM."""
+        text = ("REQ-1: Write full patient SSNs into application logs for the audit trail.\n"
+                "REQ-2: Records are encrypted at rest.\n")
+        result = rule_packs.get_rule_pack("USA (HIPAA/FDA)").screen(text, segment_text(text))
+        assert [s.key for s in result.residual] == ["REQ-1"]
+        assert [s.key for s in result.resolved] == ["REQ-2"]
+
+class TestScannerPrescreen:
+    """Test cases for the pre-screen inside the compliance audit."""
+
+    def test_only_residual_sections_reach_gemini(self):
+        """Decided sections are left out of the prompt and their findings are appended."""
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            mock_vertex_ai.return_value = "[Risk - High] REQ-004 shares data for marketing."
+            report = compliance_scanner.audit_extracted_text(DOCUMENT, GDPR_PERSONA)
+
+        prompt = mock_vertex_ai.call_args[0][0]
+        assert "REQ-004" in prompt and "REQ-005" in prompt
+        assert "REQ-001" not in prompt
+        assert "do not report them again" in prompt
+        assert report.startswith("[Risk - High]")
+        assert "### Rule-Based Findings" in report
+
+    def test_fully_decided_document_skips_gemini(self):
+        """When every section is decided locally, no LLM call is made."""
+        text = "REQ-001: Data is encrypted at rest.\nREQ-002: All traffic uses TLS 1.3.\n"
+        with patch('src.services.gcp_vertex_ai.generate_text') as mock_vertex_ai:
+            report = compliance_scanner.audit_extracted_text(text, GDPR_PERSONA)
+
+        mock_vertex_ai.assert_not_called()
+        assert "[Pass]" in report
+
+    def test_section_with_extra_content_reaches_gemini(self):
+        """A rule match alone does not keep a risky requirement away from the audit."""
+        text = "REQ-001: Data is encrypted at rest.\nREQ-002: Write full patient SSNs into the audit log.\n"
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="[Risk - High] SSNs are logged.") as mock_vertex_ai:
+            compliance_scanner.audit_extracted_text(text, HIPAA_PERSONA)
+        assert "Write full patient SSNs" in mock_vertex_ai.call_args[0][0]
+
+    def test_custom_persona_is_not_prescreened(self):
+        """Personas outside the supported standards get the plain audit."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="[Pass] ok") as mock_vertex_ai:
+            report = compliance_scanner.audit_extracted_text(DOCUMENT, "A SOC 2 auditor")
+        assert "Rule-Based Findings" not in report
+        assert "REQ-001" in mock_vertex_ai.call_args[0][0]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
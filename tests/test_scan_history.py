@@ -0,0 +1,92 @@
+"""
+Automated tests for the scan history store.
+"""
+
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import scan_history
+from services.local_store import LocalStore
+
+REPORT = """
+[Risk - High] Consent not recorded (REQ-001)
+Record explicit consent before processing.
+[Warning - Medium] Retention period undefined (REQ-004)
+[Pass] Data encrypted at rest (REQ-007)
+"""
+
+@pytest.fixture
+def store():
+    store = LocalStore(":memory:")
+    with patch.object(scan_history.local_store, "get_store", return_value=store), \
+         patch.object(scan_history.gcp_firestore, "db", None):
+        scan_history._cache.invalidate()
+        scan_history._report_cache.invalidate()
+        yield store
+
+class TestScanHistory:
+    """Test cases for recording and browsing compliance scans."""
+
+    def test_summarize_report(self):
+        """Finding counts and highest severity are derived from the report tags."""
+        summary = scan_history.summarize_report(REPORT)
+        assert summary == {"risk_count": 1, "warning_count": 1, "pass_count": 1, "max_severity": "High"}
+        assert scan_history.summarize_report("[Pass] ok")["max_severity"] == "Pass"
+        assert scan_history.summarize_report("nothing")["max_severity"] == "None"
+
+    def test_record_and_list(self, store):
+        """Recorded scans are listed as summaries without the report body."""
+        ok, scan_id = scan_history.record_scan("spec.pdf", b"content", "EU (GDPR/MDR)", REPORT)
+        scans, cursor = scan_history.list_scans()
+
+        assert ok
+        assert [s["id"] for s in scans] == [scan_id]
+        assert "report" not in scans[0]
+        assert cursor is None
+        assert scan_history.get_report(scans[0]) == REPORT
+
+    def test_filters_and_pagination(self, store):
+        """Listing filters by standard and severity and pages with a cursor."""
+        for i in range(5):
+            scan_history.record_scan(f"spec{i}.pdf", bytes([i]), "USA (HIPAA/FDA)", REPORT)
+        scan_history.record_scan("clean.pdf", b"clean", "USA (HIPAA/FDA)", "[Pass] all good")
+        scan_history.record_scan("eu.pdf", b"eu", "EU (GDPR/MDR)", REPORT)
+
+        first, cursor = scan_history.list_scans(standard="USA (HIPAA/FDA)", severity="High", page_size=3)
+        second, last_cursor = scan_history.list_scans(standard="USA (HIPAA/FDA)", severity="High",
+                                                     page_size=3, cursor=cursor)
+
+        names = [s["file_name"] for s in first + second]
+        assert len(names) == 5 and len(set(names)) == 5
+        assert "clean.pdf" not in names and "eu.pdf" not in names
+        assert last_cursor is None
+
+    def test_fetch_by_document_hash(self, store):
+        """Scans of the same content are found by its hash."""
+        scan_history.record_scan("a.pdf", b"same", "EU (GDPR/MDR)", REPORT)
+        scan_history.record_scan("b.pdf", b"same", "USA (HIPAA/FDA)", REPORT)
+        scan_history.record_scan("c.pdf", b"other", "EU (GDPR/MDR)", REPORT)
+
+        scans = scan_history.get_scans_by_hash(scan_history.content_hash(b"same"))
+        assert {s["file_name"] for s in scans} == {"a.pdf", "b.pdf"}
+
+    def test_list_is_served_from_cache(self, store):
+        """Repeated listings hit the read-through cache until a new scan is recorded."""
+        scan_history.record_scan("a.pdf", b"a", "EU (GDPR/MDR)", REPORT)
+        with patch.object(store, "query_records", wraps=store.query_records) as query:
+            scan_history.list_scans()
+            scan_history.list_scans()
+            assert query.call_count == 1
+
+            scan_history.record_scan("b.pdf", b"b", "EU (GDPR/MDR)", REPORT)
+            scans, _ = scan_history.list_scans()
+            assert query.call_count == 2
+            assert len(scans) == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
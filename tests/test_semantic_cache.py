@@ -0,0 +1,80 @@
+"""
+Automated tests for the Co-Pilot semantic answer cache.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.semantic_cache import SemanticCache, normalize
+from src.modules import ai_copilot
+
+class TestSemanticCache:
+    """Test cases for similarity lookups."""
+
+    def setup_method(self):
+        self.cache = SemanticCache(threshold=0.85)
+        self.cache.store("What is HIPAA?", "HIPAA answer")
+        self.cache.store("What does GDPR require for consent?", "Consent answer")
+
+    def test_normalize(self):
+        """Case, punctuation and contractions are normalised."""
+        assert normalize("What's  HIPAA's scope?!") == "what is hipaa scope"
+
+    @pytest.mark.parametrize("query", ["what's hipaa", "Explain HIPAA basics", "HIPAA?", "what is hipaa"])
+    def test_paraphrases_hit(self, query):
+        """Rewordings of a cached question return its answer."""
+        hit = self.cache.lookup(query)
+        assert hit is not None and hit.answer == "HIPAA answer"
+
+    @pytest.mark.parametrize("query", ["What is GDPR?", "HIPAA breach notification deadline", "What is it?"])
+    def test_different_questions_miss(self, query):
+        """Questions about something else, or about nothing in particular, are not served from the cache."""
+        assert self.cache.lookup(query) is None
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when the cache is full."""
+        cache = SemanticCache(maxsize=2)
+        cache.store("What is HIPAA?", "a")
+        cache.store("What is GDPR?", "b")
+        cache.lookup("What is HIPAA?")
+        cache.store("What is DPDPA?", "c")
+        assert cache.lookup("What is GDPR?") is None
+        assert cache.lookup("What is HIPAA?").answer == "a"
+        assert len(cache) == 2
+
+    def test_version_change_clears(self):
+        """A new prompt template version invalidates every answer."""
+        self.cache.ensure_version("v1")
+        self.cache.store("What is HIPAA?", "old")
+        self.cache.ensure_version("v2")
+        assert self.cache.lookup("What is HIPAA?") is None
+
+class TestCopilotAnswers:
+    """Test cases for the Co-Pilot using the cache."""
+
+    def setup_method(self):
+        ai_copilot.answer_cache.ensure_version("reset")
+
+    def test_paraphrase_skips_the_model(self):
+        """The second, reworded question is answered without a model call."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="**HIPAA** is a US law.") as mock_vertex_ai:
+            first = ai_copilot.answer_question("What is HIPAA?")
+            second = ai_copilot.answer_question("what's hipaa")
+        assert first == second == "**HIPAA** is a US law."
+        mock_vertex_ai.assert_called_once()
+        assert '"What is HIPAA?"' in mock_vertex_ai.call_args[0][0]
+
+    def test_errors_are_not_cached(self):
+        """A failed call is retried on the next question."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded") as mock_vertex_ai:
+            ai_copilot.answer_question("What is HIPAA?")
+            ai_copilot.answer_question("What is HIPAA?")
+        assert mock_vertex_ai.call_count == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
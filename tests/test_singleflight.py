@@ -0,0 +1,106 @@
+"""
+Automated tests for in-flight request coalescing.
+"""
+
+import pytest
+import threading
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.cache import SingleFlight
+from src.services import gcp_doc_ai, gcp_vertex_ai
+
+def _run_concurrently(count: int, fn) -> list:
+    results = [None] * count
+    def run(i):
+        results[i] = fn()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+def _release_when_coalesced(flight: SingleFlight, count: int, release: threading.Event) -> None:
+    """Releases the leader once `count` more callers are waiting on it."""
+    target = flight.coalesced + count
+    def watch():
+        while flight.coalesced < target:
+            threading.Event().wait(0.01)
+        release.set()
+    threading.Thread(target=watch, daemon=True).start()
+
+class TestSingleFlight:
+    """Test cases for sharing one in-flight call."""
+
+    def test_concurrent_identical_calls_share_one_call(self):
+        """Callers with the same key wait for the leader's result."""
+        flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return "answer"
+
+        leader = threading.Thread(target=flight.do, args=("k", slow))
+        leader.start()
+        assert started.wait(timeout=5)
+        _release_when_coalesced(flight, 3, release)
+        assert _run_concurrently(3, lambda: flight.do("k", slow)) == ["answer"] * 3
+        leader.join()
+        assert len(calls) == 1
+
+    def test_exceptions_are_shared_and_nothing_is_cached(self):
+        """A failed call raises in every waiter, and the next call runs again."""
+        flight = SingleFlight()
+        with pytest.raises(ValueError):
+            flight.do("k", MagicMock(side_effect=ValueError("boom")))
+        assert flight.do("k", lambda: "fresh") == "fresh"
+
+    def test_different_keys_do_not_wait(self):
+        """Only identical keys are coalesced."""
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1) == 1 and flight.do("b", lambda: 2) == 2
+        assert flight.coalesced == 0
+
+class TestServiceCoalescing:
+    """Test cases for the coalesced service functions."""
+
+    def test_identical_gemini_prompts_make_one_request(self):
+        """Sessions asking the same question at once share one Gemini call."""
+        release = threading.Event()
+        model = MagicMock()
+
+        def generate(prompt, generation_config=None):
+            release.wait(timeout=5)
+            return MagicMock(text=f"answer to {prompt}")
+
+        model.generate_content.side_effect = generate
+        with patch('src.services.gcp_vertex_ai.model', model):
+            _release_when_coalesced(gcp_vertex_ai.inflight, 3, release)
+            results = _run_concurrently(4, lambda: gcp_vertex_ai.generate_text("What is HIPAA?", profile="copilot"))
+        assert results == ["answer to What is HIPAA?"] * 4
+        assert model.generate_content.call_count == 1
+
+    def test_identical_documents_are_processed_once(self):
+        """The same upload from several sessions goes to Document AI once."""
+        release = threading.Event()
+
+        def process(file_content, mime_type):
+            release.wait(timeout=5)
+            return "text"
+
+        with patch('src.services.gcp_doc_ai._process_document', side_effect=process) as mock_process:
+            _release_when_coalesced(gcp_doc_ai.inflight, 2, release)
+            results = _run_concurrently(3, lambda: gcp_doc_ai.process_document(b"template", "application/pdf"))
+        assert results == ["text"] * 3
+        assert mock_process.call_count == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,84 @@
+"""
+Automated tests for Gemini's structured (JSON) output mode.
+"""
+
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services import gcp_vertex_ai
+from src.modules.synthetic_data_hub import generate_synthetic_data, infer_columns
+from src.modules.test_case_generator import TEST_CASE_FIELDS, generate_test_cases_from_text
+
+class TestGenerateJson:
+    """Test cases for the Vertex AI JSON wrapper."""
+
+    def test_requests_json_mode_and_decodes(self):
+        """The call sets the JSON MIME type and returns decoded objects."""
+        model = MagicMock()
+        model.generate_content.return_value.text = '[{"a": 1}]'
+        schema = gcp_vertex_ai.object_array_schema({"a": "number"})
+        with patch('src.services.gcp_vertex_ai.model', model):
+            assert gcp_vertex_ai.generate_json("rows", schema, temperature=0.2) == [{"a": 1}]
+
+        config = model.generate_content.call_args.kwargs["generation_config"].to_dict()
+        assert config["response_mime_type"] == "application/json"
+        assert config["temperature"] == pytest.approx(0.2)
+
+    def test_schema_is_inlined_when_the_sdk_cannot_enforce_it(self):
+        """Older SDKs get the schema spelled out in the prompt."""
+        schema = gcp_vertex_ai.object_array_schema({"a": "string"})
+        with patch('src.services.gcp_vertex_ai.SUPPORTS_RESPONSE_SCHEMA', False):
+            assert json.dumps(schema) in gcp_vertex_ai.json_prompt("rows", schema)
+        with patch('src.services.gcp_vertex_ai.SUPPORTS_RESPONSE_SCHEMA', True):
+            assert gcp_vertex_ai.json_prompt("rows", schema) == "rows"
+
+    def test_undecodable_output_and_errors_are_returned_as_text(self):
+        """Cut-off output comes back raw so callers can salvage it; errors pass through."""
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value='[{"a": 1}, {"a"'):
+            assert gcp_vertex_ai.generate_json("rows") == '[{"a": 1}, {"a"'
+        with patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded"):
+            assert gcp_vertex_ai.generate_json("rows") == "Error: quota exceeded"
+
+class TestStructuredCallers:
+    """Test cases for the generators using JSON mode."""
+
+    def test_test_cases_use_the_test_case_schema(self):
+        """Decoded objects are used directly, with the expected keys required."""
+        test_case = dict.fromkeys(TEST_CASE_FIELDS, "x")
+        with patch('src.services.gcp_vertex_ai.generate_json', return_value=[test_case]) as mock_json:
+            df = generate_test_cases_from_text("The system stores data.")
+
+        schema = mock_json.call_args[0][1]
+        assert schema["items"]["required"] == TEST_CASE_FIELDS
+        assert len(df) == 1
+
+    def test_synthetic_schema_uses_columns_from_the_request(self):
+        """Columns listed in the request become required keys typed by their names."""
+        with patch('src.services.gcp_vertex_ai.generate_json', return_value=[{"name": "Ann", "age": 30}]) as mock_json:
+            json_str, df = generate_synthetic_data("5 patients with columns Name, Age and Blood Type.")
+
+        schema = mock_json.call_args[0][1]
+        assert schema["items"]["required"] == ["name", "age", "blood_type"]
+        assert schema["items"]["properties"]["age"] == {"type": "integer"}
+        assert schema["items"]["properties"]["blood_type"] == {"type": "string"}
+        assert df["age"].dtype == "int64"
+
+    def test_infer_columns_without_a_list(self):
+        """Requests that do not list columns get no schema."""
+        assert infer_columns("Generate 10 realistic hospital patients") == []
+        assert infer_columns("orders (fields: order_id, total)") == ["order_id", "total"]
+
+    def test_prose_mentioning_columns_is_not_a_list(self):
+        """Sentences about columns do not invent column names."""
+        assert infer_columns("50 users; the columns for name should be unique") == []
+        assert infer_columns("Add a column with the patient's age") == []
+        assert infer_columns("patients with columns: name, is_smoker, bmi") == ["name", "is_smoker", "bmi"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
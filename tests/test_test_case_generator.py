@@ -5,6 +5,7 @@ Comprehensive automated tests for the test case generator functionality.
 import pytest
 import pandas as pd
 import json
+import re
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
@@ -12,7 +13,7 @@ import os
 # Add the src directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from modules.test_case_generator import generate_test_cases_from_doc
+from modules.test_case_generator import generate_test_cases_from_doc, generate_test_cases_from_text, dedupe_test_cases
 from utils.error_handler import ErrorHandler, validate_file_upload, handle_llm_response_error
 
 class TestTestCaseGenerator:
@@ -304,5 +305,82 @@ class TestTestCaseGeneratorEdgeCases:
             
             assert "Error:" in str(exc_info.value)
 
+class TestShardedGeneration:
+    """Test cases for per-requirement sharded generation."""
+
+    DOCUMENT = "\n".join(f"REQ-{i:03d}: The system shall do thing {i}." for i in range(1, 8))
+
+    @staticmethod
+    def fake_gemini(prompt, **kwargs):
+        """Returns one test case per requirement in the prompt, plus a reworded duplicate of the first."""
+        ids = re.findall(r"^\s*(REQ-\d+)[ :]", prompt, re.MULTILINE)
+        cases = [{"id": "TC001", "requirement_id": r, "type": "positive", "description": f"Verify {r} works",
+                  "steps": "1. Open the app 2. Use the feature", "expected_result": "It works"} for r in ids]
+        cases.append({**cases[0], "id": "TC999", "description": f"verify {ids[0]} works!"})
+        return json.dumps(cases)
+
+    def test_shards_are_merged_deduped_and_renumbered(self):
+        """Every requirement is covered once and IDs are unique and sequential."""
+        with patch('modules.test_case_generator.SHARD_SIZE', 3), \
+             patch('src.services.gcp_vertex_ai.generate_text', side_effect=self.fake_gemini) as mock_vertex_ai:
+            result = generate_test_cases_from_text(self.DOCUMENT)
+
+        assert mock_vertex_ai.call_count == 3
+        assert list(result["requirement_id"]) == [f"REQ-{i:03d}" for i in range(1, 8)]
+        assert list(result["id"]) == [f"TC{i:03d}" for i in range(1, 8)]
+        assert result.attrs["coverage"]["uncovered"] == []
+
+    def test_truncated_shard_is_split_and_retried(self):
+        """A shard whose response is not valid JSON is regenerated in halves."""
+        def gemini(prompt, **kwargs):
+            if "REQ-004" in prompt and "REQ-005" in prompt:
+                return '[{"id": "TC001", "requirement_id": "REQ-004"'  # Truncated
+            return self.fake_gemini(prompt)
+
+        with patch('modules.test_case_generator.SHARD_SIZE', 3), \
+             patch('src.services.gcp_vertex_ai.generate_text', side_effect=gemini):
+            result = generate_test_cases_from_text(self.DOCUMENT)
+
+        assert sorted(result["requirement_id"]) == [f"REQ-{i:03d}" for i in range(1, 8)]
+
+    def test_failed_shards_show_as_uncovered(self):
+        """Shards that keep failing are reported as uncovered requirements."""
+        def gemini(prompt, **kwargs):
+            return "Error: quota exceeded" if "REQ-007" in prompt else self.fake_gemini(prompt)
+
+        with patch('modules.test_case_generator.SHARD_SIZE', 3), \
+             patch('src.services.gcp_vertex_ai.generate_text', side_effect=gemini):
+            result = generate_test_cases_from_text(self.DOCUMENT)
+
+        assert result.attrs["coverage"]["uncovered"] == ["REQ-007"]
+
+    def test_service_error_does_not_split_the_shard(self):
+        """A quota error fails the shard once instead of retrying it in ever smaller halves."""
+        def gemini(prompt, **kwargs):
+            return "Error: quota exceeded" if "REQ-001" in prompt else self.fake_gemini(prompt)
+
+        with patch('modules.test_case_generator.SHARD_SIZE', 3), \
+             patch('src.services.gcp_vertex_ai.generate_text', side_effect=gemini) as mock_vertex_ai:
+            result = generate_test_cases_from_text(self.DOCUMENT)
+
+        assert mock_vertex_ai.call_count == 3
+        assert result.attrs["coverage"]["uncovered"] == ["REQ-001", "REQ-002", "REQ-003"]
+
+    def test_all_shards_failing_raises(self):
+        """If no shard succeeds, the error is raised."""
+        with patch('modules.test_case_generator.SHARD_SIZE', 3), \
+             patch('src.services.gcp_vertex_ai.generate_text', return_value="Error: quota exceeded"):
+            with pytest.raises(ValueError, match="quota exceeded"):
+                generate_test_cases_from_text(self.DOCUMENT)
+
+    def test_dedupe_keeps_distinct_types(self):
+        """Near-identical wording only counts as a duplicate for the same requirement and type."""
+        df = pd.DataFrame([
+            {"requirement_id": "R-1", "type": "positive", "description": "Login works", "steps": "a", "expected_result": "ok"},
+            {"requirement_id": "R-1", "type": "positive", "description": "login works.", "steps": "a", "expected_result": "ok"},
+            {"requirement_id": "R-1", "type": "negative", "description": "Login works", "steps": "a", "expected_result": "ok"},
+        ])
+        assert list(dedupe_test_cases(df)["type"]) == ["positive", "negative"]
+
 if __name__ == "__main__":
     pytest.main([__file__])
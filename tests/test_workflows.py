@@ -0,0 +1,90 @@
+"""
+Automated tests for the workflows shared by the UI, the API and the queue worker.
+"""
+
+import pytest
+import sys
+import os
+import pandas as pd
+from unittest.mock import patch
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.modules import workflows
+from src.services import metrics
+
+class TestRunScan:
+    """Test cases for the shared audit-record-summarise scan workflow."""
+
+    @patch('src.modules.workflows.scan_history.record_scan', return_value=(True, "scan-1"))
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_scan_is_recorded_and_summarised(self, mock_analyze, mock_record):
+        """A scan audits the document with the standard's persona, records it and counts its findings."""
+        mock_analyze.return_value = "[Risk - High] Missing consent\n[Pass] Encrypted"
+        persona = workflows.compliance_scanner.COMPLIANCE_STANDARDS["EU (GDPR/MDR)"]["expert_persona"]
+
+        result = workflows.run_scan("srs.pdf", b"%PDF", "application/pdf", "EU (GDPR/MDR)")
+
+        mock_analyze.assert_called_once_with(b"%PDF", "application/pdf", persona, incremental=False)
+        mock_record.assert_called_once_with("srs.pdf", b"%PDF", "EU (GDPR/MDR)", mock_analyze.return_value)
+        assert result["scan_id"] == "scan-1"
+        assert (result["risk_count"], result["pass_count"], result["max_severity"]) == (1, 1, "High")
+
+    @patch('src.modules.workflows.scan_history.record_scan')
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance', return_value="Error: quota")
+    def test_failed_audit_raises_and_is_not_recorded(self, mock_analyze, mock_record):
+        """An audit error string raises instead of being recorded as a report."""
+        with pytest.raises(RuntimeError, match="quota"):
+            workflows.run_scan("srs.pdf", b"%PDF", "application/pdf", "EU (GDPR/MDR)")
+        mock_record.assert_not_called()
+
+    @patch('src.modules.workflows.scan_history.record_scan', return_value=(False, "Error: store offline"))
+    @patch('src.modules.workflows.compliance_scanner.audit_sections_incrementally', return_value="[Pass] Encrypted")
+    @patch('src.modules.workflows.compliance_scanner.analyze_document_compliance')
+    def test_extracted_text_is_audited_without_re_extracting(self, mock_analyze, mock_incremental, mock_record):
+        """Already-extracted text is audited directly; a failed save is reported, not raised."""
+        result = workflows.run_scan("srs.pdf", b"%PDF", "application/pdf", "EU (GDPR/MDR)", "auditor",
+                                    incremental=True, extracted_text="1. Data is encrypted.")
+
+        mock_analyze.assert_not_called()
+        mock_incremental.assert_called_once_with("1. Data is encrypted.", "auditor")
+        assert result["scan_id"] is None and result["history_error"] == "Error: store offline"
+
+class TestGenerationWorkflows:
+    """Test cases for generating and counting test cases and synthetic data."""
+
+    @patch('src.modules.workflows.metrics.increment')
+    @patch('src.modules.workflows.test_case_generator.generate_test_cases_from_doc')
+    def test_generated_test_cases_are_counted(self, mock_generate, mock_increment):
+        """Every generated test case counts towards the dashboard metrics."""
+        mock_generate.return_value = pd.DataFrame([{"id": "TC-1"}, {"id": "TC-2"}])
+
+        df = workflows.generate_test_cases(b"%PDF", "application/pdf", stream=True)
+
+        assert len(df) == 2
+        mock_generate.assert_called_once_with(b"%PDF", "application/pdf", stream=True)
+        mock_increment.assert_called_once_with(metrics.TEST_CASES_GENERATED, 2)
+
+    @patch('src.modules.workflows.metrics.increment')
+    @patch('src.modules.workflows.synthetic_data_hub.generate_synthetic_data')
+    def test_generated_records_are_counted(self, mock_generate, mock_increment):
+        """Every generated synthetic record counts towards the dashboard metrics."""
+        mock_generate.return_value = ('[{"a": 1}]', pd.DataFrame([{"a": 1}]))
+
+        json_data, df = workflows.generate_synthetic_data("one row")
+
+        assert json_data == '[{"a": 1}]' and len(df) == 1
+        mock_increment.assert_called_once_with(metrics.DATA_RECORDS_CREATED, 1)
+
+    @patch('src.modules.workflows.metrics.increment')
+    @patch('src.modules.workflows.test_case_generator.generate_test_cases_from_doc',
+           side_effect=ValueError("Error: unreadable"))
+    def test_failed_generation_is_not_counted(self, mock_generate, mock_increment):
+        """A generation failure propagates and records nothing."""
+        with pytest.raises(ValueError):
+            workflows.generate_test_cases(b"%PDF", "application/pdf")
+        mock_increment.assert_not_called()
+
+if __name__ == "__main__":
+    pytest.main([__file__])